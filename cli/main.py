@@ -1,25 +1,19 @@
 """Command-line interface for file converter."""
 import argparse
+import os
 import sys
-import uuid
 from pathlib import Path
-from colorama import Fore, Style, init
+from typing import Optional
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from file_converter.core.registry import Registry
-from file_converter.core.detect import sniff_mime
-from file_converter.core.planner import plan_conversion
-from file_converter.core.presets import load_defaults
-from file_converter.core.jobs import Job, Status
-from file_converter.core.engine import plan_and_run
+# colorama, libmagic and the core package are imported by the commands that
+# use them, so --help and usage errors don't pay for them.
 
 
 def main():
     """Main CLI entry point."""
-    init(autoreset=True)  # Initialize colorama
-    
     parser = argparse.ArgumentParser(
         description="File Converter - Local-only file conversion tool"
     )
@@ -29,13 +23,107 @@ def main():
     plan_parser = subparsers.add_parser("plan", help="Plan a conversion")
     plan_parser.add_argument("input", help="Input file path")
     plan_parser.add_argument("--to", required=True, help="Target MIME type")
+    plan_parser.add_argument("--no-daemon", action="store_true",
+                             help="Plan in this process even if 'fc serve' is running")
     
     # Run command
-    run_parser = subparsers.add_parser("run", help="Run a conversion")
-    run_parser.add_argument("input", help="Input file path")
-    run_parser.add_argument("--to", required=True, help="Target MIME type")
-    run_parser.add_argument("--out", help="Output directory (default: same as input)")
+    run_parser = subparsers.add_parser("run", help="Run conversions")
+    run_parser.add_argument("inputs", nargs="+", metavar="input",
+                            help="Input files, directories (converted recursively) "
+                                 "or glob patterns such as 'clips/**/*.mkv'")
+    run_parser.add_argument("--to", required=True, action="append",
+                            help="Target MIME type (repeat to write several outputs "
+                                 "from a single decode)")
+    run_parser.add_argument("--out", help="Output directory (default: same as input); "
+                                          "directory inputs are mirrored beneath it")
     run_parser.add_argument("--opt", action="append", help="Option in key=value format")
+    run_parser.add_argument("--jobs", "-j", type=int, default=1,
+                            help="Number of conversions to run at once (0 = CPU count)")
+    run_parser.add_argument("--thread-budget", type=int,
+                            help="Pack jobs by estimated CPU threads instead of --jobs "
+                                 "(0 = CPU count)")
+    run_parser.add_argument("--no-cache", action="store_true",
+                            help="Always convert, even if an identical conversion is cached")
+    run_parser.add_argument("--sampled-fingerprints", action="store_true",
+                            help="Identify large sources by size, mtime and sampled chunks "
+                                 "for the cache key (faster; misses edits that keep both)")
+    run_parser.add_argument("--log-dir",
+                            help="Write each job's full log to <log-dir>/<job id>.log.gz")
+    run_parser.add_argument("--no-daemon", action="store_true",
+                            help="Convert in this process even if 'fc serve' is running "
+                                 "(--jobs, --thread-budget and --sampled-fingerprints "
+                                 "only apply then)")
+    
+    # Batch command
+    batch_parser = subparsers.add_parser(
+        "batch", help="Run the jobs of a JSONL or CSV manifest, streaming JSONL results"
+    )
+    batch_parser.add_argument("--manifest", required=True,
+                              help="Manifest file (.jsonl or .csv), or - for stdin")
+    batch_parser.add_argument("--format", choices=["jsonl", "csv"],
+                              help="Manifest format (default: from the file extension)")
+    batch_parser.add_argument("--results",
+                              help="Write JSONL results here (default: stdout)")
+    batch_parser.add_argument("--out", help="Output directory (default: same as input)")
+    batch_parser.add_argument("--jobs", "-j", type=int, default=1,
+                              help="Number of conversions to run at once (0 = CPU count)")
+    batch_parser.add_argument("--max-in-flight", type=int,
+                              help="Manifest jobs read ahead of the results at most "
+                                   "(default: twice --jobs)")
+    batch_parser.add_argument("--no-cache", action="store_true",
+                              help="Always convert, even if an identical conversion is cached")
+    batch_parser.add_argument("--sampled-fingerprints", action="store_true",
+                              help="Identify large sources by size, mtime and sampled chunks "
+                                   "for the cache key (faster; misses edits that keep both)")
+    batch_parser.add_argument("--log-dir",
+                              help="Write each job's full log to <log-dir>/<job id>.log.gz")
+    
+    # Serve command
+    serve_parser = subparsers.add_parser(
+        "serve", help="Run a daemon that 'fc plan' and 'fc run' hand their work to"
+    )
+    serve_parser.add_argument("--socket",
+                              help="Unix socket to listen on (default: $FILE_CONVERTER_SOCKET "
+                                   "or ~/.cache/file-converter/daemon.sock)")
+    serve_parser.add_argument("--jobs", "-j", type=int, default=0,
+                              help="Number of conversions to run at once (0 = CPU count)")
+    serve_parser.add_argument("--no-cache", action="store_true",
+                              help="Always convert, even if an identical conversion is cached")
+    serve_parser.add_argument("--sampled-fingerprints", action="store_true",
+                              help="Identify large sources by size, mtime and sampled chunks "
+                                   "for the cache key (faster; misses edits that keep both)")
+    
+    # Distributed commands
+    coordinator_parser = subparsers.add_parser(
+        "coordinator", help="Hand the jobs of a manifest to 'fc worker' processes over TCP"
+    )
+    coordinator_parser.add_argument("--manifest", required=True,
+                                    help="Manifest file (.jsonl or .csv), or - for stdin")
+    coordinator_parser.add_argument("--format", choices=["jsonl", "csv"],
+                                    help="Manifest format (default: from the file extension)")
+    coordinator_parser.add_argument("--results",
+                                    help="Write JSONL results here (default: stdout)")
+    coordinator_parser.add_argument("--listen", default="127.0.0.1",
+                                    help="HOST[:PORT] to accept workers on (default: "
+                                         "127.0.0.1:7431; use 0.0.0.0 for other hosts)")
+    coordinator_parser.add_argument("--max-queued", type=int, default=1000,
+                                    help="Manifest jobs read ahead of the workers at most")
+    
+    worker_parser = subparsers.add_parser("worker", help="Run jobs for an 'fc coordinator'")
+    worker_parser.add_argument("--connect", required=True,
+                               help="Coordinator HOST[:PORT] (default port: 7431)")
+    worker_parser.add_argument("--jobs", "-j", type=int, default=1,
+                               help="Number of conversions to run at once")
+    worker_parser.add_argument("--prefetch", type=int,
+                               help="Jobs to hold ready beyond the running ones "
+                                    "(default: --jobs)")
+    worker_parser.add_argument("--no-cache", action="store_true",
+                               help="Always convert, even if an identical conversion is cached")
+    worker_parser.add_argument("--sampled-fingerprints", action="store_true",
+                               help="Identify large sources by size, mtime and sampled chunks "
+                                    "for the cache key (faster; misses edits that keep both)")
+    worker_parser.add_argument("--log-dir",
+                               help="Write each job's full log to <log-dir>/<job id>.log.gz")
     
     args = parser.parse_args()
     
@@ -43,57 +131,122 @@ def main():
         parser.print_help()
         return 0
     
-    # Initialize
-    registry = Registry()
-    plugin_dir = Path(__file__).parent.parent / "src" / "file_converter" / "plugins"
-    registry.load_plugins(plugin_dir)
+    from colorama import init
+    init(autoreset=True)  # Initialize colorama
     
-    presets = load_defaults()
+    # A running daemon has the registry and caches warm already
+    if args.command in ("plan", "run") and not args.no_daemon:
+        from file_converter.core.client import connect
+        client = connect()
+        if client is not None:
+            with client:
+                if args.command == "plan":
+                    return cmd_plan(args, client=client)
+                return cmd_run(args, client=client)
     
     if args.command == "plan":
-        return cmd_plan(args, registry)
+        return cmd_plan(args, _load_registry())
     elif args.command == "run":
-        return cmd_run(args, registry, presets)
+        from file_converter.core.presets import load_defaults
+        return cmd_run(args, _load_registry(), load_defaults())
+    elif args.command == "batch":
+        from file_converter.core.presets import load_defaults
+        return cmd_batch(args, _load_registry(), load_defaults())
+    elif args.command == "serve":
+        return cmd_serve(args)
+    elif args.command == "coordinator":
+        return cmd_coordinator(args)
+    elif args.command == "worker":
+        return cmd_worker(args)
     
     return 0
 
 
-def cmd_plan(args, registry):
-    """Execute the plan command."""
+def _load_registry():
+    """Registry of the bundled plugins (manifests only; modules load on use)."""
+    from file_converter.core.registry import Registry, default_manifest_cache_file
+    
+    registry = Registry(manifest_cache_file=default_manifest_cache_file())
+    plugin_dir = Path(__file__).parent.parent / "src" / "file_converter" / "plugins"
+    registry.load_plugins(plugin_dir)
+    return registry
+
+
+def cmd_plan(args, registry=None, client=None):
+    """Execute the plan command, through the daemon if a client is given."""
+    from colorama import Fore
+    
     input_path = Path(args.input)
     
     if not input_path.exists():
         print(f"{Fore.RED}Error: File not found: {input_path}")
         return 1
     
-    # Detect source MIME
+    # Detect source MIME and plan the conversion
     print(f"{Fore.CYAN}Detecting file type...")
-    src_mime = sniff_mime(str(input_path))
-    print(f"  Source MIME: {Fore.GREEN}{src_mime}")
-    
-    # Plan conversion
-    print(f"\n{Fore.CYAN}Planning conversion to {args.to}...")
-    plan = plan_conversion(src_mime, args.to, registry)
+    if client is not None:
+        from file_converter.core.client import DaemonError
+        
+        try:
+            reply = client.request("plan", src=str(input_path.resolve()), dst_mime=args.to)
+            src_mime, steps = reply["src_mime"], reply["steps"]
+            print(f"  Source MIME: {Fore.GREEN}{src_mime}")
+            print(f"\n{Fore.CYAN}Planning conversion to {args.to}...")
+        except (DaemonError, OSError) as e:
+            print(f"{Fore.YELLOW}Warning: Daemon request failed ({e}); planning in this process")
+            client = None
+    if client is None:
+        from file_converter.core.detect import sniff_mime
+        from file_converter.core.planner import plan_conversion, describe_plan
+        
+        registry = registry or _load_registry()
+        src_mime = sniff_mime(str(input_path))
+        print(f"  Source MIME: {Fore.GREEN}{src_mime}")
+        print(f"\n{Fore.CYAN}Planning conversion to {args.to}...")
+        plan = plan_conversion(src_mime, args.to, registry, str(input_path))
+        steps = describe_plan(plan) if plan else None
     
-    if not plan:
+    if not steps:
         print(f"{Fore.RED}Error: No conversion route found")
         print(f"  Cannot convert {src_mime} → {args.to}")
         return 1
     
     print(f"{Fore.GREEN}✓ Conversion is possible")
-    print(f"  Plugin: {plan['plugin'].name} v{plan['plugin'].version}")
-    print(f"  Cost: {plan['plan'].get('cost', 'unknown')}")
-    print(f"  Lossiness: {plan['plan'].get('lossiness', 'unknown')}")
+    if len(steps) > 1:
+        print(f"  Route: {len(steps)} steps")
+    for step in steps:
+        if len(steps) > 1:
+            print(f"  {step['src_mime']} → {step['dst_mime']}")
+        print(f"  Plugin: {step['plugin']} v{step['version']}")
+        print(f"  Cost: {step['cost'] if step['cost'] is not None else 'unknown'}")
+        print(f"  Lossiness: {step['lossiness'] or 'unknown'}")
+        if step['stream_copy']:
+            print(f"  Stream copy: {', '.join(step['stream_copy'])}")
     
     return 0
 
 
-def cmd_run(args, registry, presets):
-    """Execute the run command."""
-    input_path = Path(args.input)
+def _format_rate(job) -> str:
+    """Speed and ETA suffix for a progress line, if the plugin reported them."""
+    event = job.progress_event
+    if event is None or not event.speed:
+        return ""
+    text = f" ({event.speed:.1f}x"
+    if event.eta is not None:
+        minutes, seconds = divmod(int(event.eta), 60)
+        text += f", ETA {minutes}:{seconds:02d}"
+    return text + ")"
+
+
+def cmd_run(args, registry=None, presets=None, client=None):
+    """Execute the run command, through the daemon if a client is given."""
+    from colorama import Fore
+    from file_converter.core.jobs import Status
     
-    if not input_path.exists():
-        print(f"{Fore.RED}Error: File not found: {input_path}")
+    sources, missing = _expand_inputs(args.inputs)
+    for pattern in missing:
+        print(f"{Fore.RED}Error: No such file or no matches: {pattern}")
+    if not sources:
         return 1
     
     # Parse options
@@ -111,47 +264,426 @@ def cmd_run(args, registry, presets):
                 pass
             options[key] = value
     
-    # Detect source MIME
-    print(f"{Fore.CYAN}Detecting file type...")
-    src_mime = sniff_mime(str(input_path))
-    print(f"  Source: {Fore.GREEN}{src_mime}")
-    print(f"  Target: {Fore.GREEN}{args.to}")
-    
-    # Create job
-    job = Job(
-        id=str(uuid.uuid4()),
-        src_path=str(input_path),
-        src_mime=src_mime,
-        dst_mime=args.to,
-        options=options,
-    )
+    # One job per source and target; targets of a source share one decode.
+    # Files found by walking a directory or glob are skipped when they can't
+    # be converted, files named explicitly fail instead.
+    print(f"{Fore.CYAN}Detecting file types...")
+    if client is not None:
+        from file_converter.core.client import DaemonError
+        
+        try:
+            jobs, src_mimes = _submit_to_daemon(client, args, sources, options)
+        except (DaemonError, OSError) as e:
+            # Nothing was accepted, so the jobs can safely run here instead
+            print(f"{Fore.YELLOW}Warning: Daemon request failed ({e}); converting in this process")
+            client = None
+        else:
+            # Workers and the cache belong to the daemon, set by 'fc serve'
+            ignored = [flag for flag, given in (
+                ("--jobs", args.jobs != 1),
+                ("--thread-budget", args.thread_budget is not None),
+                ("--sampled-fingerprints", args.sampled_fingerprints),
+            ) if given]
+            if ignored:
+                print(f"{Fore.YELLOW}Warning: {', '.join(ignored)} ignored; the running daemon "
+                      f"uses its own 'fc serve' settings (pass --no-daemon to apply them)")
+    if client is None:
+        if registry is None:
+            from file_converter.core.presets import load_defaults
+            
+            registry, presets = _load_registry(), load_defaults()
+        jobs, src_mimes = _create_jobs(args, registry, sources, options)
+    
+    if len(sources) == 1:
+        print(f"  Source: {Fore.GREEN}{src_mimes.get(sources[0][0]) or 'unreadable'}")
+    else:
+        print(f"  Sources: {Fore.GREEN}{len(sources)} files")
+    print(f"  Target: {Fore.GREEN}{', '.join(args.to)}")
     
-    # Progress callback
+    converted = len({job.src_path for job in jobs})
+    if converted < len(sources):
+        print(f"{Fore.YELLOW}  Skipped {len(sources) - converted} files that can't be converted")
+    if not jobs:
+        print(f"{Fore.RED}Error: Nothing to convert")
+        return 1
+    
+    # Progress callback: percentages for a single source (all its targets
+    # share one decode, so report the first), one line per job otherwise
+    first_job = next(iter(jobs))
+    single_source = converted == 1
     last_progress = [0]
+    finished = [0]
     
     def on_progress(j):
-        if j.status == Status.RUNNING.value:
-            progress_pct = int(j.progress * 100)
-            # Only print on significant progress change
-            if progress_pct >= last_progress[0] + 5 or progress_pct == 100:
-                print(f"{Fore.YELLOW}  Progress: {progress_pct}%")
-                last_progress[0] = progress_pct
-    
-    # Run conversion
-    print(f"\n{Fore.CYAN}Starting conversion...")
-    result = plan_and_run(job, registry, presets, args.out, on_progress)
+        if single_source:
+            if j is first_job and j.status == Status.RUNNING.value:
+                progress_pct = int(j.progress * 100)
+                # Only print on significant progress change
+                if progress_pct >= last_progress[0] + 5 or progress_pct == 100:
+                    print(f"{Fore.YELLOW}  Progress: {progress_pct}%{_format_rate(j)}")
+                    last_progress[0] = progress_pct
+        elif j.status in (Status.DONE.value, Status.ERROR.value):
+            finished[0] += 1
+            mark = f"{Fore.GREEN}✓" if j.status == Status.DONE.value else f"{Fore.RED}✗"
+            print(f"  [{finished[0]}/{len(jobs)}] {mark} {j.src_path} → {j.dst_mime}")
     
-    if result.status == Status.DONE.value:
-        print(f"\n{Fore.GREEN}✓ Conversion completed successfully")
-        print(f"  Output: {result.output_path}")
-        return 0
+    # Run conversions
+    print(f"\n{Fore.CYAN}Starting conversion...")
+    if client is not None:
+        try:
+            _follow_daemon_jobs(client, jobs, on_progress)
+        except (DaemonError, OSError) as e:
+            # The jobs were handed over, so running them here could convert twice
+            unfinished = sum(job.status not in (Status.DONE.value, Status.ERROR.value)
+                             for job in jobs)
+            print(f"{Fore.RED}Error: Lost the daemon connection ({e}); "
+                  f"{unfinished} of {len(jobs)} conversions did not report back")
+            return 1
     else:
-        print(f"\n{Fore.RED}✗ Conversion failed")
+        from file_converter.core.engine import run_batch
+        
+        run_batch(jobs, registry, presets, args.out, on_progress, max_workers=args.jobs,
+                  thread_budget=args.thread_budget,
+                  cache=_conversion_cache(args))
+    
+    failed = [job for job in jobs if job.status == Status.ERROR.value]
+    if single_source:
+        for result in jobs:
+            if result.status == Status.DONE.value:
+                print(f"\n{Fore.GREEN}✓ Conversion to {result.dst_mime} completed successfully")
+                print(f"  Output: {result.output_path}")
+    for result in failed:
+        print(f"\n{Fore.RED}✗ Conversion of {result.src_path} to {result.dst_mime} failed")
         if result.logs:
             print(f"\n{Fore.YELLOW}Last log entries:")
-            for log in result.logs[-5:]:
+            for log in list(result.logs)[-5:]:
                 print(f"  {log}")
+            if result.log_path:
+                print(f"  Full log: {result.log_path}")
+    
+    if not single_source:
+        done = len(jobs) - len(failed)
+        color = Fore.GREEN if not failed else Fore.RED
+        print(f"\n{color}{done} of {len(jobs)} conversions succeeded, {len(failed)} failed")
+    
+    return 1 if failed or missing else 0
+
+
+def _create_jobs(args, registry, sources: list, options: dict):
+    """Detect sources in one batch and create their jobs; returns (JobStore, MIME by path)."""
+    import uuid
+    from file_converter.core.detect import sniff_many
+    from file_converter.core.jobs import Job, JobStore
+    from file_converter.core.planner import find_route
+    
+    mimes = sniff_many(path for path, _ in sources)
+    jobs = JobStore()
+    out_dirs = {}
+    for path, root in sources:
+        src_mime = mimes.get(path)
+        targets = [
+            dst_mime for dst_mime in args.to
+            if root is None or (src_mime and find_route(src_mime, dst_mime, registry))
+        ]
+        out_dir = _mirrored_out_dir(path, root, args.out, out_dirs)
+        for dst_mime in targets:
+            job = Job(
+                id=str(uuid.uuid4()),
+                src_path=path,
+                src_mime=src_mime or "application/octet-stream",
+                dst_mime=dst_mime,
+                options=options,
+                out_dir=out_dir,
+            )
+            if args.log_dir:
+                job.log_path = str(Path(args.log_dir) / f"{job.id}.log.gz")
+            jobs.add(job)
+    return jobs, mimes
+
+
+def _submit_to_daemon(client, args, sources: list, options: dict):
+    """Submit sources to the daemon; returns (list of _RemoteJob, MIME by path)."""
+    out_dirs = {}
+    out = os.path.abspath(args.out) if args.out else None
+    requests = []
+    for path, root in sources:
+        out_dir = _mirrored_out_dir(path, root, out, out_dirs)
+        if out_dir is None and out:
+            out_dir = out
+        requests.append({"src": os.path.abspath(path), "out_dir": out_dir,
+                         "skip_unroutable": root is not None})
+    
+    reply = client.request(
+        "submit", sources=requests, dst_mime=args.to, options=options,
+        log_dir=os.path.abspath(args.log_dir) if args.log_dir else None,
+        no_cache=args.no_cache,
+    )
+    
+    jobs = []
+    mimes = {}
+    for (path, _), source in zip(sources, reply["sources"]):
+        mimes[path] = source["src_mime"]
+        for job in source["jobs"]:
+            jobs.append(_RemoteJob(job["id"], path, job["dst_mime"]))
+    return jobs, mimes
+
+
+def _follow_daemon_jobs(client, jobs: list, on_progress) -> None:
+    """Stream the daemon's progress for jobs, updating them and calling on_progress."""
+    by_id = {job.id: job for job in jobs}
+    for reply in client.stream("progress", ids=list(by_id)):
+        job = by_id[reply["job"]["id"]]
+        job.update(reply["job"])
+        on_progress(job)
+
+
+class _RemoteJob:
+    """Client-side view of a job running in the daemon."""
+    
+    def __init__(self, job_id: str, src_path: str, dst_mime: str):
+        self.id = job_id
+        self.src_path = src_path
+        self.dst_mime = dst_mime
+        self.status = "queued"
+        self.progress = 0.0
+        self.progress_event = None
+        self.output_path = None
+        self.log_path = None
+        self.logs = []
+    
+    def update(self, record: dict) -> None:
+        """Take the state reported by the daemon."""
+        from types import SimpleNamespace
+        
+        self.status = record["status"]
+        self.progress = record["progress"]
+        self.output_path = record["output_path"]
+        self.log_path = record["log_path"]
+        self.logs = record.get("logs", self.logs)
+        if record["speed"] is not None:
+            self.progress_event = SimpleNamespace(speed=record["speed"], eta=record["eta"])
+
+
+def _conversion_cache(args):
+    """The output cache for a command, or None with --no-cache."""
+    from file_converter.core.cache import ConversionCache
+    
+    if args.no_cache:
+        return None
+    return ConversionCache(fingerprint_mode="sampled" if args.sampled_fingerprints else "full")
+
+
+def cmd_serve(args):
+    """Execute the serve command."""
+    from colorama import Fore
+    from file_converter.core.presets import load_defaults
+    from file_converter.core.daemon import ConversionDaemon
+    
+    daemon = ConversionDaemon(
+        _load_registry(), load_defaults(), args.socket, max_workers=args.jobs,
+        cache=_conversion_cache(args),
+    )
+    try:
+        daemon.start()
+    except RuntimeError as e:
+        print(f"{Fore.RED}Error: {e}")
+        return 1
+    
+    print(f"{Fore.GREEN}Serving on {daemon.socket_path} (Ctrl+C to stop)")
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def cmd_batch(args, registry, presets):
+    """Execute the batch command."""
+    import json
+    from colorama import Fore
+    from file_converter.core.manifest import read_manifest, result_record
+    from file_converter.core.jobs import Status
+    from file_converter.core.engine import run_stream
+    
+    if args.manifest != "-" and not Path(args.manifest).exists():
+        print(f"{Fore.RED}Error: File not found: {args.manifest}", file=sys.stderr)
+        return 1
+    
+    jobs = read_manifest(args.manifest, args.format)
+    if args.log_dir:
+        jobs = _with_log_paths(jobs, args.log_dir)
+    
+    results = open(args.results, "w") if args.results else sys.stdout
+    counts = {Status.DONE.value: 0, Status.ERROR.value: 0}
+    try:
+        for job, elapsed in run_stream(jobs, registry, presets, args.out,
+                                       max_workers=args.jobs,
+                                       max_in_flight=args.max_in_flight,
+                                       cache=_conversion_cache(args)):
+            counts[job.status] = counts.get(job.status, 0) + 1
+            results.write(json.dumps(result_record(job, elapsed)) + "\n")
+            results.flush()  # Consumers can act on each result right away
+    finally:
+        if results is not sys.stdout:
+            results.close()
+    
+    failed = counts[Status.ERROR.value]
+    color = Fore.GREEN if not failed else Fore.RED
+    print(f"{color}{counts[Status.DONE.value]} conversions succeeded, {failed} failed",
+          file=sys.stderr)
+    return 1 if failed else 0
+
+
+def cmd_coordinator(args):
+    """Execute the coordinator command."""
+    import json
+    import threading
+    from colorama import Fore
+    from file_converter.core.cluster import Coordinator, DEFAULT_PORT
+    from file_converter.core.manifest import read_manifest, result_record
+    from file_converter.core.jobs import Status
+    
+    if args.manifest != "-" and not Path(args.manifest).exists():
+        print(f"{Fore.RED}Error: File not found: {args.manifest}", file=sys.stderr)
+        return 1
+    
+    results = open(args.results, "w") if args.results else sys.stdout
+    results_lock = threading.Lock()
+    failed = [0]
+    
+    def on_finish(job, elapsed):
+        with results_lock:
+            if job.status != Status.DONE.value:
+                failed[0] += 1
+            results.write(json.dumps(result_record(job, elapsed)) + "\n")
+            results.flush()  # Consumers can act on each result right away
+    
+    coordinator = Coordinator(*_parse_address(args.listen, DEFAULT_PORT), on_finish=on_finish)
+    coordinator.start()
+    threading.Thread(target=coordinator.serve_forever, daemon=True).start()
+    host, port = coordinator.address
+    print(f"{Fore.GREEN}Waiting for workers on {host}:{port}", file=sys.stderr)
+    
+    try:
+        for job in read_manifest(args.manifest, args.format):
+            if job.status != Status.QUEUED.value:
+                on_finish(job, 0.0)  # Invalid record
+                continue
+            coordinator.wait_for_room(args.max_queued)
+            coordinator.submit([job])
+        coordinator.wait()
+    finally:
+        coordinator.shutdown()
+        if results is not sys.stdout:
+            results.close()
+    
+    stats = coordinator.stats()
+    for worker in stats['workers']:
+        print(f"  {worker['worker']}: {worker['completed']} done, {worker['failed']} failed, "
+              f"{worker['jobs_per_hour']:.0f} jobs/hour", file=sys.stderr)
+    color = Fore.GREEN if not failed[0] else Fore.RED
+    print(f"{color}Finished with {len(stats['workers'])} workers, {failed[0]} failed",
+          file=sys.stderr)
+    return 1 if failed[0] else 0
+
+
+def cmd_worker(args):
+    """Execute the worker command."""
+    from colorama import Fore
+    from file_converter.core.cluster import Worker, DEFAULT_PORT
+    from file_converter.core.presets import load_defaults
+    
+    worker = Worker(
+        _parse_address(args.connect, DEFAULT_PORT), _load_registry(), load_defaults(),
+        slots=args.jobs, prefetch=args.prefetch,
+        cache=_conversion_cache(args),
+        log_dir=os.path.abspath(args.log_dir) if args.log_dir else None,
+    )
+    print(f"{Fore.CYAN}Worker {worker.worker_id} connecting to {args.connect}...")
+    try:
+        worker.run()
+    except OSError as e:
+        print(f"{Fore.RED}Error: Cannot reach coordinator: {e}")
         return 1
+    except KeyboardInterrupt:
+        pass  # The coordinator requeues our unfinished jobs
+    return 0
+
+
+def _parse_address(text: str, default_port: int) -> tuple[str, int]:
+    """Split HOST[:PORT] into a host and port."""
+    host, sep, port = text.rpartition(":")
+    if not sep:
+        return text, default_port
+    return host, int(port)
+
+
+def _with_log_paths(jobs, log_dir: str):
+    """Give each job a full log file under log_dir as it is read."""
+    for job in jobs:
+        job.log_path = str(Path(log_dir) / f"{job.id}.log.gz")
+        yield job
+
+
+def _expand_inputs(inputs: list[str]) -> tuple[list[tuple[str, Optional[str]]], list[str]]:
+    """
+    Expand run inputs into source files.
+    
+    Directories are walked recursively and glob patterns are expanded
+    (with ** matching any depth). Each file is paired with the root its
+    output tree mirrors: the directory, or the fixed leading part of the
+    glob. Files named directly have no root.
+    
+    Returns:
+        (list of (path, root) pairs without duplicates, inputs that matched nothing)
+    """
+    import glob
+    from file_converter.core.detect import scan_files
+    
+    sources = {}
+    missing = []
+    for pattern in inputs:
+        if os.path.isfile(pattern):
+            sources.setdefault(pattern, None)
+            continue
+        if os.path.isdir(pattern):
+            root, matches = pattern, [pattern]
+        elif glob.has_magic(pattern):
+            root = _glob_root(pattern)
+            matches = sorted(glob.glob(pattern, recursive=True))
+        else:
+            matches = []
+        if not matches:
+            missing.append(pattern)
+            continue
+        
+        for path in scan_files(matches):
+            if os.path.isfile(path):
+                sources.setdefault(path, root)
+    
+    return list(sources.items()), missing
+
+
+def _glob_root(pattern: str) -> str:
+    """The directory part of a glob pattern before its first wildcard."""
+    import glob
+    
+    parts = []
+    for part in Path(pattern).parts[:-1]:
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    return str(Path(*parts)) if parts else "."
+
+
+def _mirrored_out_dir(path: str, root: Optional[str], out: Optional[str],
+                      out_dirs: dict) -> Optional[str]:
+    """Output directory of a source, mirroring its place under root beneath out."""
+    if not out or root is None:
+        return None
+    relative = os.path.relpath(os.path.dirname(path), root)
+    # One string per directory, shared by all of its jobs
+    return out_dirs.setdefault(relative, os.path.normpath(os.path.join(out, relative)))
 
 
 if __name__ == "__main__":
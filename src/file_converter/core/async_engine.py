@@ -0,0 +1,213 @@
+"""Asyncio conversion engine - supervises many conversions on one event loop."""
+import asyncio
+from typing import Optional, Callable, Union
+from .jobs import Job, JobStore, Status
+from .registry import Registry
+from .cache import ConversionCache
+from .exec import CancelToken
+from .engine import (
+    _Step,
+    _close_jobs,
+    _fail_job,
+    _finish_group,
+    _group_by_source,
+    _prepare_groups,
+    _run_and_finish,
+    _progress_callback,
+    _run_group,
+    _serialized,
+    resolve_max_workers,
+)
+
+
+async def plan_and_run_async(
+    job: Job,
+    registry: Registry,
+    presets: dict,
+    out_dir: Optional[str] = None,
+    on_progress: Optional[Callable[[Job], None]] = None,
+    cache: Optional[ConversionCache] = None
+) -> Job:
+    """
+    Plan and execute a single conversion job on the running event loop.
+    
+    Args: as for engine.plan_and_run()
+    
+    Returns:
+        Updated job with results
+    """
+    return (await plan_and_run_multi_async([job], registry, presets, out_dir,
+                                           on_progress, cache))[0]
+
+
+async def plan_and_run_multi_async(
+    jobs: list[Job],
+    registry: Registry,
+    presets: dict,
+    out_dir: Optional[str] = None,
+    on_progress: Optional[Callable[[Job], None]] = None,
+    cache: Optional[ConversionCache] = None
+) -> list[Job]:
+    """
+    Asyncio counterpart of engine.plan_and_run_multi().
+    
+    A single-hop job whose plugin has a run_async() coroutine is awaited
+    on the loop, so it holds no thread while its tool runs. Planning,
+    probing and output checks, and plugins without run_async(), multi-hop
+    routes and multi-output runs, go to the loop's default executor so
+    they never block the loop.
+    
+    If the task is cancelled, its unfinished jobs fail with "Cancelled".
+    Running tools are killed, on the loop or on a thread, as long as they
+    were started with exec.run_command() or registered with
+    exec.track_process() (as the ffmpeg plugin does); a plugin doing the
+    work in Python itself is left to finish its current run.
+    
+    Args: as for engine.plan_and_run_multi()
+    
+    Returns:
+        The jobs, updated with results
+    """
+    token = CancelToken()
+    try:
+        with token.current():
+            groups = await asyncio.to_thread(_prepare_groups, jobs, registry, presets,
+                                             out_dir, on_progress, cache)
+            
+            for group in groups:
+                if len(group) > 1:
+                    # Multi-output runs, with their per-output retries, go to a thread
+                    await _in_thread(token, _run_and_finish, group, on_progress, cache)
+                    continue
+                try:
+                    await _run_plugin_async(group, on_progress, token)
+                except Exception as e:
+                    for step in group:
+                        _fail_job(step.job, e)
+                    continue
+                await asyncio.to_thread(_finish_group, group, cache)
+    except asyncio.CancelledError:
+        token.cancel()
+        for job in jobs:
+            if job.status in (Status.QUEUED.value, Status.RUNNING.value):
+                job.add_log("Cancelled")
+                job.set_status(Status.ERROR)
+        raise
+    finally:
+        _close_jobs(jobs, on_progress)
+    
+    return jobs
+
+
+async def _in_thread(token: CancelToken, func: Callable, *args) -> None:
+    """
+    Run func on a worker thread under the current cancel token.
+    
+    If the task is cancelled, the token kills func's commands and the
+    cancellation waits for func to return, so no thread is left writing
+    an output of a job already failed as cancelled.
+    """
+    future = asyncio.ensure_future(asyncio.to_thread(func, *args))
+    try:
+        await asyncio.shield(future)
+    except asyncio.CancelledError:
+        token.cancel()
+        try:
+            await future
+        except Exception:
+            pass  # Non-critical; the jobs are failed as cancelled
+        raise
+
+
+async def _run_plugin_async(
+    group: list[_Step],
+    on_progress: Optional[Callable[[Job], None]],
+    token: CancelToken
+) -> None:
+    """Run a single-step group's plugin on the loop if it can, else on a worker thread."""
+    progress_callback, duration = await asyncio.to_thread(_progress_callback, group, on_progress)
+    
+    step = group[0]
+    plugin = step.plan['plugin']
+    if len(step.plan['steps']) == 1 and plugin.supports_async():
+        await plugin.run_async(
+            step.job.src_path,
+            str(step.output_path),
+            step.job.dst_mime,
+            step.options,
+            progress_callback
+        )
+        return
+    
+    await _in_thread(token, _run_group, group, progress_callback, duration)
+
+
+async def run_batch_async(
+    jobs: Union[JobStore, list[Job]],
+    registry: Registry,
+    presets: dict,
+    out_dir: Optional[str] = None,
+    on_update: Optional[Callable[[Job], None]] = None,
+    max_concurrent: Optional[int] = None,
+    cache: Optional[ConversionCache] = None
+) -> None:
+    """
+    Run multiple jobs as tasks on the running event loop.
+    
+    The asyncio counterpart of engine.run_batch(), for batches of many
+    light jobs: a job waiting on its tool costs a task rather than a
+    thread, so max_concurrent can go well past the CPU count (hundreds of
+    short audio encodes, say). Jobs that share a source run together, and
+    on_update is never called concurrently.
+    
+    From a GUI, start it as a task on the GUI's loop (Flet's
+    page.run_task); elsewhere, use run_batch_sync().
+    
+    Args:
+        jobs: JobStore or list of jobs; only queued jobs are run
+        registry: Plugin registry
+        presets: Preset configurations
+        out_dir: Output directory (a job's own out_dir takes precedence)
+        on_update: Callback for job updates
+        max_concurrent: Number of sources converted at once (None or 0 = CPU count)
+        cache: Optional conversion output cache
+    """
+    if isinstance(jobs, JobStore):
+        queued = jobs.with_status(Status.QUEUED)
+    else:
+        queued = [job for job in jobs if job.status == Status.QUEUED.value]
+    if not queued:
+        return
+    
+    units = _group_by_source(queued)
+    limit = min(resolve_max_workers(max_concurrent), len(units))
+    # Threaded steps report from executor threads, so updates still need serializing
+    update = _serialized(on_update) if on_update and limit > 1 else on_update
+    slots = asyncio.Semaphore(limit)
+    
+    async def run_unit(unit: list[Job]) -> None:
+        async with slots:
+            await plan_and_run_multi_async(unit, registry, presets, out_dir, update, cache)
+    
+    await asyncio.gather(*(run_unit(unit) for unit in units))
+
+
+def run_batch_sync(
+    jobs: Union[JobStore, list[Job]],
+    registry: Registry,
+    presets: dict,
+    out_dir: Optional[str] = None,
+    on_update: Optional[Callable[[Job], None]] = None,
+    max_concurrent: Optional[int] = None,
+    cache: Optional[ConversionCache] = None
+) -> None:
+    """
+    Run run_batch_async() to completion on a new event loop.
+    
+    For synchronous callers; code already running on a loop should await
+    run_batch_async() instead.
+    
+    Args: as for run_batch_async()
+    """
+    asyncio.run(run_batch_async(jobs, registry, presets, out_dir, on_update,
+                                max_concurrent, cache))
@@ -0,0 +1,239 @@
+"""Content-addressed cache of finished conversion outputs."""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+
+# Default size cap for cached outputs (bytes)
+DEFAULT_MAX_BYTES = 5 * 1024 ** 3
+
+# Files up to this size are always hashed in full
+SAMPLE_THRESHOLD = 16 * 1024 ** 2
+
+# Sampled fingerprints hash this many evenly spaced chunks of SAMPLE_CHUNK bytes
+SAMPLE_COUNT = 16
+SAMPLE_CHUNK = 64 * 1024
+
+# Eviction shrinks the cache to this fraction of max_bytes, so it runs rarely
+EVICT_TARGET = 0.9
+
+_fingerprints: dict[tuple, str] = {}
+_fingerprints_lock = threading.Lock()
+
+
+def fingerprint(path: str, mode: str = "full") -> str:
+    """
+    Fingerprint a file's content.
+
+    In "full" mode the whole file is hashed. In "sampled" mode, files larger
+    than SAMPLE_THRESHOLD are identified by their size, mtime and evenly
+    spaced chunks (always including the head and tail), so multi-GB sources
+    are fingerprinted in milliseconds. Sampling misses an edit outside the
+    chunks that keeps both size and mtime, so it is opt-in. Results are
+    memoized per file version.
+
+    Args:
+        path: File to fingerprint
+        mode: "full" or "sampled"
+
+    Returns:
+        Hex digest string
+    """
+    stat = os.stat(path)
+    # ctime too: it changes on every write, even if mtime is set back
+    memo_key = (os.path.realpath(path), stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns,
+                mode)
+    with _fingerprints_lock:
+        if memo_key in _fingerprints:
+            return _fingerprints[memo_key]
+
+    digest = hashlib.sha256()
+    digest.update(f"{mode}:{stat.st_size}:".encode())
+    with open(path, 'rb') as f:
+        if mode == "full" or stat.st_size <= SAMPLE_THRESHOLD:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        else:
+            digest.update(f"{stat.st_mtime_ns}:".encode())
+            step = (stat.st_size - SAMPLE_CHUNK) / (SAMPLE_COUNT - 1)
+            for i in range(SAMPLE_COUNT):
+                f.seek(int(i * step))
+                digest.update(f.read(SAMPLE_CHUNK))
+
+    result = digest.hexdigest()
+    with _fingerprints_lock:
+        _fingerprints[memo_key] = result
+    return result
+
+
+class ConversionCache:
+    """
+    Stores finished outputs keyed by what produced them.
+
+    The key covers the source content fingerprint, the target MIME type,
+    the resolved options and the plugin name and version. Outputs are
+    hardlinked into the cache where possible (copied otherwise) and placed
+    back the same way on a hit. Each entry has a small metadata file whose
+    mtime records its last use; once the cache grows past max_bytes, the
+    least recently used entries are evicted down to EVICT_TARGET of it.
+    The cache size is kept as a running total, so the cache directory is
+    only scanned when the cache is first used and when evicting.
+
+    Sources are fingerprinted in full unless fingerprint_mode is "sampled"
+    (see fingerprint()).
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        fingerprint_mode: str = "full"
+    ):
+        if cache_dir is None:
+            cache_dir = Path.home() / ".cache" / "file-converter" / "outputs"
+
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.fingerprint_mode = fingerprint_mode
+        self._lock = threading.Lock()
+        self._total: Optional[int] = None  # Bytes cached, once scanned
+
+    def key(self, src_path: str, dst_mime: str, options: dict, plugin) -> str:
+        """
+        Compute the cache key for a conversion.
+
+        Args:
+            src_path: Source file path
+            dst_mime: Target MIME type
+            options: Resolved conversion options (presets applied)
+            plugin: Plugin that will run the conversion
+
+        Returns:
+            Hex digest string
+        """
+        material = {
+            'src': fingerprint(src_path, self.fingerprint_mode),
+            'dst_mime': dst_mime,
+            'options': options,
+            'plugin': plugin.name,
+            'version': plugin.version,
+        }
+        encoded = json.dumps(material, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    def lookup(self, key: str) -> Optional[Path]:
+        """Return the cached artifact for a key (marking it used), or None."""
+        meta_path = self._meta_path(key)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            artifact = self.cache_dir / f"{key}{meta['ext']}"
+            if artifact.stat().st_size != meta['size']:
+                return None
+            os.utime(meta_path)
+        except (OSError, ValueError, KeyError):
+            return None
+        return artifact
+
+    def fetch(self, key: str, dst_path: str) -> bool:
+        """Place the cached artifact for a key at dst_path. Returns True on a hit."""
+        artifact = self.lookup(key)
+        if artifact is None:
+            return False
+        try:
+            _link_or_copy(artifact, Path(dst_path))
+        except OSError:
+            return False
+        return True
+
+    def store(self, key: str, output_path: str) -> None:
+        """Add a finished output to the cache, evicting old entries if needed."""
+        output = Path(output_path)
+        try:
+            size = output.stat().st_size
+            if size > self.max_bytes:
+                return
+
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            artifact = self.cache_dir / f"{key}{output.suffix}"
+            _link_or_copy(output, artifact)
+
+            meta_path = self._meta_path(key)
+            replaced = _entry_size(meta_path)
+            tmp_path = meta_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump({'ext': output.suffix, 'size': size, 'stored': time.time()}, f)
+            os.replace(tmp_path, meta_path)
+        except OSError:
+            return  # Non-critical
+
+        with self._lock:
+            if self._total is None:
+                self._total = sum(_entry_size(path) for path in self._meta_files())
+            else:
+                self._total += size - replaced
+            over = self._total > self.max_bytes
+        if over:
+            self._evict()
+
+    def _meta_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _meta_files(self) -> list[Path]:
+        try:
+            return list(self.cache_dir.glob("*.json"))
+        except OSError:
+            return []
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until the cache fits EVICT_TARGET of max_bytes."""
+        with self._lock:
+            entries = []
+            total = 0
+            # Other processes may share the directory, so the total is recounted here
+            for meta_path in self._meta_files():
+                try:
+                    with open(meta_path) as f:
+                        meta = json.load(f)
+                    used = meta_path.stat().st_mtime
+                except (OSError, ValueError):
+                    continue
+                entries.append((used, meta_path, meta))
+                total += meta.get('size', 0)
+
+            entries.sort(key=lambda entry: entry[0])
+            for _, meta_path, meta in entries:
+                if total <= self.max_bytes * EVICT_TARGET:
+                    break
+                artifact = meta_path.with_suffix(meta.get('ext', ''))
+                for path in (meta_path, artifact):
+                    try:
+                        path.unlink()
+                    except OSError:
+                        pass
+                total -= meta.get('size', 0)
+            self._total = total
+
+
+def _entry_size(meta_path: Path) -> int:
+    """Size recorded in an entry's metadata file (0 if there is no entry)."""
+    try:
+        with open(meta_path) as f:
+            return json.load(f).get('size', 0)
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    """Hardlink src to dst (atomically replacing dst), copying across filesystems."""
+    tmp_path = dst.with_name(f".{dst.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        os.link(src, tmp_path)
+    except OSError:
+        shutil.copy2(src, tmp_path)
+    os.replace(tmp_path, dst)
@@ -0,0 +1,119 @@
+"""Client for the conversion daemon's local socket API (see daemon.py)."""
+import json
+import os
+import socket
+from pathlib import Path
+from typing import IO, Iterator, Optional
+
+
+# Environment variable overriding the daemon socket path
+SOCKET_ENV = "FILE_CONVERTER_SOCKET"
+
+
+class DaemonError(RuntimeError):
+    """An error reported by the daemon; reply holds the full error reply, if any."""
+    
+    def __init__(self, message: str, reply: Optional[dict] = None):
+        super().__init__(message)
+        self.reply = reply or {}
+
+
+def default_socket_path() -> Path:
+    """Socket the daemon listens on: $FILE_CONVERTER_SOCKET, else under ~/.cache."""
+    override = os.environ.get(SOCKET_ENV)
+    if override:
+        return Path(override)
+    return Path.home() / ".cache" / "file-converter" / "daemon.sock"
+
+
+def send_message(wfile: IO[bytes], message: dict) -> None:
+    """Write one message: a JSON object on its own line."""
+    wfile.write(json.dumps(message).encode() + b"\n")
+    wfile.flush()
+
+
+def read_message(rfile: IO[bytes]) -> Optional[dict]:
+    """Read one message; returns None when the connection is closed."""
+    line = rfile.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+
+class DaemonClient:
+    """
+    Connection to a running conversion daemon.
+    
+    Each request gets one reply, except 'progress', whose replies stream
+    until the jobs it follows are finished.
+    """
+    
+    def __init__(self, sock: socket.socket):
+        self._sock = sock
+        self._file = sock.makefile("rwb")
+    
+    def request(self, op: str, **fields) -> dict:
+        """
+        Send a request and return its reply.
+        
+        Raises:
+            DaemonError: If the daemon reports an error or hangs up
+        """
+        send_message(self._file, {"op": op, **fields})
+        return self._reply()
+    
+    def stream(self, op: str, **fields) -> Iterator[dict]:
+        """Send a request and yield its replies up to the closing one."""
+        send_message(self._file, {"op": op, **fields})
+        while True:
+            reply = self._reply()
+            if reply.get("end"):
+                return
+            yield reply
+    
+    def close(self) -> None:
+        """Close the connection."""
+        try:
+            self._file.close()
+        except OSError:
+            pass  # Daemon already gone; nothing left to flush to
+        finally:
+            self._sock.close()
+    
+    def _reply(self) -> dict:
+        reply = read_message(self._file)
+        if reply is None:
+            raise DaemonError("Daemon closed the connection")
+        if not reply.get("ok"):
+            raise DaemonError(reply.get("error", "Request failed"), reply)
+        return reply
+    
+    def __enter__(self) -> "DaemonClient":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def connect(socket_path: Optional[str] = None) -> Optional[DaemonClient]:
+    """
+    Connect to the daemon if one is running.
+    
+    Args:
+        socket_path: Daemon socket (default: default_socket_path())
+    
+    Returns:
+        Connected client, or None if no daemon is listening
+    """
+    path = str(socket_path or default_socket_path())
+    if not os.path.exists(path):
+        return None
+    
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        # A stale socket file left by a daemon that is gone
+        sock.close()
+        return None
+    return DaemonClient(sock)
@@ -0,0 +1,489 @@
+"""Distributed conversion: a coordinator owning the job queue, workers pulling over TCP."""
+import os
+import socket
+import socketserver
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import IO, Callable, Iterable, Optional
+from .jobs import Job, JobStore, Status
+from .registry import Registry
+from .engine import plan_and_run
+from .cache import ConversionCache
+from .client import DaemonClient, DaemonError, read_message, send_message
+
+
+# Port the coordinator listens on by default
+DEFAULT_PORT = 7431
+
+# Seconds between worker heartbeats
+HEARTBEAT_INTERVAL = 2.0
+
+# Seconds of silence after which a worker is presumed dead and its jobs requeued
+HEARTBEAT_TIMEOUT = 10.0
+
+# Longest a take request waits for work before returning empty (seconds)
+TAKE_WAIT = 1.0
+
+
+@dataclass
+class _WorkerState:
+    """What the coordinator knows about one worker."""
+    worker_id: str
+    slots: int
+    joined: float = field(default_factory=time.monotonic)
+    last_seen: float = field(default_factory=time.monotonic)
+    alive: bool = True
+    prefetched: dict = field(default_factory=dict)  # Job id -> Job, taken but not started
+    running: dict = field(default_factory=dict)  # Job id -> Job
+    completed: int = 0
+    failed: int = 0
+    busy: float = 0.0  # Seconds spent running jobs
+
+
+class Coordinator:
+    """
+    Owns the job queue and hands jobs to workers that pull them over TCP.
+    
+    Workers take jobs in small batches, keeping a few prefetched beyond
+    what they are running. When the queue is empty, a worker asking for
+    work steals prefetched jobs that another worker has not started yet;
+    the victim finds out when its start request is refused. Workers send
+    heartbeats, and one that stays silent for heartbeat_timeout (or whose
+    heartbeat connection drops) is presumed dead: its prefetched and
+    running jobs go back to the front of the queue, and any late result
+    from it is ignored.
+    
+    Workers run jobs with plan_and_run, so sources and output directories
+    must be on storage every worker sees under the same paths.
+    
+    Requests are the daemon's newline-delimited JSON messages (see
+    daemon.py) with these ops: hello, heartbeat, take, start, finish, bye
+    and stats. A heartbeat or take from a worker presumed dead fails with
+    "expired" set; the worker may say hello again to rejoin.
+    """
+    
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_PORT,
+        heartbeat_timeout: float = HEARTBEAT_TIMEOUT,
+        on_finish: Optional[Callable[[Job, float], None]] = None
+    ):
+        self.host = host
+        self.port = port
+        self.heartbeat_timeout = heartbeat_timeout
+        self.on_finish = on_finish
+        self.jobs = JobStore()  # Queued and assigned jobs; finished jobs are dropped
+        self._queue: deque[Job] = deque()
+        self._workers: dict[str, _WorkerState] = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._stopped = threading.Event()
+        self._server: Optional[socketserver.TCPServer] = None
+    
+    @property
+    def address(self) -> tuple[str, int]:
+        """Host and port the coordinator listens on (port is known after start())."""
+        if self._server is not None:
+            return self._server.server_address[:2]
+        return self.host, self.port
+    
+    def start(self) -> None:
+        """Bind the listening socket and start presuming silent workers dead."""
+        self._server = _Server((self.host, self.port), _Handler)
+        self._server.coordinator = self
+        threading.Thread(target=self._reap_workers, name="fc-reaper", daemon=True).start()
+    
+    def serve_forever(self) -> None:
+        """Handle worker requests until shutdown()."""
+        if self._server is None:
+            self.start()
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+    
+    def shutdown(self) -> None:
+        """Stop serving."""
+        self._stopped.set()
+        with self._changed:
+            self._changed.notify_all()
+        if self._server is not None:
+            self._server.shutdown()
+    
+    def submit(self, jobs: Iterable[Job]) -> None:
+        """Queue jobs for the workers."""
+        with self._changed:
+            for job in jobs:
+                self.jobs.add(job)
+                self._queue.append(job)
+            self._changed.notify_all()
+    
+    def wait_for_room(self, max_queued: int) -> None:
+        """Block while more than max_queued jobs wait for a worker."""
+        with self._changed:
+            while len(self._queue) > max_queued and not self._stopped.is_set():
+                self._changed.wait()
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every submitted job has finished.
+        
+        Returns:
+            True if all finished, False on timeout
+        """
+        with self._changed:
+            return self._changed.wait_for(lambda: len(self.jobs) == 0, timeout)
+    
+    def stats(self) -> dict:
+        """
+        Throughput per worker and in total.
+        
+        Returns:
+            Dict with 'workers' (per worker: id, slots, alive, completed,
+            failed, busy seconds and jobs_per_hour since it joined),
+            'jobs_per_hour' summed over live workers, and 'queued'
+        """
+        now = time.monotonic()
+        with self._lock:
+            workers = [
+                {
+                    'worker': state.worker_id,
+                    'slots': state.slots,
+                    'alive': state.alive,
+                    'completed': state.completed,
+                    'failed': state.failed,
+                    'busy_seconds': round(state.busy, 3),
+                    'jobs_per_hour': round(state.completed * 3600 / max(now - state.joined, 1e-6), 1),
+                }
+                for state in self._workers.values()
+            ]
+            queued = len(self._queue)
+        return {
+            'workers': workers,
+            'jobs_per_hour': round(sum(w['jobs_per_hour'] for w in workers if w['alive']), 1),
+            'queued': queued,
+        }
+    
+    def handle(self, message: dict, wfile: IO[bytes]) -> Optional[str]:
+        """Answer one request; returns the worker id of a hello."""
+        op = message.get("op")
+        handler = getattr(self, f"_op_{op}", None) if isinstance(op, str) else None
+        if handler is None:
+            send_message(wfile, {"ok": False, "error": f"Unknown operation: {op}"})
+            return None
+        
+        try:
+            send_message(wfile, handler(message))
+        except (KeyError, TypeError, ValueError) as e:
+            send_message(wfile, {"ok": False, "error": f"Bad {op} request: {e}"})
+            return None
+        return message["worker"] if op == "hello" else None
+    
+    def _op_hello(self, message: dict) -> dict:
+        with self._lock:
+            self._workers[message["worker"]] = _WorkerState(message["worker"],
+                                                            int(message.get("slots", 1)))
+        # Several heartbeats fit in the timeout, however short it is
+        interval = min(HEARTBEAT_INTERVAL, self.heartbeat_timeout / 4)
+        return {"ok": True, "heartbeat_interval": interval}
+    
+    def _op_heartbeat(self, message: dict) -> dict:
+        with self._lock:
+            state = self._seen(message["worker"])
+        if state is None:
+            return _expired_reply()
+        return {"ok": True}
+    
+    def _op_take(self, message: dict) -> dict:
+        """Hand out up to count jobs, stealing unstarted ones if the queue is empty."""
+        count = max(1, int(message.get("count", 1)))
+        deadline = time.monotonic() + min(float(message.get("wait", TAKE_WAIT)), TAKE_WAIT)
+        with self._changed:
+            while True:
+                state = self._seen(message["worker"])
+                if state is None:
+                    return _expired_reply()
+                taken = self._take_queued(count) or self._steal(state, count)
+                remaining = deadline - time.monotonic()
+                if taken or remaining <= 0 or self._stopped.is_set():
+                    break
+                self._changed.wait(remaining)
+            
+            for job in taken:
+                state.prefetched[job.id] = job
+            if taken:
+                self._changed.notify_all()  # Room in the queue
+        return {"ok": True, "jobs": [_job_record(job) for job in taken]}
+    
+    def _op_start(self, message: dict) -> dict:
+        job_id = message["id"]
+        with self._lock:
+            state = self._seen(message["worker"])
+            job = state.prefetched.pop(job_id, None) if state else None
+            if job is None:
+                return {"ok": False, "error": f"Job {job_id} was reassigned"}
+            state.running[job_id] = job
+            job.set_status(Status.RUNNING)
+        return {"ok": True}
+    
+    def _op_finish(self, message: dict) -> dict:
+        job_id = message["id"]
+        with self._changed:
+            state = self._seen(message["worker"])
+            job = state.running.pop(job_id, None) if state else None
+            if job is None:
+                # The job was requeued meanwhile; another worker reports it
+                return {"ok": True, "stale": True}
+            
+            elapsed = float(message.get("elapsed", 0.0))
+            state.busy += elapsed
+            for line in message.get("logs", []):
+                job.add_log(line)
+            job.output_path = message.get("output_path")
+            job.set_status(Status(message["status"]))
+            if job.status == Status.DONE.value:
+                state.completed += 1
+            else:
+                state.failed += 1
+            self.jobs.remove(job_id)
+            self._changed.notify_all()
+        
+        if self.on_finish:
+            self.on_finish(job, elapsed)
+        return {"ok": True}
+    
+    def _op_bye(self, message: dict) -> dict:
+        self._drop_worker(message["worker"], "left")
+        return {"ok": True}
+    
+    def _op_stats(self, message: dict) -> dict:
+        return {"ok": True, **self.stats()}
+    
+    def _seen(self, worker_id: str) -> Optional[_WorkerState]:
+        """Record that a worker is alive (caller holds the lock)."""
+        state = self._workers.get(worker_id)
+        if state is None or not state.alive:
+            return None
+        state.last_seen = time.monotonic()
+        return state
+    
+    def _take_queued(self, count: int) -> list[Job]:
+        taken = []
+        while self._queue and len(taken) < count:
+            taken.append(self._queue.popleft())
+        return taken
+    
+    def _steal(self, thief: _WorkerState, count: int) -> list[Job]:
+        """Take up to half of the unstarted jobs of the most backed-up other worker."""
+        victims = [s for s in self._workers.values()
+                   if s.alive and s is not thief and s.prefetched]
+        if not victims:
+            return []
+        victim = max(victims, key=lambda s: len(s.prefetched))
+        # Steal the most recently taken: the victim will start the older ones first
+        stolen_ids = list(victim.prefetched)[-max(1, min(count, len(victim.prefetched) // 2)):]
+        return [victim.prefetched.pop(job_id) for job_id in stolen_ids]
+    
+    def _drop_worker(self, worker_id: str, reason: str) -> None:
+        """Forget a worker, putting its unfinished jobs back at the front of the queue."""
+        with self._changed:
+            state = self._workers.get(worker_id)
+            if state is None or not state.alive:
+                return
+            state.alive = False
+            unfinished = list(state.running.values()) + list(state.prefetched.values())
+            state.running.clear()
+            state.prefetched.clear()
+            for job in reversed(unfinished):
+                job.add_log(f"Requeued: worker {worker_id} {reason}")
+                job.set_status(Status.QUEUED)
+                self._queue.appendleft(job)
+            self._changed.notify_all()
+    
+    def _reap_workers(self) -> None:
+        """Presume workers dead after heartbeat_timeout without a request."""
+        while not self._stopped.wait(self.heartbeat_timeout / 4):
+            now = time.monotonic()
+            with self._lock:
+                silent = [s.worker_id for s in self._workers.values()
+                          if s.alive and now - s.last_seen > self.heartbeat_timeout]
+            for worker_id in silent:
+                self._drop_worker(worker_id, "stopped sending heartbeats")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    """TCP server; each connection is served on its own thread."""
+    daemon_threads = True
+    allow_reuse_address = True
+    coordinator: Coordinator
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Serves one worker connection; a hello connection dropping means the worker died."""
+    
+    def handle(self) -> None:
+        coordinator = self.server.coordinator
+        worker_id = None
+        try:
+            while True:
+                message = read_message(self.rfile)
+                if message is None:
+                    break
+                worker_id = coordinator.handle(message, self.wfile) or worker_id
+        except (OSError, ValueError):
+            pass  # Worker went away or sent garbage
+        if worker_id is not None:
+            coordinator._drop_worker(worker_id, "disconnected")
+
+
+class Worker:
+    """
+    Pulls jobs from a coordinator and runs them with plan_and_run.
+    
+    Runs `slots` jobs at once, each slot on its own connection, and keeps
+    up to `prefetch` jobs taken but not yet started (which an idle worker
+    may steal). A separate connection says hello and sends heartbeats; if
+    the coordinator has presumed the worker dead (a stall longer than its
+    heartbeat timeout, say), it says hello again and carries on.
+    """
+    
+    def __init__(
+        self,
+        address: tuple[str, int],
+        registry: Registry,
+        presets: dict,
+        slots: int = 1,
+        prefetch: Optional[int] = None,
+        cache: Optional[ConversionCache] = None,
+        log_dir: Optional[str] = None,
+        worker_id: Optional[str] = None
+    ):
+        self.address = address
+        self.registry = registry
+        self.presets = presets
+        self.slots = max(1, slots)
+        self.prefetch = self.slots if prefetch is None else max(0, prefetch)
+        self.cache = cache
+        self.log_dir = log_dir
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._local: deque[dict] = deque()  # Taken, not started
+        self._local_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._control: Optional[DaemonClient] = None
+    
+    def run(self) -> None:
+        """Work until stop(), or until the coordinator goes away."""
+        self._control = self._connect()
+        try:
+            interval = self._hello()
+            slots = [
+                threading.Thread(target=self._work, name=f"fc-slot-{i}", daemon=True)
+                for i in range(self.slots)
+            ]
+            for thread in slots:
+                thread.start()
+            while not self._stop.wait(interval):
+                try:
+                    self._control.request("heartbeat", worker=self.worker_id)
+                except DaemonError as e:
+                    if not e.reply.get("expired"):
+                        raise
+                    interval = self._hello()
+            for thread in slots:
+                thread.join()
+            self._control.request("bye", worker=self.worker_id)
+        except (OSError, RuntimeError):
+            self._stop.set()  # Coordinator gone (DaemonError is a RuntimeError)
+        finally:
+            self._control.close()
+    
+    def stop(self) -> None:
+        """Finish running jobs, hand back prefetched ones and leave."""
+        self._stop.set()
+    
+    def _hello(self) -> float:
+        """Join (or rejoin) the coordinator; returns the heartbeat interval."""
+        with self._local_lock:
+            # Jobs taken before expiring went back to the queue
+            self._local.clear()
+        reply = self._control.request("hello", worker=self.worker_id, slots=self.slots)
+        return reply["heartbeat_interval"]
+    
+    def _connect(self) -> DaemonClient:
+        return DaemonClient(socket.create_connection(self.address))
+    
+    def _work(self) -> None:
+        """One slot: take, start, run and report jobs until stopped."""
+        try:
+            with self._connect() as conn:
+                while not self._stop.is_set():
+                    try:
+                        record = self._next_job(conn)
+                    except DaemonError as e:
+                        if not e.reply.get("expired"):
+                            raise
+                        # The heartbeat loop says hello again
+                        self._stop.wait(TAKE_WAIT)
+                        continue
+                    if record is None:
+                        continue
+                    try:
+                        conn.request("start", worker=self.worker_id, id=record["id"])
+                    except RuntimeError:
+                        continue  # Stolen by another worker
+                    conn.request("finish", worker=self.worker_id, **self._run(record))
+        except (OSError, RuntimeError):
+            self._stop.set()
+    
+    def _next_job(self, conn: DaemonClient) -> Optional[dict]:
+        with self._local_lock:
+            if self._local:
+                return self._local.popleft()
+            count = 1 + max(0, self.prefetch - len(self._local))
+        
+        jobs = conn.request("take", worker=self.worker_id, count=count)["jobs"]
+        if not jobs:
+            return None
+        with self._local_lock:
+            self._local.extend(jobs[1:])
+        return jobs[0]
+    
+    def _run(self, record: dict) -> dict:
+        """Run one job; returns the fields of its finish request."""
+        job = Job(id=record["id"], src_path=record["src"], src_mime=record["src_mime"],
+                  dst_mime=record["dst_mime"], options=record["options"],
+                  out_dir=record["out_dir"])
+        if self.log_dir:
+            job.log_path = os.path.join(self.log_dir, f"{job.id}.log.gz")
+        
+        start = time.monotonic()
+        plan_and_run(job, self.registry, self.presets, cache=self.cache)
+        return {
+            'id': job.id,
+            'status': job.status,
+            'output_path': job.output_path,
+            'elapsed': time.monotonic() - start,
+            'logs': list(job.logs)[-5:],
+        }
+
+
+def _expired_reply() -> dict:
+    """Reply to a worker the coordinator has presumed dead."""
+    return {"ok": False, "expired": True,
+            "error": "Unknown or expired worker; say hello again"}
+
+
+def _job_record(job: Job) -> dict:
+    """Plain-data job handed to a worker."""
+    return {
+        'id': job.id,
+        'src': job.src_path,
+        'src_mime': job.src_mime,
+        'dst_mime': job.dst_mime,
+        'options': dict(job.options),
+        'out_dir': job.out_dir,
+    }
@@ -0,0 +1,331 @@
+"""Long-lived conversion daemon serving a local socket API."""
+import os
+import socketserver
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import IO, Optional
+from .jobs import Job, JobStore, Status
+from .registry import Registry
+from .planner import plan_conversion, describe_plan, find_route
+from .detect import MimeCache, sniff_mime, sniff_many
+from .engine import plan_and_run_multi, resolve_max_workers
+from .cache import ConversionCache
+from .exec import CancelToken
+from .client import connect, default_socket_path, read_message, send_message
+
+
+# Longest wait between progress checks while streaming progress (seconds)
+PROGRESS_INTERVAL = 0.1
+
+# Finished jobs kept for status requests; the oldest tenth goes when exceeded
+MAX_FINISHED_JOBS = 10000
+
+
+class ConversionDaemon:
+    """
+    Serves conversion requests on a Unix domain socket.
+    
+    The registry, presets, probe and MIME caches and the worker pool live
+    as long as the daemon, so a request costs a socket round trip instead
+    of an interpreter start, a registry load and cold caches.
+    
+    Requests are JSON objects, one per line, naming an "op":
+    
+    - ping: check that the daemon is up
+    - plan: src, dst_mime -> src_mime and steps (None if no route)
+    - submit: sources (list of {src, out_dir, skip_unroutable}), dst_mime
+      (list), options, log_dir, no_cache -> per source: src_mime and jobs
+      (id and dst_mime). A source's targets run together, sharing one
+      decode. With skip_unroutable, targets the source can't be converted
+      to are dropped.
+    - status: id -> job; without an id, job counts by status
+    - cancel: id -> cancels a queued or running job. A running job's tool
+      is killed; if it was shared with other targets of the source, those
+      are converted again on their own. Cancelling a finished job fails
+      with an error and the job's status
+    - progress: ids -> streams job states as they change, ending once
+      every job is finished
+    - shutdown: stop the daemon
+    
+    Every reply has "ok"; failed requests carry "error" instead of data.
+    Paths must be absolute, since the daemon has its own working directory.
+    """
+    
+    def __init__(
+        self,
+        registry: Registry,
+        presets: dict,
+        socket_path: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        cache: Optional[ConversionCache] = None,
+        mime_cache: Optional[MimeCache] = None
+    ):
+        self.registry = registry
+        self.presets = presets
+        self.socket_path = Path(socket_path or default_socket_path())
+        self.cache = cache
+        self.mime_cache = mime_cache
+        self.jobs = JobStore()
+        self._pool = ThreadPoolExecutor(max_workers=resolve_max_workers(max_workers),
+                                        thread_name_prefix="fc-daemon")
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._server: Optional[socketserver.UnixStreamServer] = None
+        # Running job id -> the cancel token of its unit, and the unit
+        self._running: dict[str, tuple[CancelToken, list[Job]]] = {}
+    
+    def start(self) -> None:
+        """
+        Bind the socket (serve_forever() then accepts requests).
+        
+        Raises:
+            RuntimeError: If another daemon is listening on the socket
+        """
+        client = connect(self.socket_path)
+        if client is not None:
+            client.close()
+            raise RuntimeError(f"A daemon is already running on {self.socket_path}")
+        
+        # Whatever is left is a stale socket file
+        try:
+            self.socket_path.unlink()
+        except FileNotFoundError:
+            pass
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        # Local user only; the socket is created with these permissions,
+        # so it is never reachable by others, even briefly
+        umask = os.umask(0o177)
+        try:
+            self._server = _Server(str(self.socket_path), _Handler)
+        finally:
+            os.umask(umask)
+        self._server.conversion_daemon = self
+    
+    def serve_forever(self) -> None:
+        """Handle requests until shutdown()."""
+        if self._server is None:
+            self.start()
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            try:
+                self.socket_path.unlink()
+            except FileNotFoundError:
+                pass
+    
+    def shutdown(self) -> None:
+        """Stop serving; queued jobs are dropped, running ones finish."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        if self._server is not None:
+            self._server.shutdown()
+    
+    def handle(self, message: dict, wfile: IO[bytes]) -> None:
+        """Answer one request."""
+        op = message.get("op")
+        handler = getattr(self, f"_op_{op}", None) if isinstance(op, str) else None
+        if handler is None:
+            send_message(wfile, {"ok": False, "error": f"Unknown operation: {op}"})
+            return
+        
+        try:
+            if op == "progress":
+                for reply in handler(message):
+                    send_message(wfile, reply)
+            else:
+                send_message(wfile, handler(message))
+        except (KeyError, TypeError, ValueError) as e:
+            send_message(wfile, {"ok": False, "error": f"Bad {op} request: {e}"})
+        except Exception as e:
+            # E.g. an unreadable source or a failing plugin; the connection stays usable
+            send_message(wfile, {"ok": False, "error": f"{op} failed: {e}"})
+    
+    def _op_ping(self, message: dict) -> dict:
+        return {"ok": True, "pid": os.getpid()}
+    
+    def _op_plan(self, message: dict) -> dict:
+        src = message["src"]
+        src_mime = sniff_mime(src)
+        plan = plan_conversion(src_mime, message["dst_mime"], self.registry, src,
+                               message.get("options") or {})
+        return {"ok": True, "src_mime": src_mime,
+                "steps": describe_plan(plan) if plan else None}
+    
+    def _op_submit(self, message: dict) -> dict:
+        dst_mimes = message["dst_mime"]
+        if isinstance(dst_mimes, str):
+            dst_mimes = [dst_mimes]
+        options = message.get("options") or {}
+        log_dir = message.get("log_dir")
+        cache = None if message.get("no_cache") else self.cache
+        
+        sources = message["sources"]
+        mimes = sniff_many((source["src"] for source in sources), cache=self.mime_cache)
+        
+        replies = []
+        for source in sources:
+            src = source["src"]
+            src_mime = mimes.get(src)
+            targets = [
+                dst_mime for dst_mime in dst_mimes
+                if not source.get("skip_unroutable")
+                or (src_mime and find_route(src_mime, dst_mime, self.registry))
+            ]
+            unit = [
+                Job(id=str(uuid.uuid4()), src_path=src,
+                    src_mime=src_mime or "application/octet-stream",
+                    dst_mime=dst_mime, options=options, out_dir=source.get("out_dir"))
+                for dst_mime in targets
+            ]
+            for job in unit:
+                if log_dir:
+                    job.log_path = os.path.join(log_dir, f"{job.id}.log.gz")
+                self.jobs.add(job)
+            if unit:
+                self._pool.submit(self._run_unit, unit, cache)
+            replies.append({"src": src, "src_mime": src_mime,
+                            "jobs": [{"id": j.id, "dst_mime": j.dst_mime} for j in unit]})
+        
+        return {"ok": True, "sources": replies}
+    
+    def _op_status(self, message: dict) -> dict:
+        job_id = message.get("id")
+        if job_id is None:
+            return {"ok": True, "counts": self.jobs.counts()}
+        job = self.jobs.get(job_id)
+        if job is None:
+            return {"ok": False, "error": f"Unknown job: {job_id}"}
+        return {"ok": True, "job": _job_record(job, logs=True)}
+    
+    def _op_cancel(self, message: dict) -> dict:
+        """Cancel a queued or running job, killing its tool if it is running."""
+        job_id = message["id"]
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return {"ok": False, "error": f"Unknown job: {job_id}"}
+            if job.status not in (Status.QUEUED.value, Status.RUNNING.value):
+                return {"ok": False, "status": job.status,
+                        "error": f"Job {job_id} is {job.status}; only queued or running "
+                                 "jobs can be cancelled"}
+            # The engine skips jobs that are no longer running
+            job.add_log("Cancelled")
+            job.set_status(Status.ERROR)
+            running = self._running.get(job_id)
+            if running is None:
+                job.close_log()
+            self._changed.notify_all()
+        
+        if running is not None:
+            token, unit = running
+            if any(other.status == Status.RUNNING.value for other in unit):
+                token.kill()  # Shared with targets still wanted; they run again alone
+            else:
+                token.cancel()
+        return {"ok": True, "job": _job_record(job)}
+    
+    def _op_progress(self, message: dict):
+        jobs = [self.jobs.get(job_id) for job_id in message["ids"]]
+        if None in jobs:
+            yield {"ok": False, "error": "Unknown job"}
+            return
+        
+        finished = (Status.DONE.value, Status.ERROR.value)
+        sent = {}
+        while True:
+            for job in jobs:
+                state = (job.status, job.progress, job.progress_event)
+                if sent.get(job.id) != state:
+                    sent[job.id] = state
+                    yield {"ok": True,
+                           "job": _job_record(job, logs=job.status in finished)}
+            if all(job.status in finished for job in jobs):
+                yield {"ok": True, "end": True}
+                return
+            with self._changed:
+                self._changed.wait(PROGRESS_INTERVAL)
+    
+    def _op_shutdown(self, message: dict) -> dict:
+        # shutdown() waits for the serving loop, so it can't run on this thread
+        threading.Thread(target=self.shutdown, daemon=True).start()
+        return {"ok": True}
+    
+    def _run_unit(self, unit: list[Job], cache: Optional[ConversionCache]) -> None:
+        """Run one source's jobs, minus any cancelled while queued."""
+        token = CancelToken()
+        with self._lock:
+            unit = [job for job in unit if job.status == Status.QUEUED.value]
+            for job in unit:
+                job.set_status(Status.RUNNING)
+                self._running[job.id] = (token, unit)
+        
+        if unit:
+            try:
+                with token.current():
+                    plan_and_run_multi(unit, self.registry, self.presets, None,
+                                       self._on_update, cache)
+            finally:
+                with self._lock:
+                    for job in unit:
+                        self._running.pop(job.id, None)
+                self._forget_finished()
+                self._on_update(unit[0])
+    
+    def _on_update(self, job: Job) -> None:
+        with self._changed:
+            self._changed.notify_all()
+    
+    def _forget_finished(self) -> None:
+        """Drop the oldest finished jobs once more than MAX_FINISHED_JOBS are kept."""
+        if self.jobs.count(Status.DONE) + self.jobs.count(Status.ERROR) <= MAX_FINISHED_JOBS:
+            return
+        finished = (Status.DONE.value, Status.ERROR.value)
+        oldest = list(islice((job for job in self.jobs if job.status in finished),
+                             MAX_FINISHED_JOBS // 10))
+        for job in oldest:
+            self.jobs.remove(job.id)
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    """Socket server; each connection is served on its own thread."""
+    daemon_threads = True
+    conversion_daemon: ConversionDaemon
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Reads requests from one connection until the client hangs up."""
+    
+    def handle(self) -> None:
+        daemon = self.server.conversion_daemon
+        try:
+            while True:
+                message = read_message(self.rfile)
+                if message is None:
+                    return
+                daemon.handle(message, self.wfile)
+        except (OSError, ValueError):
+            pass  # Client went away or sent garbage
+
+
+def _job_record(job: Job, logs: bool = False) -> dict:
+    """Plain-data job state sent to clients."""
+    event = job.progress_event
+    record = {
+        "id": job.id,
+        "src_path": job.src_path,
+        "src_mime": job.src_mime,
+        "dst_mime": job.dst_mime,
+        "status": job.status,
+        "progress": job.progress,
+        "speed": event.speed if event else None,
+        "eta": event.eta if event else None,
+        "output_path": job.output_path,
+        "log_path": job.log_path,
+    }
+    if logs:
+        record["logs"] = list(job.logs)
+    return record
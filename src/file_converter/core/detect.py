@@ -1,7 +1,11 @@
 """MIME type detection utilities."""
-import magic
+import json
+import mmap
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Iterable, Iterator, Optional
 
 
 # Extension fallback mapping
@@ -27,10 +31,77 @@ EXTENSION_FALLBACK = {
     '.htm': 'text/html',
 }
 
+# Bytes of each file handed to libmagic
+HEADER_BYTES = 64 * 1024
+
+# Files in the first batch of sniff_batches (later batches grow)
+FIRST_BATCH_SIZE = 32
+
+# Entries kept in the persistent MIME cache (oldest dropped first)
+MIME_CACHE_MAX_ENTRIES = 200_000
+
 # Supported MIME types (will be populated by registry)
 _supported_mimes = set()
 
 
+class MimeCache:
+    """
+    Remembers detected MIME types per file version.
+    
+    Entries are keyed by (device, inode, size, mtime_ns), so renamed or
+    moved files are still recognized while changed files are sniffed
+    again. The cache is loaded from a JSON file on first use and written
+    back by save().
+    """
+    
+    def __init__(self, cache_file: str = None):
+        if cache_file is None:
+            cache_file = Path.home() / ".cache" / "file-converter" / "mime.json"
+        
+        self.cache_file = Path(cache_file)
+        self._entries: Optional[dict[str, str]] = None
+        self._dirty = False
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[str]:
+        """Cached MIME type for a key, or None."""
+        with self._lock:
+            return self._load().get(key)
+    
+    def put(self, key: str, mime: str) -> None:
+        """Remember the MIME type for a key."""
+        with self._lock:
+            entries = self._load()
+            entries[key] = mime
+            while len(entries) > MIME_CACHE_MAX_ENTRIES:
+                del entries[next(iter(entries))]
+            self._dirty = True
+    
+    def save(self) -> None:
+        """Write new entries to disk atomically (failures are ignored)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = self.cache_file.with_suffix(f".{os.getpid()}.tmp")
+            try:
+                self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+                with open(tmp_path, 'w') as f:
+                    json.dump(self._entries, f)
+                os.replace(tmp_path, self.cache_file)
+                self._dirty = False
+            except OSError:
+                pass  # Non-critical
+    
+    def _load(self) -> dict[str, str]:
+        if self._entries is None:
+            try:
+                with open(self.cache_file) as f:
+                    self._entries = dict(json.load(f))
+            except (OSError, ValueError, TypeError):
+                self._entries = {}
+        return self._entries
+
+
 def sniff_mime(path: str) -> str:
     """
     Detect MIME type of a file using python-magic with extension fallback.
@@ -41,21 +112,176 @@ def sniff_mime(path: str) -> str:
     Returns:
         MIME type string
     """
-    path = Path(path)
-    
-    if not path.exists():
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
         raise FileNotFoundError(f"File not found: {path}")
     
+    key = _cache_key(stat)
+    mime = _cache.get(key)
+    if mime is None:
+        mime = _detect(str(path))
+        _cache.put(key, mime)
+    return mime
+
+
+def sniff_many(
+    paths: Iterable[str],
+    max_workers: Optional[int] = None,
+    cache: Optional[MimeCache] = None,
+    save: bool = True
+) -> dict[str, str]:
+    """
+    Detect the MIME types of many files at once.
+    
+    Files already in the MIME cache are answered without being opened.
+    The rest have only their first HEADER_BYTES read (via mmap) and are
+    identified on a thread pool; the new results are saved to the cache.
+    
+    Args:
+        paths: File paths
+        max_workers: Detection threads (None = based on CPU count)
+        cache: MIME cache to use (None = the global cache)
+        save: Write new cache entries to disk before returning
+        
+    Returns:
+        Mapping of path to MIME type; paths that can't be read are left out
+    """
+    if cache is None:
+        cache = _cache
+    
+    results = {}
+    misses = []
+    for path in paths:
+        try:
+            key = _cache_key(os.stat(path))
+        except OSError:
+            continue
+        mime = cache.get(key)
+        if mime is None:
+            misses.append((path, key))
+        else:
+            results[path] = mime
+    
+    if misses:
+        if max_workers is None:
+            max_workers = min(32, (os.cpu_count() or 1) * 4)
+        with ThreadPoolExecutor(max_workers=max_workers,
+                                thread_name_prefix="fc-sniff") as pool:
+            detected = pool.map(lambda miss: _detect(str(miss[0])), misses)
+            for (path, key), mime in zip(misses, detected):
+                cache.put(key, mime)
+                results[path] = mime
+        if save:
+            cache.save()
+    
+    return results
+
+
+def scan_files(
+    paths: Iterable[str],
+    cancel: Optional[threading.Event] = None
+) -> Iterator[str]:
+    """
+    Yield the files among paths, walking directories with os.scandir.
+    
+    Files are yielded as given. Directories are walked depth-first in name
+    order, skipping hidden entries and not following symlinked directories.
+    Files are yielded as they are found, so callers can start on the first
+    ones while a large tree is still being walked.
+    
+    Args:
+        paths: Files and directories
+        cancel: Optional event that stops the walk when set
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        
+        pending = [path]
+        while pending:
+            if cancel is not None and cancel.is_set():
+                return
+            current = pending.pop()
+            try:
+                with os.scandir(current) as it:
+                    entries = sorted(it, key=lambda entry: entry.name)
+            except OSError:
+                continue
+            
+            subdirs = []
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file():
+                        yield entry.path
+                except OSError:
+                    continue
+            pending.extend(reversed(subdirs))
+
+
+def sniff_batches(
+    paths: Iterable[str],
+    batch_size: int = 1024,
+    cancel: Optional[threading.Event] = None,
+    cache: Optional[MimeCache] = None
+) -> Iterator[dict[str, str]]:
+    """
+    Detect the files under paths, yielding results in batches.
+    
+    Batches start small so the first results arrive quickly, then double
+    up to batch_size. New cache entries are saved once at the end.
+    
+    Args:
+        paths: Files and directories (see scan_files)
+        batch_size: Largest number of files per batch
+        cancel: Optional event that stops scanning when set
+        cache: MIME cache to use (None = the global cache)
+        
+    Yields:
+        Mappings of path to MIME type, in scan order
+    """
+    if cache is None:
+        cache = _cache
+    
+    size = min(FIRST_BATCH_SIZE, batch_size)
+    batch = []
+    try:
+        for path in scan_files(paths, cancel):
+            batch.append(path)
+            if len(batch) >= size:
+                yield sniff_many(batch, cache=cache, save=False)
+                batch = []
+                size = min(size * 2, batch_size)
+            if cancel is not None and cancel.is_set():
+                return
+        if batch:
+            yield sniff_many(batch, cache=cache, save=False)
+    finally:
+        cache.save()
+
+
+def _cache_key(stat: os.stat_result) -> str:
+    """MIME cache key for a file version."""
+    return f"{stat.st_dev}:{stat.st_ino}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _detect(path: str) -> str:
+    """Identify a file from its header, falling back to its extension."""
     # Try python-magic first
     try:
-        mime = magic.from_file(str(path), mime=True)
+        mime = _magic().from_buffer(_read_header(path))
         if mime and mime != 'application/octet-stream':
             return mime
     except Exception:
         pass
     
     # Fall back to extension
-    ext = path.suffix.lower()
+    ext = Path(path).suffix.lower()
     if ext in EXTENSION_FALLBACK:
         return EXTENSION_FALLBACK[ext]
     
@@ -63,6 +289,38 @@ def sniff_mime(path: str) -> str:
     return 'application/octet-stream'
 
 
+def _read_header(path: str) -> bytes:
+    """Read the first HEADER_BYTES of a file, mapping it rather than reading it."""
+    with open(path, 'rb') as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return mapped[:HEADER_BYTES]
+        except (ValueError, OSError):
+            # Empty files and special files can't be mapped
+            return f.read(HEADER_BYTES)
+
+
+def _magic() -> "magic.Magic":
+    """libmagic handle for the current thread (handles aren't thread-safe)."""
+    handle = getattr(_magic_handles, 'handle', None)
+    if handle is None:
+        import magic  # Loads libmagic and its database; only needed to sniff
+        
+        handle = _magic_handles.handle = magic.Magic(mime=True)
+    return handle
+
+
+_magic_handles = threading.local()
+
+# Global MIME cache instance
+_cache = MimeCache()
+
+
+def get_mime_cache() -> MimeCache:
+    """Get the global MIME cache instance."""
+    return _cache
+
+
 def is_supported(mime: str) -> bool:
     """
     Check if a MIME type is supported by any loaded plugin.
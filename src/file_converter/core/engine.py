@@ -1,12 +1,63 @@
 """Conversion engine - orchestrates the conversion process."""
 import json
+import os
 import re
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Optional, Callable
-from .jobs import Job, Status
+from typing import Optional, Callable, Iterable, Iterator, Union
+from .jobs import Job, JobStore, Status
 from .registry import Registry
 from .planner import plan_conversion
 from .detect import sniff_mime
+from .probe import probe
+from .cache import ConversionCache
+from .progress import ProgressEvent
+
+
+# Output paths claimed by in-flight jobs, so parallel jobs never pick the same name
+_reserved_outputs: set[str] = set()
+_reserved_lock = threading.Lock()
+
+# RAM-backed directories preferred for the intermediate files of multi-hop routes
+RAM_TEMP_DIRS = ("/dev/shm",)
+
+# Relative encode time of libx264 speed presets (medium = 1.0)
+PRESET_SPEED_FACTORS = {
+    'ultrafast': 0.25,
+    'superfast': 0.35,
+    'veryfast': 0.5,
+    'faster': 0.7,
+    'fast': 0.8,
+    'medium': 1.0,
+    'slow': 1.6,
+    'slower': 2.5,
+    'veryslow': 4.0,
+}
+
+# Duration assumed when a source cannot be probed
+DEFAULT_DURATION = 60.0
+
+
+@dataclass
+class JobWeight:
+    """Estimated resource use of a job, used by the scheduler."""
+    threads: int  # CPU threads the job keeps busy while running
+    cpu_seconds: float  # Estimated total CPU work
+
+
+@dataclass
+class _Step:
+    """A planned job whose plugin has yet to run."""
+    job: Job
+    plan: dict
+    options: dict
+    output_path: Path
+    cache_key: Optional[str]
 
 
 def plan_and_run(
@@ -14,135 +65,710 @@ def plan_and_run(
     registry: Registry,
     presets: dict,
     out_dir: Optional[str] = None,
-    on_progress: Optional[Callable[[Job], None]] = None
+    on_progress: Optional[Callable[[Job], None]] = None,
+    cache: Optional[ConversionCache] = None
 ) -> Job:
     """
     Plan and execute a single conversion job.
     
+    With a cache, a conversion identical to an earlier one (same source
+    content, target, resolved options and plugin version) is not run
+    again; the earlier output is linked or copied into place instead.
+    
     Args:
         job: Job to execute
         registry: Plugin registry
         presets: Preset configurations
-        out_dir: Output directory (if None, use source directory)
+        out_dir: Output directory (if None, use source directory); a
+            job's own out_dir takes precedence
         on_progress: Optional callback for progress updates
+        cache: Optional conversion output cache
         
     Returns:
         Updated job with results
     """
-    try:
-        job.set_status(Status.RUNNING)
-        job.add_log(f"Starting conversion: {job.src_mime} -> {job.dst_mime}")
+    return plan_and_run_multi([job], registry, presets, out_dir, on_progress, cache)[0]
+
+
+def plan_and_run_multi(
+    jobs: list[Job],
+    registry: Registry,
+    presets: dict,
+    out_dir: Optional[str] = None,
+    on_progress: Optional[Callable[[Job], None]] = None,
+    cache: Optional[ConversionCache] = None
+) -> list[Job]:
+    """
+    Plan and execute several conversion jobs, sharing work per source.
+    
+    Jobs that convert the same source with a plugin supporting multi-output
+    runs are executed in one plugin run, so the source is decoded once.
+    Each job still gets its own output path, report and status, and a job
+    that fails to plan does not affect the others.
+    
+    Args:
+        jobs: Jobs to execute (typically one source, several targets)
+        registry: Plugin registry
+        presets: Preset configurations
+        out_dir: Output directory (if None, use source directory); a
+            job's own out_dir takes precedence
+        on_progress: Optional callback for progress updates
+        cache: Optional conversion output cache
         
+    Returns:
+        The jobs, updated with results
+    """
+    groups = _prepare_groups(jobs, registry, presets, out_dir, on_progress, cache)
+    
+    for group in groups:
+        _run_and_finish(group, on_progress, cache)
+    
+    _close_jobs(jobs, on_progress)
+    
+    return jobs
+
+
+def _prepare_groups(
+    jobs: list[Job],
+    registry: Registry,
+    presets: dict,
+    out_dir: Optional[str],
+    on_progress: Optional[Callable[[Job], None]],
+    cache: Optional[ConversionCache]
+) -> list[list[_Step]]:
+    """Prepare jobs and group the steps that one plugin run can serve together."""
+    groups: dict[tuple, list[_Step]] = {}
+    for job in jobs:
+        if job.status in (Status.DONE.value, Status.ERROR.value):
+            continue  # Cancelled before it started
+        try:
+            step = _prepare_job(job, registry, presets, out_dir, on_progress, cache)
+            if step is None:
+                _complete_job(job)
+                continue
+            plugin = step.plan['plugin']
+            # Multi-hop routes and plugins without multi-output support run alone
+            shared = len(step.plan['steps']) == 1 and plugin.supports_multi()
+            key = (job.src_path, id(plugin) if shared else id(job))
+            groups.setdefault(key, []).append(step)
+        except Exception as e:
+            _fail_job(job, e)
+    return list(groups.values())
+
+
+def _run_and_finish(
+    group: list[_Step],
+    on_progress: Optional[Callable[[Job], None]],
+    cache: Optional[ConversionCache]
+) -> None:
+    """
+    Run a group's plugin and finish its jobs.
+    
+    A failed multi-output run fails every output at once, so each output
+    is then retried in a run of its own; only the outputs that fail alone
+    are marked failed. Jobs finished by someone else meanwhile (cancelled
+    by the daemon, say) are skipped and keep their status.
+    """
+    group = [step for step in group if step.job.status == Status.RUNNING.value]
+    if not group:
+        return
+    try:
+        _run_plugin(group, on_progress)
+    except Exception as e:
+        if len(group) == 1:
+            if group[0].job.status == Status.RUNNING.value:
+                _fail_job(group[0].job, e)
+            return
+        for step in group:
+            step.job.add_log(f"Shared run failed, converting this output alone: {e}")
+            _run_and_finish([step], on_progress, cache)
+        return
+    _finish_group(group, cache)
+
+
+def _finish_group(group: list[_Step], cache: Optional[ConversionCache]) -> None:
+    """Verify and cache the outputs of a plugin run, completing its jobs."""
+    for step in group:
+        if step.job.status != Status.RUNNING.value:
+            continue  # Cancelled while running
+        try:
+            # Verify output
+            if not step.output_path.exists():
+                raise RuntimeError("Output file was not created")
+            if step.cache_key is not None:
+                cache.store(step.cache_key, str(step.output_path))
+            _complete_job(step.job)
+        except Exception as e:
+            _fail_job(step.job, e)
+
+
+def _close_jobs(jobs: list[Job], on_progress: Optional[Callable[[Job], None]]) -> None:
+    """Close job logs, release output paths and send each job's final update."""
+    for job in jobs:
+        job.close_log()
+        if job.output_path:
+            _release_output_path(job.output_path)
         if on_progress:
             on_progress(job)
-        
-        # Detect source MIME if not set
-        if not job.src_mime:
-            job.src_mime = sniff_mime(job.src_path)
-            job.add_log(f"Detected MIME type: {job.src_mime}")
-        
-        # Plan conversion
-        plan = plan_conversion(job.src_mime, job.dst_mime, registry)
-        if not plan:
-            raise ValueError(f"No conversion route found for {job.src_mime} -> {job.dst_mime}")
-        
+
+
+def _prepare_job(
+    job: Job,
+    registry: Registry,
+    presets: dict,
+    out_dir: Optional[str],
+    on_progress: Optional[Callable[[Job], None]],
+    cache: Optional[ConversionCache]
+) -> Optional[_Step]:
+    """Plan a job and claim its output path; returns None if served from the cache."""
+    job.set_status(Status.RUNNING)
+    job.add_log(f"Starting conversion: {job.src_mime} -> {job.dst_mime}")
+    
+    if on_progress:
+        on_progress(job)
+    
+    # Detect source MIME if not set
+    if not job.src_mime:
+        job.src_mime = sniff_mime(job.src_path)
+        job.add_log(f"Detected MIME type: {job.src_mime}")
+    
+    # Apply presets if specified
+    options = _resolve_options(job, presets)
+    
+    # Plan conversion
+    plan = plan_conversion(job.src_mime, job.dst_mime, registry, job.src_path, options)
+    if not plan:
+        raise ValueError(f"No conversion route found for {job.src_mime} -> {job.dst_mime}")
+    
+    steps = plan['steps']
+    if len(steps) == 1:
         job.add_log(f"Using plugin: {plan['plugin'].name}")
+    else:
+        job.add_log("Route: " + " -> ".join(
+            [job.src_mime] + [f"{hop['dst_mime']} ({hop['plugin'].name})" for hop in steps]
+        ))
+    if steps[0]['plan'].get('stream_copy'):
+        job.add_log(f"Copying streams: {', '.join(steps[0]['plan']['stream_copy'])}")
+    
+    # Determine output path
+    src_path = Path(job.src_path)
+    out_dir = job.out_dir or out_dir
+    if out_dir:
+        out_dir_path = Path(out_dir)
+        out_dir_path.mkdir(parents=True, exist_ok=True)
+        base_name = src_path.stem
+    else:
+        out_dir_path = src_path.parent
+        base_name = src_path.stem
+    
+    # Get extension from MIME type
+    extension = _mime_to_extension(job.dst_mime)
+    
+    # Look for the output of an identical earlier conversion
+    cache_key = None
+    cached = None
+    if cache is not None:
+        cache_key = cache.key(job.src_path, job.dst_mime, options, plan['plugin'])
+        cached = cache.lookup(cache_key)
+    
+    # A previous run may already have placed this exact output
+    existing = _find_linked_output(out_dir_path, base_name, extension, cached)
+    output_path = existing or _reserve_output_path(out_dir_path, base_name, extension)
+    
+    job.output_path = str(output_path)
+    job.add_log(f"Output: {job.output_path}")
+    
+    if cached is not None and (existing or cache.fetch(cache_key, str(output_path))):
+        job.add_log("Reused output of an identical earlier conversion")
+        return None
+    
+    return _Step(job, plan, options, output_path, cache_key)
+
+
+def _complete_job(job: Job) -> None:
+    """Mark a job done and write its report."""
+    job.set_status(Status.DONE)
+    job.set_progress(1.0)
+    job.add_log("Conversion completed successfully")
+    
+    # Write job report
+    _write_job_report(job, Path(job.output_path))
+
+
+def _fail_job(job: Job, error: Exception) -> None:
+    """Mark a job failed."""
+    job.set_status(Status.ERROR)
+    job.add_log(f"Error: {str(error)}")
+
+
+def _run_plugin(group: list[_Step], on_progress: Optional[Callable[[Job], None]]) -> None:
+    """Run the plugin for steps sharing a source, feeding each job's logs and progress."""
+    progress_callback, duration = _progress_callback(group, on_progress)
+    _run_group(group, progress_callback, duration)
+
+
+def _progress_callback(
+    group: list[_Step],
+    on_progress: Optional[Callable[[Job], None]]
+) -> tuple[Callable, Optional[float]]:
+    """
+    Plugin progress callback feeding the group's jobs.
+    
+    Returns:
+        The callback, and the source duration from the shared probe cache
+    """
+    info = probe(group[0].job.src_path)
+    duration = info.duration if info else None
+    
+    def progress_callback(item):
+        if isinstance(item, ProgressEvent):
+            event = _complete_progress_event(item, duration)
+            for step in group:
+                step.job.progress_event = event
+                step.job.set_progress(event.fraction)
+                if on_progress:
+                    on_progress(step.job)
+            return
         
-        # Apply presets if specified
-        options = job.options.copy()
-        preset_name = options.pop('preset', None)
-        if preset_name and job.dst_mime in presets:
-            preset_opts = presets[job.dst_mime].get(preset_name, {})
-            # Preset values can be overridden by explicit options
-            merged = preset_opts.copy()
-            merged.update(options)
-            options = merged
-        
-        # Determine output path
-        src_path = Path(job.src_path)
-        if out_dir:
-            out_dir_path = Path(out_dir)
-            out_dir_path.mkdir(parents=True, exist_ok=True)
-            base_name = src_path.stem
-        else:
-            out_dir_path = src_path.parent
-            base_name = src_path.stem
-        
-        # Get extension from MIME type
-        extension = _mime_to_extension(job.dst_mime)
-        output_path = out_dir_path / f"{base_name}{extension}"
-        
-        # Handle name conflicts
-        counter = 1
-        while output_path.exists():
-            output_path = out_dir_path / f"{base_name}_{counter}{extension}"
-            counter += 1
-        
-        job.output_path = str(output_path)
-        job.add_log(f"Output: {job.output_path}")
-        
-        # Progress callback with MIME context for duration extraction
-        duration = _extract_duration(job.src_path)
-        
-        def progress_callback(line: str):
-            job.add_log(line)
-            # Try to parse ffmpeg progress
-            progress = _parse_ffmpeg_progress(line, duration)
+        # Plain log line; plugins without structured progress print time=
+        progress = _parse_ffmpeg_progress(item, duration)
+        for step in group:
+            step.job.add_log(item)
             if progress is not None:
-                job.set_progress(progress)
+                step.job.set_progress(progress)
                 if on_progress:
-                    on_progress(job)
-        
-        # Run conversion
-        plan['plugin'].run(
-            job.src_path,
-            str(output_path),
-            job.dst_mime,
-            options,
+                    on_progress(step.job)
+    
+    return progress_callback, duration
+
+
+def _run_group(group: list[_Step], progress_callback: Callable, duration: Optional[float]) -> None:
+    """Run a group's plugin: one multi-output run, a multi-hop route or a plain run."""
+    plugin = group[0].plan['plugin']
+    if len(group) > 1:
+        plugin.run_multi(
+            group[0].job.src_path,
+            [
+                {'dst_path': str(step.output_path), 'dst_mime': step.job.dst_mime,
+                 'opts': step.options}
+                for step in group
+            ],
             progress_callback
         )
-        
-        # Verify output
-        if not output_path.exists():
-            raise RuntimeError("Output file was not created")
-        
-        job.set_status(Status.DONE)
-        job.set_progress(1.0)
-        job.add_log("Conversion completed successfully")
-        
-        # Write job report
-        _write_job_report(job, output_path)
-        
-    except Exception as e:
-        job.set_status(Status.ERROR)
-        job.add_log(f"Error: {str(e)}")
-        
-    if on_progress:
-        on_progress(job)
+        return
+    
+    step = group[0]
+    if len(step.plan['steps']) > 1:
+        _run_route(step, progress_callback, duration)
+        return
+    
+    # Run conversion
+    plugin.run(
+        step.job.src_path,
+        str(step.output_path),
+        step.job.dst_mime,
+        step.options,
+        progress_callback
+    )
+
+
+def _run_route(step: _Step, progress_callback: Callable, duration: Optional[float]) -> None:
+    """
+    Run a multi-hop route, passing intermediate files through a temp dir.
     
-    return job
+    Each hop reads the previous hop's output; only the last hop writes the
+    job's output and gets its options. Progress of hop i of n is mapped to
+    the i-th nth of the bar.
+    """
+    hops = step.plan['steps']
+    with tempfile.TemporaryDirectory(prefix="file-converter-",
+                                     dir=_intermediate_dir(step.job.src_path)) as tmp_dir:
+        src = step.job.src_path
+        for index, hop in enumerate(hops):
+            if step.job.status != Status.RUNNING.value:
+                raise RuntimeError("Cancelled")
+            last = index == len(hops) - 1
+            dst = (str(step.output_path) if last else
+                   os.path.join(tmp_dir, f"step{index}{_mime_to_extension(hop['dst_mime'])}"))
+            
+            def hop_progress(item, index=index):
+                if isinstance(item, ProgressEvent):
+                    if duration:
+                        item = replace(item, out_time=(index * duration + item.out_time) / len(hops))
+                    progress_callback(item)
+                else:
+                    progress_callback(f"[step {index + 1}/{len(hops)}] {item}")
+            
+            hop['plugin'].run(src, dst, hop['dst_mime'], step.options if last else {},
+                              hop_progress)
+            if not os.path.exists(dst):
+                raise RuntimeError(f"Step {index + 1} ({hop['plugin'].name}) created no output")
+            src = dst
+
+
+def _intermediate_dir(src_path: str) -> Optional[str]:
+    """A RAM-backed temp dir with room for intermediates of src_path, else None (default)."""
+    try:
+        needed = 2 * os.path.getsize(src_path)
+    except OSError:
+        needed = 0
+    for candidate in RAM_TEMP_DIRS:
+        try:
+            if os.access(candidate, os.W_OK) and shutil.disk_usage(candidate).free > needed:
+                return candidate
+        except OSError:
+            continue
+    return None
 
 
 def run_batch(
-    jobs: list[Job],
+    jobs: Union[JobStore, list[Job]],
     registry: Registry,
     presets: dict,
     out_dir: Optional[str] = None,
-    on_update: Optional[Callable[[Job], None]] = None
+    on_update: Optional[Callable[[Job], None]] = None,
+    max_workers: Optional[int] = 1,
+    thread_budget: Optional[int] = None,
+    cache: Optional[ConversionCache] = None
 ) -> None:
     """
-    Run multiple jobs sequentially (MVP - no parallelization).
+    Run multiple jobs on a pool of worker threads.
+    
+    Jobs that share a source are run together (see plan_and_run_multi) so
+    the source is decoded once. Each job runs start to finish on a single
+    worker, so its updates are delivered in order. Updates from different
+    jobs are serialized, so on_update is never called concurrently.
+    
+    With a thread_budget, jobs are packed by their estimated weight instead
+    of a fixed job count: a job starts only while the summed thread weight
+    of running jobs fits the budget, and heavier jobs are started first.
     
     Args:
-        jobs: List of jobs to execute
+        jobs: JobStore or list of jobs; only queued jobs are run
         registry: Plugin registry
         presets: Preset configurations
-        out_dir: Output directory
+        out_dir: Output directory (a job's own out_dir takes precedence)
         on_update: Callback for job updates
+        max_workers: Number of jobs to run at once (None or 0 = CPU count)
+        thread_budget: Total CPU threads to pack jobs into, replacing
+            max_workers (0 = CPU count, None = no packing)
+        cache: Optional conversion output cache
     """
+    if isinstance(jobs, JobStore):
+        queued = jobs.with_status(Status.QUEUED)
+    else:
+        queued = [job for job in jobs if job.status == Status.QUEUED.value]
+    if not queued:
+        return
+    
+    units = _group_by_source(queued)
+    if thread_budget is not None:
+        budget = resolve_max_workers(thread_budget)
+        workers = min(budget, len(units))
+    else:
+        workers = min(resolve_max_workers(max_workers), len(units))
+    update = _serialized(on_update) if on_update and workers > 1 else on_update
+    
+    if thread_budget is not None and workers > 1:
+        _run_weighted(units, registry, presets, out_dir, update, workers, budget, cache)
+        return
+    
+    if workers == 1:
+        for unit in units:
+            plan_and_run_multi(unit, registry, presets, out_dir, update, cache)
+        return
+    
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fc-worker") as pool:
+        futures = [
+            pool.submit(plan_and_run_multi, unit, registry, presets, out_dir, update, cache)
+            for unit in units
+        ]
+        for future in futures:
+            future.result()
+
+
+def _group_by_source(jobs: list[Job]) -> list[list[Job]]:
+    """Group jobs by source path, keeping the order sources first appear in."""
+    groups: dict[str, list[Job]] = {}
     for job in jobs:
-        if job.status == Status.QUEUED.value:
-            plan_and_run(job, registry, presets, out_dir, on_update)
+        groups.setdefault(job.src_path, []).append(job)
+    return list(groups.values())
+
+
+def run_stream(
+    jobs: Iterable[Job],
+    registry: Registry,
+    presets: dict,
+    out_dir: Optional[str] = None,
+    max_workers: Optional[int] = 1,
+    max_in_flight: Optional[int] = None,
+    cache: Optional[ConversionCache] = None
+) -> Iterator[tuple[Job, float]]:
+    """
+    Run jobs from a (possibly endless) iterable, yielding each as it finishes.
+    
+    Jobs are pulled from the iterable only while fewer than max_in_flight
+    are submitted and unfinished, so a huge job source is never held in
+    memory. Each job runs through plan_and_run; finished jobs are yielded
+    in completion order. Jobs that are not queued are yielded as they are.
+    
+    Args:
+        jobs: Jobs to run
+        registry: Plugin registry
+        presets: Preset configurations
+        out_dir: Output directory (a job's own out_dir takes precedence)
+        max_workers: Number of jobs to run at once (None or 0 = CPU count)
+        max_in_flight: Jobs submitted but unfinished at most (default: 2 x workers)
+        cache: Optional conversion output cache
+    
+    Yields:
+        (job, seconds the job took) pairs
+    """
+    workers = resolve_max_workers(max_workers)
+    limit = max(max_in_flight or 2 * workers, workers)
+    
+    def run_timed(job: Job) -> tuple[Job, float]:
+        start = time.monotonic()
+        plan_and_run(job, registry, presets, out_dir, cache=cache)
+        return job, time.monotonic() - start
+    
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fc-worker") as pool:
+        in_flight = set()
+        jobs = iter(jobs)
+        while True:
+            # Make room before reading the next job
+            while len(in_flight) >= limit:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            job = next(jobs, None)
+            if job is None:
+                break
+            if job.status != Status.QUEUED.value:
+                yield job, 0.0
+            else:
+                in_flight.add(pool.submit(run_timed, job))
+        
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def _run_weighted(
+    units: list[list[Job]],
+    registry: Registry,
+    presets: dict,
+    out_dir: Optional[str],
+    on_update: Optional[Callable[[Job], None]],
+    workers: int,
+    budget: int,
+    cache: Optional[ConversionCache]
+) -> None:
+    """Run job units so the summed thread weight of running units stays within budget."""
+    def unit_weight(unit: list[Job]) -> JobWeight:
+        weights = [estimate_job_weight(job, presets) for job in unit]
+        return JobWeight(
+            threads=sum(w.threads for w in weights),
+            cpu_seconds=sum(w.cpu_seconds for w in weights)
+        )
+    
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fc-probe") as pool:
+        weights = list(pool.map(unit_weight, units))
+    
+    # Longest jobs first keeps the tail of the batch short
+    pending = sorted(zip(units, weights), key=lambda item: item[1].cpu_seconds, reverse=True)
+    cond = threading.Condition()
+    state = {'threads': 0, 'running': 0}
+    
+    def finished(threads: int) -> None:
+        with cond:
+            state['threads'] -= threads
+            state['running'] -= 1
+            cond.notify_all()
+    
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fc-worker") as pool:
+        futures = []
+        while pending:
+            with cond:
+                while True:
+                    free = budget - state['threads']
+                    # First fit; a job heavier than the whole budget runs alone
+                    index = next(
+                        (i for i, (_, w) in enumerate(pending)
+                         if min(w.threads, budget) <= free),
+                        None
+                    )
+                    if index is not None and state['running'] < workers:
+                        break
+                    cond.wait()
+                unit, weight = pending.pop(index)
+                threads = min(weight.threads, budget)
+                state['threads'] += threads
+                state['running'] += 1
+            
+            future = pool.submit(plan_and_run_multi, unit, registry, presets, out_dir,
+                                 on_update, cache)
+            future.add_done_callback(lambda _, t=threads: finished(t))
+            futures.append(future)
+        
+        for future in futures:
+            future.result()
+
+
+def estimate_job_weight(job: Job, presets: dict) -> JobWeight:
+    """
+    Estimate how many CPU threads a job occupies and how long it runs.
+    
+    Uses the probed duration and resolution of the source together with the
+    target MIME type and the resolved crf/preset/scale options.
+    
+    Args:
+        job: Job to estimate
+        presets: Preset configurations
+        
+    Returns:
+        JobWeight for the job
+    """
+    options = _resolve_options(job, presets)
+    info = probe(job.src_path)
+    duration = (info.duration if info else None) or DEFAULT_DURATION
+    
+    if not (job.dst_mime.startswith('video/') or job.dst_mime == 'image/gif'):
+        # Audio and other non-video targets are effectively single threaded
+        return JobWeight(threads=1, cpu_seconds=duration * 0.05)
+    
+    width, height = _scaled_size(info.resolution if info else None, options.get('scale'))
+    megapixels = (width * height) / 1_000_000
+    
+    if job.dst_mime == 'image/gif':
+        threads = 2
+        work = megapixels * 0.5
+    elif job.dst_mime == 'video/webm':
+        # libvpx-vp9 row-mt scales poorly beyond a handful of threads
+        threads = max(2, min(8, round(megapixels * 2)))
+        work = megapixels * 3.0
+    else:
+        # libx264 slice/frame threading scales with frame size
+        threads = max(2, min(16, round(megapixels * 4)))
+        work = megapixels * 1.0
+    
+    try:
+        segments = int(options.get('segments', 1))
+    except (TypeError, ValueError):
+        segments = 1
+    if segments > 1:
+        # A segmented encode splits the whole CPU between its segment encoders
+        threads = max(threads, os.cpu_count() or 1)
+    
+    speed = PRESET_SPEED_FACTORS.get(str(options.get('preset', 'veryfast')), 1.0)
+    try:
+        # Lower CRF means more bits to search and encode
+        quality = 1.0 + (23 - int(options.get('crf', 23))) * 0.03
+    except (TypeError, ValueError):
+        quality = 1.0
+    
+    return JobWeight(threads=threads, cpu_seconds=duration * work * speed * max(quality, 0.5))
+
+
+def resolve_max_workers(max_workers: Optional[int]) -> int:
+    """Turn a requested worker count into a usable one (None or 0 = CPU count)."""
+    if not max_workers or max_workers < 1:
+        return os.cpu_count() or 1
+    return max_workers
+
+
+def _resolve_options(job: Job, presets: dict) -> dict:
+    """
+    Merge a job's named preset (if any) with its explicit options.
+    
+    A 'preset' value that is not a named preset for the target is passed
+    through as a plain option only if it is an encoder speed preset (a key
+    of PRESET_SPEED_FACTORS, e.g. 'slow'); any other value is dropped, so
+    a named preset missing for one target never reaches its encoder.
+    """
+    options = dict(job.options)
+    preset_name = options.get('preset')
+    if preset_name in PRESET_SPEED_FACTORS and preset_name not in presets.get(job.dst_mime, {}):
+        return options
+    
+    options.pop('preset', None)
+    if preset_name and preset_name in presets.get(job.dst_mime, {}):
+        preset_opts = presets[job.dst_mime][preset_name]
+        # Preset values can be overridden by explicit options
+        merged = preset_opts.copy()
+        merged.update(options)
+        options = merged
+    return options
+
+
+def _scaled_size(size: Optional[tuple[int, int]], scale: Optional[str]) -> tuple[int, int]:
+    """Apply an ffmpeg-style W:H scale (with -1 for aspect) to a frame size."""
+    width, height = size or (1920, 1080)
+    if not scale:
+        return width, height
+    try:
+        target_w, target_h = (int(v) for v in str(scale).split(':')[:2])
+    except ValueError:
+        return width, height
+    if target_w > 0 and target_h > 0:
+        return target_w, target_h
+    if target_w > 0:
+        return target_w, max(1, round(height * target_w / width))
+    if target_h > 0:
+        return max(1, round(width * target_h / height)), target_h
+    return width, height
+
+
+def _serialized(callback: Callable[[Job], None]) -> Callable[[Job], None]:
+    """Wrap a callback so calls from different worker threads never overlap."""
+    lock = threading.Lock()
+    
+    def wrapper(job: Job) -> None:
+        with lock:
+            callback(job)
+    
+    return wrapper
+
+
+def _reserve_output_path(out_dir_path: Path, base_name: str, extension: str) -> Path:
+    """Pick a free output path, avoiding files on disk and paths claimed by running jobs."""
+    with _reserved_lock:
+        output_path = out_dir_path / f"{base_name}{extension}"
+        counter = 1
+        while output_path.exists() or str(output_path) in _reserved_outputs:
+            output_path = out_dir_path / f"{base_name}_{counter}{extension}"
+            counter += 1
+        _reserved_outputs.add(str(output_path))
+    return output_path
+
+
+def _find_linked_output(
+    out_dir_path: Path,
+    base_name: str,
+    extension: str,
+    artifact: Optional[Path]
+) -> Optional[Path]:
+    """Find an existing output (base name or numbered variant) that is the cached artifact."""
+    if artifact is None:
+        return None
+    candidate = out_dir_path / f"{base_name}{extension}"
+    counter = 1
+    while candidate.exists():
+        try:
+            if os.path.samefile(candidate, artifact):
+                return candidate
+        except OSError:
+            pass
+        candidate = out_dir_path / f"{base_name}_{counter}{extension}"
+        counter += 1
+    return None
+
+
+def _release_output_path(output_path: str) -> None:
+    """Release an output path claimed by _reserve_output_path."""
+    with _reserved_lock:
+        _reserved_outputs.discard(output_path)
 
 
 def _mime_to_extension(mime: str) -> str:
@@ -166,24 +792,6 @@ def _mime_to_extension(mime: str) -> str:
     return mime_map.get(mime, '.bin')
 
 
-def _extract_duration(file_path: str) -> Optional[float]:
-    """Try to extract duration from media file using ffprobe."""
-    try:
-        import subprocess
-        result = subprocess.run(
-            ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
-             '-of', 'default=noprint_wrappers=1:nokey=1', file_path],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        if result.returncode == 0:
-            return float(result.stdout.strip())
-    except Exception:
-        pass
-    return None
-
-
 def _parse_ffmpeg_progress(line: str, duration: Optional[float]) -> Optional[float]:
     """
     Parse ffmpeg progress from stderr line.
@@ -204,19 +812,33 @@ def _parse_ffmpeg_progress(line: str, duration: Optional[float]) -> Optional[flo
     return None
 
 
+def _complete_progress_event(event: ProgressEvent, duration: Optional[float]) -> ProgressEvent:
+    """
+    Fill in the fraction and ETA of a plugin's progress event.
+    
+    The ETA is the remaining media time divided by the measured encode
+    speed, so it tracks the actual rate rather than elapsed wall time.
+    """
+    if event.fraction is not None:
+        return event
+    if not duration or duration <= 0:
+        # Pulse mode - just indicate activity
+        return replace(event, fraction=0.5)
+    
+    fraction = min(0.95, event.out_time / duration)  # Cap at 95% until done
+    eta = None
+    if event.speed:
+        eta = max(0.0, duration - event.out_time) / event.speed
+    return replace(event, fraction=fraction, eta=eta)
+
+
 def _write_job_report(job: Job, output_path: Path) -> None:
     """Write a JSON report alongside the output file."""
-    report = {
-        'job_id': job.id,
-        'src_path': job.src_path,
-        'src_mime': job.src_mime,
-        'dst_mime': job.dst_mime,
-        'output_path': job.output_path,
-        'status': job.status,
-        'options': job.options,
-    }
+    report = job.to_dict()
+    if job.log_path:
+        report['log_path'] = job.log_path
     
-    report_path = output_path.parent / f"{output_path.stem}_job_report.json"
+    report_path = output_path.parent / f"{output_path.name}_job_report.json"
     try:
         with open(report_path, 'w') as f:
             json.dump(report, f, indent=2)
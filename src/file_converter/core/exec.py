@@ -1,6 +1,10 @@
 """Subprocess execution wrapper with progress callbacks."""
+import asyncio
 import subprocess
-from typing import Callable, Optional
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional
 from collections import deque
 
 
@@ -13,6 +17,78 @@ class ExecutionError(Exception):
         self.stderr_tail = stderr_tail
 
 
+class CancelToken:
+    """
+    Cancels the commands of a conversion running on worker threads.
+    
+    While a token is current (see current()), commands started with
+    run_command(), or registered by plugins with track_process(), are
+    tracked by it. cancel() kills them, and any command started after
+    that is killed as soon as it is registered. The context, and so the
+    token, follows asyncio.to_thread() calls.
+    """
+    
+    def __init__(self):
+        self.cancelled = False
+        self._processes: set[subprocess.Popen] = set()
+        self._lock = threading.Lock()
+    
+    def cancel(self) -> None:
+        """Kill the tracked commands and any started later."""
+        with self._lock:
+            self.cancelled = True
+        self.kill()
+    
+    def kill(self) -> None:
+        """Kill the commands running now, but not those started later."""
+        with self._lock:
+            processes = list(self._processes)
+        for process in processes:
+            _kill(process)
+    
+    @contextmanager
+    def current(self) -> Iterator["CancelToken"]:
+        """Make this the token that commands in the current context register with."""
+        reset = _current_token.set(self)
+        try:
+            yield self
+        finally:
+            _current_token.reset(reset)
+
+
+# Token of the conversion running in the current context, if any
+_current_token: ContextVar[Optional[CancelToken]] = ContextVar("cancel_token", default=None)
+
+
+@contextmanager
+def track_process(process: subprocess.Popen) -> Iterator[subprocess.Popen]:
+    """Let the current cancel token (if any) kill a process while it runs."""
+    token = _current_token.get()
+    if token is None:
+        yield process
+        return
+    
+    with token._lock:
+        cancelled = token.cancelled
+        token._processes.add(process)
+    if cancelled:
+        _kill(process)
+    try:
+        yield process
+    finally:
+        with token._lock:
+            token._processes.discard(process)
+
+
+def _kill(process: subprocess.Popen) -> None:
+    """Kill a process if it is still running (reaping is left to its owner)."""
+    try:
+        if process.poll() is None:
+            process.kill()
+    except OSError:
+        pass  # Non-critical; already gone
+
+
 def run_command(
     cmd: list[str],
     progress_cb: Optional[Callable[[str], None]] = None,
@@ -41,16 +117,75 @@ def run_command(
             cwd=cwd
         )
         
+        with track_process(process):
+            # Read stderr line by line
+            if process.stderr:
+                for line in process.stderr:
+                    line = line.rstrip()
+                    stderr_lines.append(line)
+                    if progress_cb:
+                        progress_cb(line)
+            
+            # Wait for completion
+            returncode = process.wait()
+        
+        if returncode != 0:
+            raise ExecutionError(
+                f"Command failed with exit code {returncode}: {' '.join(cmd)}",
+                returncode,
+                list(stderr_lines)
+            )
+            
+    except ExecutionError:
+        raise
+    except Exception as e:
+        raise ExecutionError(
+            f"Failed to execute command: {e}",
+            -1,
+            list(stderr_lines)
+        )
+
+
+async def run_command_async(
+    cmd: list[str],
+    progress_cb: Optional[Callable[[str], None]] = None,
+    cwd: Optional[str] = None
+) -> None:
+    """
+    Asyncio counterpart of run_command().
+    
+    The process is supervised by the event loop instead of a blocked
+    thread, so one loop can run many commands at once. The process is
+    killed if the awaiting task is cancelled or the callback raises.
+    
+    Args:
+        cmd: Command and arguments as list
+        progress_cb: Optional callback for each stderr line
+        cwd: Working directory
+        
+    Raises:
+        ExecutionError: On non-zero exit with last 50 lines of stderr
+    """
+    stderr_lines = deque(maxlen=50)
+    process = None
+    
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=cwd
+        )
+        
         # Read stderr line by line
-        if process.stderr:
-            for line in process.stderr:
-                line = line.rstrip()
-                stderr_lines.append(line)
-                if progress_cb:
-                    progress_cb(line)
+        async for raw in process.stderr:
+            line = raw.decode(errors="replace").rstrip()
+            stderr_lines.append(line)
+            if progress_cb:
+                progress_cb(line)
         
         # Wait for completion
-        returncode = process.wait()
+        returncode = await process.wait()
         
         if returncode != 0:
             raise ExecutionError(
@@ -67,3 +202,12 @@ def run_command(
             -1,
             list(stderr_lines)
         )
+    finally:
+        await _kill_if_running(process)
+
+
+async def _kill_if_running(process: Optional[asyncio.subprocess.Process]) -> None:
+    """Kill a process that is still running and reap it."""
+    if process is not None and process.returncode is None:
+        process.kill()
+        await process.wait()
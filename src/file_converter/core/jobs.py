@@ -1,7 +1,18 @@
 """Job management data structures."""
-from dataclasses import dataclass, field
+import gzip
+import sys
+import threading
+from collections import deque
 from enum import Enum
-from typing import Optional
+from itertools import islice
+from pathlib import Path
+from types import MappingProxyType
+from typing import Iterable, Iterator, Mapping, Optional, Union
+from .progress import ProgressEvent
+
+
+# Log lines kept in memory per job; the full log can be spilled to log_path
+LOG_TAIL_LINES = 50
 
 
 class Status(Enum):
@@ -12,27 +23,263 @@ class Status(Enum):
     ERROR = "error"
 
 
-@dataclass
 class Job:
-    """Represents a single file conversion job."""
-    id: str
-    src_path: str
-    src_mime: str
-    dst_mime: str
-    options: dict = field(default_factory=dict)
-    status: str = Status.QUEUED.value
-    progress: float = 0.0
-    logs: list[str] = field(default_factory=list)
-    output_path: Optional[str] = None
+    """
+    Represents a single file conversion job.
+    
+    Jobs are slotted and share what they can, so million-job queues stay
+    small: the status is held as a Status member, MIME strings are
+    interned, options are immutable mappings pooled across jobs with equal
+    options, and the log buffer is only allocated once something is logged.
+    """
+    __slots__ = (
+        'id', 'src_path', 'src_mime', 'dst_mime', '_options', '_status',
+        'progress', '_logs', 'output_path', 'progress_event', 'log_path',
+        '_log_file', '_log_lock', '_store', 'out_dir',
+    )
+    
+    def __init__(
+        self,
+        id: str,
+        src_path: str,
+        src_mime: str,
+        dst_mime: str,
+        options: Optional[Mapping] = None,
+        status: Union[Status, str] = Status.QUEUED,
+        progress: float = 0.0,
+        output_path: Optional[str] = None,
+        log_path: Optional[str] = None,
+        out_dir: Optional[str] = None,
+    ):
+        self.id = id
+        self.src_path = src_path
+        self.src_mime = _intern(src_mime)
+        self.dst_mime = _intern(dst_mime)
+        self._options = shared_options(options)
+        self._status = Status(status)
+        self.progress = progress
+        self._logs: Optional[deque] = None
+        self.output_path = output_path
+        self.progress_event: Optional[ProgressEvent] = None  # Latest fps/speed/ETA report
+        self.log_path = log_path  # Optional gzip file receiving every log line
+        self._log_file: Optional[gzip.GzipFile] = None
+        self._log_lock: Optional[threading.Lock] = None  # Guards _log_file; made on first spill
+        self._store: Optional["JobStore"] = None
+        self.out_dir = out_dir  # Overrides the batch's output directory
+    
+    @property
+    def options(self) -> Mapping:
+        """Conversion options (read-only; shared with jobs that have equal options)."""
+        return self._options
+    
+    @options.setter
+    def options(self, options: Optional[Mapping]) -> None:
+        self._options = shared_options(options)
+    
+    @property
+    def status(self) -> str:
+        """Status value, e.g. "queued"."""
+        return self._status.value
+    
+    @status.setter
+    def status(self, status: Union[Status, str]) -> None:
+        self.set_status(Status(status))
+    
+    @property
+    def logs(self):
+        """The last LOG_TAIL_LINES log messages."""
+        return self._logs if self._logs is not None else ()
     
     def add_log(self, message: str) -> None:
-        """Add a log message to the job."""
-        self.logs.append(message)
+        """
+        Add a log message to the job.
+        
+        Only the last LOG_TAIL_LINES messages are kept in memory. If log_path
+        is set, every message is also appended to that gzip file, which is
+        opened on the first message and stays open until close_log().
+        """
+        if self._logs is None:
+            self._logs = deque(maxlen=LOG_TAIL_LINES)
+        self._logs.append(message)
+        if self.log_path is None:
+            return
+        
+        with self._spill_lock():
+            try:
+                if self._log_file is None:
+                    Path(self.log_path).parent.mkdir(parents=True, exist_ok=True)
+                    # Appending adds a gzip member; readers see one stream
+                    self._log_file = gzip.open(self.log_path, 'at', encoding='utf-8')
+                self._log_file.write(message + '\n')
+            except OSError:
+                self.log_path = None  # Non-critical; keep the in-memory tail
+    
+    def close_log(self) -> None:
+        """Flush and close the log file, if one is open."""
+        if self._log_lock is None:
+            return  # Nothing was ever spilled
+        with self._log_lock:
+            if self._log_file is not None:
+                try:
+                    self._log_file.close()
+                except OSError:
+                    pass  # Non-critical
+                self._log_file = None
+    
+    def _spill_lock(self) -> threading.Lock:
+        """This job's log file lock, created on first use."""
+        if self._log_lock is None:
+            with _log_locks_lock:
+                if self._log_lock is None:
+                    self._log_lock = threading.Lock()
+        return self._log_lock
     
     def set_status(self, status: Status) -> None:
-        """Update job status."""
-        self.status = status.value
+        """Update job status (and the status buckets of its JobStore)."""
+        old_status = self._status
+        self._status = status
+        if self._store is not None and old_status is not status:
+            self._store._moved(self, old_status.value)
     
     def set_progress(self, progress: float) -> None:
         """Update job progress (0.0 to 1.0)."""
         self.progress = max(0.0, min(1.0, progress))
+    
+    def to_dict(self) -> dict:
+        """Plain-data view of the job, as written to job reports."""
+        return {
+            'job_id': self.id,
+            'src_path': self.src_path,
+            'src_mime': self.src_mime,
+            'dst_mime': self.dst_mime,
+            'output_path': self.output_path,
+            'status': self.status,
+            'options': dict(self._options),
+        }
+    
+    def __repr__(self) -> str:
+        return (f"Job(id={self.id!r}, src_path={self.src_path!r}, "
+                f"dst_mime={self.dst_mime!r}, status={self.status!r})")
+
+
+def shared_options(options: Optional[Mapping]) -> Mapping:
+    """
+    Return a read-only copy of options, shared by all equal option sets.
+    
+    Options whose values are not hashable get a private read-only copy.
+    """
+    if not options:
+        return _EMPTY_OPTIONS
+    frozen = MappingProxyType(dict(options))
+    try:
+        key = frozenset(frozen.items())
+    except TypeError:
+        return frozen
+    with _options_lock:
+        return _options_pool.setdefault(key, frozen)
+
+
+def _intern(value):
+    """Intern strings that repeat across jobs (MIME types)."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+_EMPTY_OPTIONS = MappingProxyType({})
+
+# Pool of option mappings, so equal options are stored once
+_options_pool: dict[frozenset, Mapping] = {}
+_options_lock = threading.Lock()
+
+# Creates the per-job log file locks; each job's writes take only its own
+_log_locks_lock = threading.Lock()
+
+
+class JobStore:
+    """
+    Indexed collection of jobs.
+    
+    Jobs are kept in insertion order, looked up by id in O(1) and bucketed
+    by status, so counting or listing the jobs in one status never scans
+    the whole queue. A job in a store reports its status changes (via
+    Job.set_status) to keep the buckets current. Safe to use from several
+    threads.
+    """
+    
+    def __init__(self, jobs: Iterable[Job] = ()):
+        self._jobs: dict[str, Job] = {}
+        self._buckets: dict[str, dict[str, Job]] = {status.value: {} for status in Status}
+        self._lock = threading.RLock()
+        self.extend(jobs)
+    
+    def add(self, job: Job) -> None:
+        """Add a job (replacing any job with the same id)."""
+        with self._lock:
+            self.remove(job.id)
+            self._jobs[job.id] = job
+            self._buckets.setdefault(job.status, {})[job.id] = job
+            job._store = self
+    
+    def extend(self, jobs: Iterable[Job]) -> None:
+        """Add several jobs."""
+        for job in jobs:
+            self.add(job)
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get a job by id."""
+        return self._jobs.get(job_id)
+    
+    def remove(self, job_id: str) -> Optional[Job]:
+        """Remove a job by id; returns the removed job, if any."""
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            if job is not None:
+                self._buckets[job.status].pop(job_id, None)
+                job._store = None
+            return job
+    
+    def remove_status(self, *statuses: Status) -> int:
+        """Remove every job in the given statuses; returns how many were removed."""
+        with self._lock:
+            removed = 0
+            for status in statuses:
+                for job_id in list(self._buckets[status.value]):
+                    self.remove(job_id)
+                    removed += 1
+            return removed
+    
+    def with_status(self, status: Status) -> list[Job]:
+        """Jobs currently in a status, in the order they entered it."""
+        with self._lock:
+            return list(self._buckets[status.value].values())
+    
+    def count(self, status: Status) -> int:
+        """Number of jobs currently in a status."""
+        return len(self._buckets[status.value])
+    
+    def counts(self) -> dict[str, int]:
+        """Number of jobs per status value."""
+        with self._lock:
+            return {value: len(bucket) for value, bucket in self._buckets.items()}
+    
+    def page(self, start: int, count: int) -> list[Job]:
+        """Jobs at positions start..start+count in insertion order."""
+        with self._lock:
+            return list(islice(self._jobs.values(), start, start + count))
+    
+    def _moved(self, job: Job, old_status: str) -> None:
+        """Move a job between status buckets after its status changed."""
+        with self._lock:
+            if self._jobs.get(job.id) is not job:
+                return
+            self._buckets[old_status].pop(job.id, None)
+            self._buckets.setdefault(job.status, {})[job.id] = job
+    
+    def __len__(self) -> int:
+        return len(self._jobs)
+    
+    def __iter__(self) -> Iterator[Job]:
+        with self._lock:
+            return iter(list(self._jobs.values()))
+    
+    def __contains__(self, job: Job) -> bool:
+        return self._jobs.get(job.id) is job
@@ -0,0 +1,145 @@
+"""Batch manifests: conversion jobs given as JSON Lines or CSV records."""
+import csv
+import json
+import sys
+from pathlib import Path
+from typing import IO, Iterator, Optional
+from .jobs import Job, Status
+
+
+# Record fields with a meaning of their own; other CSV columns are options
+MANIFEST_FIELDS = ("id", "src", "dst_mime", "preset", "options", "out_dir")
+
+
+def read_manifest(path: str, format: Optional[str] = None) -> Iterator[Job]:
+    """
+    Stream the jobs of a manifest, one record at a time.
+    
+    Each record gives src and dst_mime, and optionally preset, options (an
+    object, or a JSON object string in CSV), id (default: the line number)
+    and out_dir. In CSV, any other non-empty column is an option. The
+    source MIME type is left empty for the engine to detect.
+    
+    Records that can't be read become jobs already in the error state, so
+    they are reported with the results instead of stopping the batch.
+    
+    Args:
+        path: Manifest file, or "-" for stdin
+        format: "jsonl" or "csv" (default: from the file extension, else jsonl)
+    
+    Yields:
+        Queued jobs, in manifest order
+    """
+    if format is None:
+        format = "csv" if Path(path).suffix.lower() == ".csv" else "jsonl"
+    if format not in ("jsonl", "csv"):
+        raise ValueError(f"Unknown manifest format: {format}")
+    
+    if path == "-":
+        yield from _read_records(sys.stdin, format)
+        return
+    
+    with open(path, newline="" if format == "csv" else None) as f:
+        yield from _read_records(f, format)
+
+
+def _read_records(f: IO[str], format: str) -> Iterator[Job]:
+    """Turn each record of an open manifest into a job."""
+    if format == "csv":
+        reader = csv.DictReader(f)
+        for record in reader:
+            yield _record_job(reader.line_num, _csv_record, record)
+        return
+    
+    for line_num, line in enumerate(f, 1):
+        if line.strip():
+            yield _record_job(line_num, json.loads, line)
+
+
+def _record_job(line_num: int, parse, raw) -> Job:
+    """Build the job of one record; an unreadable record gives a failed job."""
+    try:
+        record = parse(raw)
+        if not isinstance(record, dict):
+            raise ValueError("record is not an object")
+        return job_from_record(record, default_id=str(line_num))
+    except (ValueError, TypeError, KeyError) as e:
+        job = Job(id=str(line_num), src_path="", src_mime="", dst_mime="")
+        job.set_status(Status.ERROR)
+        job.add_log(f"Invalid manifest record on line {line_num}: {e}")
+        return job
+
+
+def job_from_record(record: dict, default_id: str) -> Job:
+    """
+    Create a queued job from a manifest record.
+    
+    Args:
+        record: Record with src, dst_mime and optional id, preset, options, out_dir
+        default_id: Job id to use when the record has none
+    
+    Returns:
+        Queued job
+    """
+    for field in ("src", "dst_mime"):
+        if not record.get(field):
+            raise ValueError(f"missing {field}")
+    
+    options = dict(record.get("options") or {})
+    if record.get("preset"):
+        options["preset"] = record["preset"]
+    
+    return Job(
+        id=str(record.get("id") or default_id),
+        src_path=str(record["src"]),
+        src_mime="",
+        dst_mime=str(record["dst_mime"]),
+        options=options,
+        out_dir=record.get("out_dir") or None,
+    )
+
+
+def _csv_record(row: dict) -> dict:
+    """Normalize a CSV row: options as a JSON string, extra columns as options."""
+    record = {key: value for key, value in row.items() if key in MANIFEST_FIELDS}
+    options = json.loads(row["options"]) if row.get("options") else {}
+    if not isinstance(options, dict):
+        raise ValueError("options is not an object")
+    for key, value in row.items():
+        if key and key not in MANIFEST_FIELDS and value not in (None, ""):
+            options.setdefault(key, _option_value(value))
+    record["options"] = options
+    return record
+
+
+def _option_value(value: str):
+    """Parse an option given as text, as the CLI's --opt does."""
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def result_record(job: Job, elapsed: float) -> dict:
+    """
+    JSON-ready result of a finished job, as written to batch results.
+    
+    Args:
+        job: Finished job
+        elapsed: Seconds the job took to run
+    
+    Returns:
+        Dict with id, src, dst_mime, status, output_path, elapsed and,
+        for failed jobs, the last log line as error
+    """
+    record = {
+        'id': job.id,
+        'src': job.src_path,
+        'dst_mime': job.dst_mime,
+        'status': job.status,
+        'output_path': job.output_path,
+        'elapsed': round(elapsed, 3),
+    }
+    if job.status == Status.ERROR.value and job.logs:
+        record['error'] = job.logs[-1]
+    return record
@@ -1,69 +1,195 @@
 """Conversion planning and routing."""
+import heapq
 from typing import Optional
 from .registry import Registry, Plugin
 
 
-def plan_conversion(src_mime: str, dst_mime: str, registry: Registry) -> Optional[dict]:
+# Longest chain of plugin runs considered for one conversion
+MAX_HOPS = 4
+
+
+def plan_conversion(
+    src_mime: str,
+    dst_mime: str,
+    registry: Registry,
+    src_path: Optional[str] = None,
+    options: Optional[dict] = None
+) -> Optional[dict]:
     """
     Plan a conversion from source to destination MIME type.
     
-    For MVP, only direct edge planning (single plugin).
-    Multi-hop planning is TODO.
+    The route is the best chain of plugin runs (see find_route); a direct
+    conversion is a chain of one. Each hop is planned by its plugin: the
+    first hop sees the source file, the last hop gets the options.
     
     Args:
         src_mime: Source MIME type
         dst_mime: Destination MIME type
         registry: Plugin registry
+        src_path: Source file, lets the plugin plan from the actual streams
+        options: Resolved conversion options
         
     Returns:
-        Dict with 'plugin' and 'plan' or None if no route found
+        Dict with 'plugin' and 'plan' of the final hop, 'steps' (one such
+        dict per hop, in order), or None if no route found
     """
-    plugin = registry.get_plugin_for_conversion(src_mime, dst_mime)
+    route = find_route(src_mime, dst_mime, registry)
     
-    if plugin is None:
+    if route is None:
         return None
     
-    try:
-        plan = plugin.plan(src_mime, dst_mime)
-        return {
+    steps = []
+    for index, (plugin, hop_src, hop_dst) in enumerate(route):
+        first = index == 0
+        last = index == len(route) - 1
+        try:
+            plan = plugin.plan(hop_src, hop_dst,
+                               src_path if first else None,
+                               options if last else {})
+        except Exception as e:
+            print(f"Error planning conversion with {plugin.name}: {e}")
+            return None
+        steps.append({
             'plugin': plugin,
             'plan': plan,
-            'src_mime': src_mime,
-            'dst_mime': dst_mime
+            'src_mime': hop_src,
+            'dst_mime': hop_dst
+        })
+    
+    return {
+        'plugin': steps[-1]['plugin'],
+        'plan': steps[-1]['plan'],
+        'src_mime': src_mime,
+        'dst_mime': dst_mime,
+        'steps': steps
+    }
+
+
+def describe_plan(plan: dict) -> list[dict]:
+    """
+    Plain-data view of a plan's steps, e.g. for printing or sending as JSON.
+    
+    Args:
+        plan: Plan returned by plan_conversion
+        
+    Returns:
+        One dict per hop with plugin, version, src_mime, dst_mime, cost,
+        lossiness and stream_copy
+    """
+    return [
+        {
+            'plugin': step['plugin'].name,
+            'version': step['plugin'].version,
+            'src_mime': step['src_mime'],
+            'dst_mime': step['dst_mime'],
+            'cost': step['plan'].get('cost'),
+            'lossiness': step['plan'].get('lossiness'),
+            'stream_copy': list(step['plan'].get('stream_copy') or []),
         }
-    except Exception as e:
-        print(f"Error planning conversion with {plugin.name}: {e}")
-        return None
+        for step in plan['steps']
+    ]
 
 
-def get_supported_outputs(src_mime: str, registry: Registry) -> list[str]:
+def find_route(
+    src_mime: str,
+    dst_mime: str,
+    registry: Registry
+) -> Optional[list[tuple[Plugin, str, str]]]:
     """
-    Get all supported output formats for a given source MIME type.
+    Find the best chain of plugin runs from src_mime to dst_mime.
+    
+    Runs Dijkstra over the conversion graph (MIME types as nodes, plugin
+    capabilities as edges). Routes are ranked by the number of lossy hops
+    first, then by summed plugin cost, then by hop count, so a lossless
+    chain beats a lossy shortcut. Results are memoized in the registry's
+    route cache, which is cleared whenever its plugins change.
     
     Args:
         src_mime: Source MIME type
+        dst_mime: Destination MIME type
         registry: Plugin registry
         
     Returns:
-        List of supported destination MIME types
+        List of (plugin, hop source MIME, hop destination MIME), or None
     """
-    outputs = set()
+    key = (src_mime, dst_mime)
+    if key not in registry.route_cache:
+        registry.route_cache[key] = _search_route(src_mime, dst_mime, registry)
+    return registry.route_cache[key]
+
+
+def _search_route(src_mime: str, dst_mime: str, registry: Registry) -> Optional[list]:
+    """Dijkstra from src_mime; weights are (lossy hops, cost, hops)."""
+    if src_mime == dst_mime:
+        # Re-encoding to the same type (e.g. new options) is one direct run
+        edge = _edge_weight(src_mime, dst_mime, registry)
+        return [(edge[0], src_mime, dst_mime)] if edge else None
     
-    for plugin in registry.get_available_plugins():
-        try:
-            caps = plugin.capabilities()
-            for cap in caps:
-                inputs = cap.get("inputs", [])
-                
-                # Check if this plugin supports the source
-                src_match = any(
-                    registry._mime_match(src_mime, pattern) 
-                    for pattern in inputs
-                )
-                
-                if src_match:
-                    outputs.update(cap.get("outputs", []))
-        except Exception:
+    best = {src_mime: (0, 0.0, 0)}
+    queue = [((0, 0.0, 0), src_mime, [])]
+    
+    while queue:
+        weight, mime, route = heapq.heappop(queue)
+        if mime == dst_mime:
+            return route
+        if weight > best.get(mime, weight) or len(route) >= MAX_HOPS:
             continue
+        
+        for output in registry.get_supported_outputs(mime):
+            if output == mime:
+                continue
+            edge = _edge_weight(mime, output, registry)
+            if edge is None:
+                continue
+            plugin, lossy, cost = edge
+            candidate = (weight[0] + lossy, weight[1] + cost, weight[2] + 1)
+            if output not in best or candidate < best[output]:
+                best[output] = candidate
+                heapq.heappush(queue, (candidate, output, route + [(plugin, mime, output)]))
+    
+    return None
+
+
+def _edge_weight(src_mime: str, dst_mime: str, registry: Registry) -> Optional[tuple]:
+    """
+    Plugin, lossy flag and cost of converting src_mime to dst_mime directly.
+    
+    Every capability for the conversion is weighed and the best (lossy,
+    cost) wins; on a tie, the plugin loaded first.
+    """
+    key = ('edge', src_mime, dst_mime)
+    if key not in registry.route_cache:
+        edges = []
+        planned = {}  # Plugin -> edge from plan(), so each plugin plans once
+        for capability in registry.get_capabilities_for_conversion(src_mime, dst_mime):
+            plugin = capability.plugin
+            if capability.cost is not None and capability.lossiness:
+                # Declared in plugin.toml: no need to import the plugin
+                lossy = 0 if capability.lossiness == 'lossless' else 1
+                edges.append((plugin, lossy, max(0.0, float(capability.cost))))
+                continue
+            if plugin not in planned:
+                try:
+                    plan = plugin.plan(src_mime, dst_mime)
+                    lossy = 0 if plan.get('lossiness') == 'lossless' else 1
+                    planned[plugin] = (plugin, lossy, max(0.0, float(plan.get('cost', 1.0))))
+                except Exception:
+                    planned[plugin] = None
+            if planned[plugin] is not None:
+                edges.append(planned[plugin])
+        registry.route_cache[key] = min(edges, key=lambda edge: edge[1:], default=None)
+    return registry.route_cache[key]
+
+
+def get_supported_outputs(src_mime: str, registry: Registry) -> list[str]:
+    """
+    Get all supported output formats for a given source MIME type.
     
-    return sorted(outputs)
+    Args:
+        src_mime: Source MIME type
+        registry: Plugin registry
+        
+    Returns:
+        List of supported destination MIME types
+    """
+    return registry.get_supported_outputs(src_mime)
@@ -1,7 +1,6 @@
 """Preset management for common conversion settings."""
 from pathlib import Path
 from typing import Optional
-import tomli
 
 
 # Built-in default presets
@@ -72,6 +71,8 @@ def load_defaults(config_path: Optional[str] = None) -> dict:
         return presets
     
     try:
+        import tomli  # Only needed when there is a file to parse
+        
         with open(config_file, "rb") as f:
             config = tomli.load(f)
         
@@ -0,0 +1,230 @@
+"""Media metadata probing with a shared in-memory and on-disk cache."""
+import hashlib
+import json
+import os
+import subprocess
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class MediaInfo:
+    """Container and stream metadata of a media file, as reported by ffprobe."""
+    format: dict = field(default_factory=dict)
+    streams: list[dict] = field(default_factory=list)
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Container duration in seconds."""
+        try:
+            return float(self.format['duration'])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    @property
+    def video_stream(self) -> Optional[dict]:
+        """First video stream, ignoring attached cover art."""
+        for stream in self.streams:
+            if (stream.get('codec_type') == 'video'
+                    and not stream.get('disposition', {}).get('attached_pic')):
+                return stream
+        return None
+
+    @property
+    def audio_stream(self) -> Optional[dict]:
+        """First audio stream."""
+        for stream in self.streams:
+            if stream.get('codec_type') == 'audio':
+                return stream
+        return None
+
+    @property
+    def video_codec(self) -> Optional[str]:
+        """Codec name of the first video stream."""
+        stream = self.video_stream
+        return stream.get('codec_name') if stream else None
+
+    @property
+    def audio_codec(self) -> Optional[str]:
+        """Codec name of the first audio stream."""
+        stream = self.audio_stream
+        return stream.get('codec_name') if stream else None
+
+    @property
+    def resolution(self) -> Optional[tuple[int, int]]:
+        """Frame size (width, height) of the first video stream."""
+        stream = self.video_stream
+        if stream and stream.get('width') and stream.get('height'):
+            return int(stream['width']), int(stream['height'])
+        return None
+
+    @property
+    def frame_rate(self) -> Optional[float]:
+        """Average frame rate of the first video stream."""
+        stream = self.video_stream
+        if not stream:
+            return None
+        num, _, den = str(stream.get('avg_frame_rate', '0/0')).partition('/')
+        try:
+            rate = float(num) / float(den or 1)
+        except (ValueError, ZeroDivisionError):
+            return None
+        return rate or None
+
+    def to_dict(self) -> dict:
+        """Return the metadata in ffprobe's JSON layout."""
+        return {'format': self.format, 'streams': self.streams}
+
+
+class ProbeCache:
+    """
+    Runs ffprobe at most once per file version.
+
+    Results are keyed by (path, size, mtime_ns), held in memory and written
+    to disk so later processes reuse them too. Files that ffprobe cannot
+    read are remembered as well, so they are not probed again.
+    """
+
+    def __init__(self, cache_dir: str = None):
+        if cache_dir is None:
+            cache_dir = Path.home() / ".cache" / "file-converter" / "probe"
+
+        self.cache_dir = Path(cache_dir)
+        self._entries: dict[tuple, Optional[MediaInfo]] = {}
+        self._lock = threading.Lock()
+        self._inflight: dict[tuple, threading.Lock] = {}
+
+    def probe(self, path: str) -> Optional[MediaInfo]:
+        """
+        Get metadata for a media file.
+
+        Args:
+            path: Path to the file
+
+        Returns:
+            MediaInfo, or None if the file is missing or not media
+        """
+        try:
+            key = self._key(path)
+        except OSError:
+            return None
+
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key]
+            # Concurrent callers for the same file wait for a single probe
+            key_lock = self._inflight.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                if key in self._entries:
+                    return self._entries[key]
+
+            found, info = self._load(key)
+            if not found:
+                info = _run_ffprobe(key[0])
+                if info is not _UNAVAILABLE:
+                    self._store(key, info)
+            if info is _UNAVAILABLE:
+                info = None
+
+            with self._lock:
+                self._entries[key] = info
+                self._inflight.pop(key, None)
+
+        return info
+
+    def clear(self) -> None:
+        """Forget all in-memory entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def _key(self, path: str) -> tuple:
+        """Cache key for the current version of a file."""
+        resolved = os.path.realpath(path)
+        stat = os.stat(resolved)
+        return (resolved, stat.st_size, stat.st_mtime_ns)
+
+    def _entry_path(self, key: tuple) -> Path:
+        digest = hashlib.sha1(json.dumps(key).encode()).hexdigest()
+        return self.cache_dir / f"{digest}.json"
+
+    def _load(self, key: tuple) -> tuple[bool, Optional[MediaInfo]]:
+        """Read an entry from disk; returns (found, info)."""
+        try:
+            with open(self._entry_path(key)) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False, None
+
+        if data.get('key') != list(key):
+            return False, None
+        if data.get('info') is None:
+            return True, None
+        return True, MediaInfo(data['info'].get('format', {}), data['info'].get('streams', []))
+
+    def _store(self, key: tuple, info: Optional[MediaInfo]) -> None:
+        """Write an entry to disk atomically (failures are ignored)."""
+        entry_path = self._entry_path(key)
+        tmp_path = entry_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                json.dump({'key': list(key), 'info': info.to_dict() if info else None}, f)
+            os.replace(tmp_path, entry_path)
+        except OSError:
+            pass  # Non-critical
+
+
+# Marker for "ffprobe could not run", which is not cached on disk
+_UNAVAILABLE = object()
+
+
+def _run_ffprobe(path: str):
+    """Run ffprobe on a file; returns MediaInfo, None (not media) or _UNAVAILABLE."""
+    try:
+        result = subprocess.run(
+            ['ffprobe', '-v', 'error', '-show_format', '-show_streams',
+             '-of', 'json', path],
+            capture_output=True,
+            text=True,
+            timeout=10
+        )
+    except (OSError, subprocess.SubprocessError):
+        return _UNAVAILABLE
+
+    if result.returncode != 0:
+        return None
+    try:
+        data = json.loads(result.stdout)
+    except ValueError:
+        return None
+    return MediaInfo(data.get('format', {}), data.get('streams', []))
+
+
+# Global probe cache instance
+_cache = ProbeCache()
+
+
+def get_probe_cache() -> ProbeCache:
+    """Get the global probe cache instance."""
+    return _cache
+
+
+def set_probe_cache(cache: ProbeCache) -> ProbeCache:
+    """
+    Replace the global probe cache, e.g. with one in a temp dir.
+
+    Returns:
+        The previous global probe cache, to restore later
+    """
+    global _cache
+    previous, _cache = _cache, cache
+    return previous
+
+
+def probe(path: str) -> Optional[MediaInfo]:
+    """Get metadata for a media file from the global probe cache."""
+    return _cache.probe(path)
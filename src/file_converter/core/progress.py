@@ -0,0 +1,81 @@
+"""Structured progress events from ffmpeg's machine-readable progress output."""
+from dataclasses import dataclass
+from typing import Callable, Optional, Union
+
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    """A progress report from a running conversion."""
+    out_time: float = 0.0  # Seconds of output written so far
+    fps: Optional[float] = None  # Frames encoded per second
+    speed: Optional[float] = None  # Encode speed as a multiple of realtime
+    total_size: Optional[int] = None  # Bytes written so far
+    frame: Optional[int] = None  # Frames written so far
+    done: bool = False  # Final report of the process
+    fraction: Optional[float] = None  # Overall progress (0.0 to 1.0), if known
+    eta: Optional[float] = None  # Estimated seconds remaining, if known
+
+    @classmethod
+    def from_fields(cls, fields: dict, done: bool = False) -> "ProgressEvent":
+        """Build an event from one block of ffmpeg -progress key=value fields."""
+        return cls(
+            out_time=_out_time(fields),
+            fps=_number(fields.get('fps'), float),
+            speed=_number(fields.get('speed', '').rstrip('x'), float),
+            total_size=_number(fields.get('total_size'), int),
+            frame=_number(fields.get('frame'), int),
+            done=done,
+        )
+
+
+# Plugins report log lines as str and progress as ProgressEvent
+ProgressCallback = Callable[[Union[str, ProgressEvent]], None]
+
+
+class ProgressParser:
+    """
+    Assembles the output of 'ffmpeg -progress pipe:1' into ProgressEvents.
+
+    ffmpeg writes blocks of key=value lines, each closed by a
+    'progress=continue' (or 'progress=end') line.
+    """
+
+    def __init__(self):
+        self._fields: dict[str, str] = {}
+
+    def feed(self, line: str) -> Optional[ProgressEvent]:
+        """Consume one line; returns an event when a block is complete."""
+        key, sep, value = line.strip().partition('=')
+        if not sep:
+            return None
+        if key != 'progress':
+            self._fields[key] = value
+            return None
+
+        event = ProgressEvent.from_fields(self._fields, done=(value == 'end'))
+        self._fields = {}
+        return event
+
+
+def _number(value: Optional[str], kind: type):
+    """Parse a numeric field, treating 'N/A' and garbage as unknown."""
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _out_time(fields: dict) -> float:
+    """Output position in seconds from out_time_us, out_time_ms or out_time."""
+    # out_time_ms is in microseconds as well (a long-standing ffmpeg quirk)
+    for key in ('out_time_us', 'out_time_ms'):
+        micros = _number(fields.get(key), int)
+        if micros is not None:
+            return max(0.0, micros / 1_000_000)
+
+    hours, _, rest = fields.get('out_time', '').partition(':')
+    minutes, _, seconds = rest.partition(':')
+    try:
+        return max(0.0, int(hours) * 3600 + int(minutes) * 60 + float(seconds))
+    except ValueError:
+        return 0.0
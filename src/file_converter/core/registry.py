@@ -1,43 +1,158 @@
 """Plugin registry and loader."""
 import importlib.util
+import json
+import os
+import re
+import shutil
 import sys
+import threading
 from pathlib import Path
-from typing import Any, Callable, Optional
-import tomli
+from typing import Any, Callable, NamedTuple, Optional
 
 
 class Plugin:
-    """Represents a loaded plugin."""
+    """
+    Represents a plugin declared by a plugin.toml manifest.
     
-    def __init__(self, name: str, version: str, config: dict, module: Any):
+    The plugin module is imported on first use (planning or running), not
+    when the registry is loaded. Until then, availability is judged from
+    the manifest's tool_requires and capabilities come from the manifest.
+    """
+    
+    def __init__(self, name: str, version: str, config: dict,
+                 module: Any = None, path: Optional[Path] = None):
         self.name = name
         self.version = version
         self.config = config
-        self.module = module
+        self.path = path  # Entry module file, imported on first use
+        self._module = module
+        self._module_lock = threading.Lock()
+        self._plan_takes_source: Optional[bool] = None
+        self._available: Optional[bool] = None
+        self._capabilities: Optional[list[dict]] = None
+    
+    @property
+    def module(self) -> Any:
+        """The plugin module, imported on first access."""
+        if self._module is None:
+            with self._module_lock:
+                if self._module is None:
+                    self._module = _import_plugin(self.path)
+        return self._module
+    
+    @property
+    def loaded(self) -> bool:
+        """Whether the plugin module has been imported."""
+        return self._module is not None
         
     def available(self) -> bool:
-        """Check if plugin dependencies are available."""
-        return self.module.available()
+        """
+        Check if plugin dependencies are available (cached until refresh()).
+        
+        Before the module is imported, this checks that the manifest's
+        tool_requires are on PATH; afterwards the module's available() decides.
+        """
+        if self._available is None:
+            try:
+                if self.loaded:
+                    self._available = bool(self.module.available())
+                else:
+                    self._available = all(
+                        shutil.which(_tool_name(requirement))
+                        for requirement in self.config.get("tool_requires", [])
+                    )
+            except Exception:
+                self._available = False
+        return self._available
     
     def capabilities(self) -> list[dict]:
-        """Get plugin capabilities."""
-        return self.module.capabilities()
+        """Get plugin capabilities, including parameter schemas (imports the module)."""
+        if self._capabilities is None:
+            self._capabilities = self.module.capabilities()
+        return self._capabilities
+    
+    def manifest_capabilities(self) -> list[dict]:
+        """Get the capabilities declared in plugin.toml (no import needed)."""
+        return self.config.get("capabilities", [])
     
-    def plan(self, src_mime: str, dst_mime: str) -> dict:
-        """Plan a conversion."""
+    def refresh(self) -> None:
+        """Forget cached availability and capabilities."""
+        self._available = None
+        self._capabilities = None
+    
+    def plan(self, src_mime: str, dst_mime: str,
+             src_path: Optional[str] = None, opts: Optional[dict] = None) -> dict:
+        """
+        Plan a conversion.
+        
+        The source path and options are passed on to plugins whose plan()
+        accepts them, so they can inspect the input (e.g. to stream-copy).
+        """
+        if self._plan_takes_source is None:
+            import inspect
+            
+            params = inspect.signature(self.module.plan).parameters
+            self._plan_takes_source = "src_path" in params and "opts" in params
+        
+        if self._plan_takes_source:
+            return self.module.plan(src_mime, dst_mime, src_path=src_path, opts=opts)
         return self.module.plan(src_mime, dst_mime)
     
     def run(self, src_path: str, dst_path: str, dst_mime: str, 
             opts: dict, progress_cb: Callable[[str], None]) -> None:
         """Execute a conversion."""
         return self.module.run(src_path, dst_path, dst_mime, opts, progress_cb)
+    
+    def supports_multi(self) -> bool:
+        """Check if the plugin can write several outputs from one source run."""
+        return hasattr(self.module, "run_multi")
+    
+    def run_multi(self, src_path: str, outputs: list[dict],
+                  progress_cb: Callable[[str], None]) -> None:
+        """Execute several conversions of one source (dicts of dst_path, dst_mime, opts)."""
+        return self.module.run_multi(src_path, outputs, progress_cb)
+    
+    def supports_async(self) -> bool:
+        """Check if the plugin has a coroutine run_async() for the asyncio engine."""
+        import inspect
+        
+        return inspect.iscoroutinefunction(getattr(self.module, "run_async", None))
+    
+    async def run_async(self, src_path: str, dst_path: str, dst_mime: str,
+                        opts: dict, progress_cb: Callable[[str], None]) -> None:
+        """Execute a conversion on the running event loop."""
+        await self.module.run_async(src_path, dst_path, dst_mime, opts, progress_cb)
 
 
 class Registry:
-    """Plugin registry."""
+    """
+    Plugin registry.
+    
+    Plugins are loaded from their plugin.toml manifests alone; a plugin's
+    module is imported only when it is picked to plan or run a conversion.
+    With a manifest_cache_file (e.g. default_manifest_cache_file()), parsed
+    manifests are cached on disk keyed by file mtime and size; without one,
+    nothing is written.
     
-    def __init__(self):
+    Plugin capabilities are indexed when plugins are loaded: exact input
+    MIME types, wildcard input prefixes ("video/*") and output MIME types
+    each map to the capabilities that declare them. Plugin availability is
+    checked once and cached; call refresh() after installing or removing
+    tools. Route lookups are memoized, so repeated planning is a dict hit;
+    route_cache holds the planner's multi-hop routes and is cleared with
+    the index.
+    """
+    
+    def __init__(self, manifest_cache_file: Optional[str] = None):
+        self.manifest_cache_file = Path(manifest_cache_file) if manifest_cache_file else None
         self.plugins: list[Plugin] = []
+        self._by_input: dict[str, list[_Capability]] = {}
+        self._by_prefix: dict[str, list[_Capability]] = {}
+        self._by_output: dict[str, list[_Capability]] = {}
+        self._routes: dict[tuple[str, str], Optional[Plugin]] = {}
+        self._outputs_for: dict[str, list[str]] = {}
+        # Planner memo (routes and edge weights); cleared when plugins change
+        self.route_cache: dict = {}
         
     def load_plugins(self, plugin_dir: Path) -> None:
         """
@@ -48,21 +163,32 @@ class Registry:
         """
         if not plugin_dir.exists():
             return
+        
+        cache = _load_manifest_cache(self.manifest_cache_file) if self.manifest_cache_file else {}
+        section_key = str(Path(plugin_dir).resolve())
+        cached_section = cache.get(section_key, {})
+        section = {}
             
-        for plugin_path in plugin_dir.iterdir():
+        for plugin_path in sorted(plugin_dir.iterdir()):
             if not plugin_path.is_dir():
                 continue
                 
             toml_file = plugin_path / "plugin.toml"
-            py_file = plugin_path / "plugin.py"
             
-            if not toml_file.exists() or not py_file.exists():
+            try:
+                stat = toml_file.stat()
+            except OSError:
                 continue
                 
             try:
-                # Load TOML config
-                with open(toml_file, "rb") as f:
-                    config = tomli.load(f)
+                # Parse the manifest, unless it is unchanged since last time
+                stamp = [stat.st_mtime_ns, stat.st_size]
+                entry = cached_section.get(plugin_path.name)
+                if entry and entry.get("stamp") == stamp:
+                    config = entry["config"]
+                else:
+                    config = _parse_manifest(toml_file)
+                section[plugin_path.name] = {"stamp": stamp, "config": config}
                 
                 # Validate required fields
                 required = ["name", "version", "entry", "capabilities", "tool_requires"]
@@ -70,27 +196,60 @@ class Registry:
                     print(f"Warning: Plugin {plugin_path.name} missing required fields")
                     continue
                 
-                # Load Python module
-                spec = importlib.util.spec_from_file_location(
-                    f"file_converter.plugins.{plugin_path.name}",
-                    py_file
-                )
-                if spec and spec.loader:
-                    module = importlib.util.module_from_spec(spec)
-                    sys.modules[spec.name] = module
-                    spec.loader.exec_module(module)
-                    
-                    # Validate required functions
-                    required_funcs = ["available", "capabilities", "plan", "run"]
-                    if not all(hasattr(module, f) for f in required_funcs):
-                        print(f"Warning: Plugin {plugin_path.name} missing required functions")
-                        continue
-                    
-                    plugin = Plugin(config["name"], config["version"], config, module)
-                    self.plugins.append(plugin)
+                entry_file = plugin_path / config["entry"]
+                if not entry_file.exists():
+                    continue
+                
+                plugin = Plugin(config["name"], config["version"], config, path=entry_file)
+                self.plugins.append(plugin)
                     
             except Exception as e:
                 print(f"Warning: Failed to load plugin {plugin_path.name}: {e}")
+        
+        if self.manifest_cache_file and section != cached_section:
+            cache[section_key] = section
+            _save_manifest_cache(self.manifest_cache_file, cache)
+        
+        self._build_index()
+    
+    def refresh(self) -> None:
+        """Re-check plugin availability and capabilities, and rebuild the index."""
+        for plugin in self.plugins:
+            plugin.refresh()
+        self._build_index()
+    
+    def _build_index(self) -> None:
+        """Index the capabilities of all loaded plugins."""
+        by_input: dict[str, list[_Capability]] = {}
+        by_prefix: dict[str, list[_Capability]] = {}
+        by_output: dict[str, list[_Capability]] = {}
+        
+        for order, plugin in enumerate(self.plugins):
+            for cap in plugin.manifest_capabilities():
+                entry = _Capability(order, plugin, frozenset(cap.get("inputs", [])),
+                                    frozenset(cap.get("outputs", [])),
+                                    cap.get("cost"), cap.get("lossiness"))
+                for pattern in entry.inputs:
+                    if pattern.endswith("/*"):
+                        by_prefix.setdefault(pattern[:-2], []).append(entry)
+                    else:
+                        by_input.setdefault(pattern, []).append(entry)
+                for output in entry.outputs:
+                    by_output.setdefault(output, []).append(entry)
+        
+        self._by_input = by_input
+        self._by_prefix = by_prefix
+        self._by_output = by_output
+        self._routes = {}
+        self._outputs_for = {}
+        self.route_cache = {}
+    
+    def _capabilities_for(self, src_mime: str) -> list["_Capability"]:
+        """Capabilities of available plugins accepting src_mime, in plugin order."""
+        prefix = src_mime.split("/", 1)[0]
+        entries = self._by_input.get(src_mime, []) + self._by_prefix.get(prefix, [])
+        entries.sort(key=lambda entry: entry.order)
+        return [entry for entry in entries if entry.plugin.available()]
     
     def get_available_plugins(self) -> list[Plugin]:
         """Get all available (dependencies met) plugins."""
@@ -107,27 +266,28 @@ class Registry:
         Returns:
             Plugin or None
         """
-        available = self.get_available_plugins()
-        
-        for plugin in available:
-            try:
-                # Check if plugin can handle this conversion
-                caps = plugin.capabilities()
-                for cap in caps:
-                    inputs = cap.get("inputs", [])
-                    outputs = cap.get("outputs", [])
-                    
-                    # Check if source matches (with wildcard support)
-                    src_match = any(self._mime_match(src_mime, pattern) for pattern in inputs)
-                    # Check if destination matches exactly
-                    dst_match = dst_mime in outputs
-                    
-                    if src_match and dst_match:
-                        return plugin
-            except Exception:
-                continue
-        
-        return None
+        key = (src_mime, dst_mime)
+        if key not in self._routes:
+            self._routes[key] = next(
+                (entry.plugin for entry in self._capabilities_for(src_mime)
+                 if dst_mime in entry.outputs),
+                None
+            )
+        return self._routes[key]
+    
+    def get_capabilities_for_conversion(self, src_mime: str,
+                                        dst_mime: str) -> list["_Capability"]:
+        """Index entries of every available capability for a conversion, in plugin order."""
+        return [entry for entry in self._capabilities_for(src_mime) if dst_mime in entry.outputs]
+    
+    def get_supported_outputs(self, src_mime: str) -> list[str]:
+        """Get all output MIME types reachable from src_mime in one plugin run."""
+        if src_mime not in self._outputs_for:
+            outputs = set()
+            for entry in self._capabilities_for(src_mime):
+                outputs.update(entry.outputs)
+            self._outputs_for[src_mime] = sorted(outputs)
+        return list(self._outputs_for[src_mime])
     
     def _mime_match(self, mime: str, pattern: str) -> bool:
         """Check if MIME matches pattern (supports wildcards like video/*)."""
@@ -140,22 +300,94 @@ class Registry:
     
     def get_all_output_formats(self) -> list[str]:
         """Get all supported output MIME types."""
-        formats = set()
-        for plugin in self.get_available_plugins():
-            try:
-                for cap in plugin.capabilities():
-                    formats.update(cap.get("outputs", []))
-            except Exception:
-                continue
-        return sorted(formats)
+        return sorted(
+            output for output, entries in self._by_output.items()
+            if any(entry.plugin.available() for entry in entries)
+        )
     
     def get_all_input_formats(self) -> list[str]:
         """Get all supported input MIME types/patterns."""
         formats = set()
-        for plugin in self.get_available_plugins():
-            try:
-                for cap in plugin.capabilities():
-                    formats.update(cap.get("inputs", []))
-            except Exception:
-                continue
+        for entries in (self._by_input, self._by_prefix):
+            for pattern, caps in entries.items():
+                if any(entry.plugin.available() for entry in caps):
+                    formats.add(pattern if entries is self._by_input else f"{pattern}/*")
         return sorted(formats)
+
+
+class _Capability(NamedTuple):
+    """One capability entry of a plugin, as stored in the registry index."""
+    order: int  # Plugin load order; earlier plugins win
+    plugin: Plugin
+    inputs: frozenset
+    outputs: frozenset
+    cost: Optional[float] = None  # Declared in the manifest, if any
+    lossiness: Optional[str] = None  # Declared in the manifest, if any
+
+
+# Required plugin functions, checked when a plugin module is imported
+REQUIRED_FUNCTIONS = ["available", "capabilities", "plan", "run"]
+
+
+def _import_plugin(path: Path) -> Any:
+    """Import a plugin module from its entry file."""
+    if path is None:
+        raise RuntimeError("Plugin has no module to import")
+    
+    spec = importlib.util.spec_from_file_location(
+        f"file_converter.plugins.{path.parent.name}",
+        path
+    )
+    if not spec or not spec.loader:
+        raise RuntimeError(f"Cannot import plugin from {path}")
+    
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    
+    missing = [f for f in REQUIRED_FUNCTIONS if not hasattr(module, f)]
+    if missing:
+        raise RuntimeError(f"Plugin {path.parent.name} missing required functions: "
+                           f"{', '.join(missing)}")
+    return module
+
+
+def _tool_name(requirement: str) -> str:
+    """Executable name of a tool_requires entry such as "ffmpeg>=5"."""
+    return re.split(r"[<>=!~ ]", requirement, maxsplit=1)[0]
+
+
+def _parse_manifest(toml_file: Path) -> dict:
+    """Parse a plugin.toml file."""
+    import tomli  # Only needed when a manifest changed
+    
+    with open(toml_file, "rb") as f:
+        return tomli.load(f)
+
+
+def default_manifest_cache_file() -> Path:
+    """Parsed-manifest cache used by the CLI and GUI."""
+    return Path.home() / ".cache" / "file-converter" / "manifests.json"
+
+
+def _load_manifest_cache(cache_file: Path) -> dict:
+    """Read the parsed-manifest cache (empty if missing or unreadable)."""
+    try:
+        with open(cache_file) as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest_cache(cache_file: Path, cache: dict) -> None:
+    """Write the parsed-manifest cache, dropping plugin dirs that no longer exist."""
+    cache = {key: value for key, value in cache.items() if os.path.isdir(key)}
+    tmp_path = cache_file.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, "w") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, cache_file)
+    except (OSError, TypeError, ValueError):
+        pass  # Non-critical
@@ -1,10 +1,42 @@
 """FFmpeg video/audio conversion plugin."""
+import asyncio
+import contextvars
+import getpass
+import hashlib
+import os
 import shutil
 import subprocess
-import re
-from typing import Callable
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from typing import Optional
 from pathlib import Path
 
+from file_converter.core.cache import fingerprint
+from file_converter.core.exec import track_process
+from file_converter.core.probe import probe
+from file_converter.core.progress import ProgressCallback, ProgressEvent, ProgressParser
+
+
+# Shortest segment worth its own encoder process (seconds)
+SEGMENT_MIN_LENGTH = 60.0
+
+# Codecs each target can hold as-is, so the stream is copied instead of re-encoded
+_COPYABLE_CODECS = {
+    "video/mp4": {
+        "video": {"h264", "hevc", "av1", "mpeg4"},
+        "audio": {"aac", "mp3", "alac", "ac3", "opus"},
+    },
+    "video/webm": {
+        "video": {"vp8", "vp9", "av1"},
+        "audio": {"opus", "vorbis"},
+    },
+    "audio/mp3": {"audio": {"mp3"}},
+    "audio/flac": {"audio": {"flac"}},
+}
+
+
 
 def available() -> bool:
     """Check if ffmpeg is available."""
@@ -46,32 +78,53 @@ def capabilities() -> list[dict]:
                     "type": "int",
                     "optional": True,
                     "description": "Audio quality (for MP3: 0-9, lower is better)"
+                },
+                "segments": {
+                    "type": "int",
+                    "optional": True,
+                    "description": "Parallel segments for MP4/WebM (default: 1, no splitting)"
                 }
             }
         }
     ]
 
 
-def plan(src_mime: str, dst_mime: str) -> dict:
+def plan(src_mime: str, dst_mime: str, src_path: str = None, opts: dict = None) -> dict:
     """
     Plan a conversion.
     
-    Returns metadata about the planned conversion.
+    Returns metadata about the planned conversion. When the source path is
+    known, its streams are probed; streams the target can hold unchanged
+    are copied rather than re-encoded, which makes the job far cheaper.
     """
     lossiness = "lossy"
+    cost = 1.0
     
     # Lossless formats
     if dst_mime == "audio/flac":
         lossiness = "lossless"
     
+    copy = set()
+    if src_path:
+        info = _probe(src_path)
+        copy = _copyable_streams(info, dst_mime, opts or {})
+        if copy and copy >= _present_streams(info, dst_mime):
+            # Pure remux
+            cost = 0.05
+            lossiness = "lossless"
+        elif "video" in copy:
+            # Only the audio is encoded
+            cost = 0.1
+    
     return {
-        "cost": 1.0,
-        "lossiness": lossiness
+        "cost": cost,
+        "lossiness": lossiness,
+        "stream_copy": sorted(copy)
     }
 
 
 def run(src_path: str, dst_path: str, dst_mime: str, 
-        opts: dict, progress_cb: Callable[[str], None]) -> None:
+        opts: dict, progress_cb: ProgressCallback) -> None:
     """
     Execute the conversion using ffmpeg.
     
@@ -80,137 +133,312 @@ def run(src_path: str, dst_path: str, dst_mime: str,
         dst_path: Destination file path
         dst_mime: Target MIME type
         opts: Conversion options
-        progress_cb: Progress callback for stderr lines
+        progress_cb: Progress callback for log lines and ProgressEvents
+    """
+    info = _probe(src_path) if dst_mime in _COPYABLE_CODECS else {}
+    copy = _copyable_streams(info, dst_mime, opts)
+    
+    # With the segments option, long videos are split and encoded in parallel
+    segments = _segments(info, dst_mime, opts, copy)
+    if segments > 1:
+        _run_segmented(src_path, dst_path, dst_mime, opts, info, segments,
+                       copy, progress_cb)
+        return
+    
+    if dst_mime == "image/gif":
+        _run_gif(src_path, dst_path, opts, progress_cb)
+        return
+    
+    # Execute command
+    _run_ffmpeg(_build_command(src_path, dst_path, dst_mime, opts, copy), progress_cb)
+
+
+async def run_async(src_path: str, dst_path: str, dst_mime: str,
+                    opts: dict, progress_cb: ProgressCallback) -> None:
     """
-    # Build ffmpeg command based on output format
+    Execute the conversion using ffmpeg, supervised by the event loop.
+    
+    Single-command conversions hold no thread while ffmpeg runs. Segmented
+    encodes and GIFs, which chain several ffmpeg runs, go to run() on a
+    worker thread.
+    
+    Args: as for run()
+    """
+    info = await asyncio.to_thread(_probe, src_path) if dst_mime in _COPYABLE_CODECS else {}
+    copy = _copyable_streams(info, dst_mime, opts)
+    
+    if dst_mime == "image/gif" or _segments(info, dst_mime, opts, copy) > 1:
+        await asyncio.to_thread(run, src_path, dst_path, dst_mime, opts, progress_cb)
+        return
+    
+    await _run_ffmpeg_async(_build_command(src_path, dst_path, dst_mime, opts, copy),
+                            progress_cb)
+
+
+def _segments(info: dict, dst_mime: str, opts: dict, copy: set) -> int:
+    """Number of parallel segments to encode (1 = a single run)."""
+    if dst_mime in _SEGMENT_ENCODERS and "video" not in copy:
+        return _segment_count(info, opts)
+    return 1
+
+
+def _build_command(src: str, dst: str, dst_mime: str, opts: dict, copy: set) -> list[str]:
+    """Build the single ffmpeg command for a non-GIF target."""
     if dst_mime == "video/mp4":
-        cmd = _build_mp4_command(src_path, dst_path, opts)
+        return _build_mp4_command(src, dst, opts, copy)
     elif dst_mime == "video/webm":
-        cmd = _build_webm_command(src_path, dst_path, opts)
-    elif dst_mime == "image/gif":
-        cmd = _build_gif_command(src_path, dst_path, opts)
+        return _build_webm_command(src, dst, opts, copy)
     elif dst_mime == "audio/mp3":
-        cmd = _build_mp3_command(src_path, dst_path, opts)
+        return _build_mp3_command(src, dst, opts, copy)
     elif dst_mime == "audio/flac":
-        cmd = _build_flac_command(src_path, dst_path, opts)
-    else:
-        raise ValueError(f"Unsupported output format: {dst_mime}")
-    
-    # Execute command
-    _run_ffmpeg(cmd, progress_cb)
+        return _build_flac_command(src, dst, opts, copy)
+    raise ValueError(f"Unsupported output format: {dst_mime}")
 
 
-def _build_mp4_command(src: str, dst: str, opts: dict) -> list[str]:
-    """Build command for MP4 output."""
-    cmd = ["ffmpeg", "-i", src, "-y"]
+def run_multi(src_path: str, outputs: list[dict],
+              progress_cb: ProgressCallback) -> None:
+    """
+    Execute several conversions of one source with a single ffmpeg process.
+    
+    The source is decoded once and fanned out to every output, each with
+    its own encoder settings. Outputs that need a pipeline of their own
+    (GIF, segmented long-video encodes) are run separately afterwards.
+    
+    Args:
+        src_path: Source file path
+        outputs: Dicts with dst_path, dst_mime and opts for each output
+        progress_cb: Progress callback for log lines and ProgressEvents
+    """
+    info = _probe(src_path)
+    cmd = ["ffmpeg", "-i", src_path, "-y"]
+    combined = 0
+    separate = []
+    
+    for output in outputs:
+        dst_mime, opts = output["dst_mime"], output["opts"]
+        if dst_mime not in _OUTPUT_ARGS:
+            separate.append(output)
+            continue
+        
+        copy = _copyable_streams(info, dst_mime, opts)
+        if (dst_mime in _SEGMENT_ENCODERS and "video" not in copy
+                and _segment_count(info, opts) > 1):
+            separate.append(output)
+            continue
+        
+        cmd.extend(_OUTPUT_ARGS[dst_mime](opts, copy))
+        cmd.append(output["dst_path"])
+        combined += 1
     
-    # Video codec
-    cmd.extend(["-c:v", "libx264"])
-    cmd.extend(["-pix_fmt", "yuv420p"])
+    if combined:
+        _run_ffmpeg(cmd, progress_cb)
+    
+    for output in separate:
+        run(src_path, output["dst_path"], output["dst_mime"], output["opts"], progress_cb)
+
+
+def _build_mp4_command(src: str, dst: str, opts: dict,
+                       copy: set = frozenset()) -> list[str]:
+    """Build command for MP4 output, copying the streams named in copy."""
+    return ["ffmpeg", "-i", src, "-y", *_mp4_output_args(opts, copy), dst]
+
+
+def _mp4_output_args(opts: dict, copy: set = frozenset()) -> list[str]:
+    """Output arguments for MP4, copying the streams named in copy."""
+    args = ["-c:v", "copy"] if "video" in copy else _mp4_video_args(opts)
+    args.extend(["-c:a", "copy"] if "audio" in copy else _mp4_audio_args())
+    return args
+
+
+def _mp4_video_args(opts: dict) -> list[str]:
+    """Video encoder arguments for MP4 output (H.264)."""
+    args = ["-c:v", "libx264", "-pix_fmt", "yuv420p"]
     
     # CRF
     crf = opts.get("crf", 23)
-    cmd.extend(["-crf", str(crf)])
+    args.extend(["-crf", str(crf)])
     
     # Preset
     preset = opts.get("preset", "veryfast")
-    cmd.extend(["-preset", preset])
+    args.extend(["-preset", preset])
     
     # Scale
     if "scale" in opts:
-        cmd.extend(["-vf", f"scale={opts['scale']}"])
-    
-    # Audio codec
-    cmd.extend(["-c:a", "aac"])
-    cmd.extend(["-b:a", "128k"])
+        args.extend(["-vf", f"scale={opts['scale']}"])
     
-    cmd.append(dst)
-    return cmd
+    return args
 
 
-def _build_webm_command(src: str, dst: str, opts: dict) -> list[str]:
-    """Build command for WebM output."""
-    cmd = ["ffmpeg", "-i", src, "-y"]
-    
-    # Video codec (VP9)
-    cmd.extend(["-c:v", "libvpx-vp9"])
+def _mp4_audio_args() -> list[str]:
+    """Audio encoder arguments for MP4 output (AAC)."""
+    return ["-c:a", "aac", "-b:a", "128k"]
+
+
+def _build_webm_command(src: str, dst: str, opts: dict,
+                        copy: set = frozenset()) -> list[str]:
+    """Build command for WebM output, copying the streams named in copy."""
+    return ["ffmpeg", "-i", src, "-y", *_webm_output_args(opts, copy), dst]
+
+
+def _webm_output_args(opts: dict, copy: set = frozenset()) -> list[str]:
+    """Output arguments for WebM, copying the streams named in copy."""
+    args = ["-c:v", "copy"] if "video" in copy else _webm_video_args(opts)
+    args.extend(["-c:a", "copy"] if "audio" in copy else _webm_audio_args())
+    return args
+
+
+def _webm_video_args(opts: dict) -> list[str]:
+    """Video encoder arguments for WebM output (VP9)."""
+    args = ["-c:v", "libvpx-vp9"]
     
     # CRF for VP9
     crf = opts.get("crf", 30)
-    cmd.extend(["-crf", str(crf)])
-    cmd.extend(["-b:v", "0"])  # Constant quality mode
+    args.extend(["-crf", str(crf)])
+    args.extend(["-b:v", "0"])  # Constant quality mode
     
     # Scale
     if "scale" in opts:
-        cmd.extend(["-vf", f"scale={opts['scale']}"])
+        args.extend(["-vf", f"scale={opts['scale']}"])
     
-    # Audio codec
-    cmd.extend(["-c:a", "libopus"])
-    cmd.extend(["-b:a", "128k"])
-    
-    cmd.append(dst)
-    return cmd
+    return args
+
 
+def _webm_audio_args() -> list[str]:
+    """Audio encoder arguments for WebM output (Opus)."""
+    return ["-c:a", "libopus", "-b:a", "128k"]
 
-def _build_gif_command(src: str, dst: str, opts: dict) -> list[str]:
+
+def _build_gif_command(src: str, dst: str, opts: dict,
+                       palette: Path = None, save_palette: Path = None) -> list[str]:
     """
-    Build command for GIF output using palettegen/paletteuse.
+    Build a single-process command for GIF output.
     
-    This uses a two-pass approach for better quality.
+    With an existing palette, it is applied directly. Otherwise the palette
+    is generated and applied in one filter graph (decoding the source once),
+    optionally also writing it to save_palette for later runs.
     """
     fps = opts.get("fps", 12)
     scale = opts.get("scale", "480:-1")
+    filters = f"fps={fps},scale={scale}:flags=lanczos"
+    
+    if palette is not None:
+        return [
+            "ffmpeg", "-i", src, "-i", str(palette), "-y",
+            "-lavfi", f"{filters}[x];[x][1:v]paletteuse",
+            dst
+        ]
     
-    # Generate palette
-    palette_path = Path(dst).parent / "palette.png"
+    if save_palette is None:
+        return [
+            "ffmpeg", "-i", src, "-y",
+            "-filter_complex", f"{filters},split[a][b];[a]palettegen[p];[b][p]paletteuse",
+            dst
+        ]
     
-    # First pass: generate palette
-    cmd_palette = [
+    return [
         "ffmpeg", "-i", src, "-y",
-        "-vf", f"fps={fps},scale={scale}:flags=lanczos,palettegen",
-        str(palette_path)
+        "-filter_complex",
+        f"{filters},split[a][b];[a]palettegen,split[p][keep];[b][p]paletteuse[gif]",
+        "-map", "[gif]", dst,
+        "-map", "[keep]", "-update", "1", str(save_palette)
     ]
+
+
+def _run_gif(src: str, dst: str, opts: dict, progress_cb: ProgressCallback) -> None:
+    """Convert to GIF, reusing a cached palette for the same source, fps and scale."""
+    palette = _palette_path(src, opts.get("fps", 12), opts.get("scale", "480:-1"))
     
-    _run_ffmpeg(cmd_palette, lambda x: None)  # Silent for palette gen
+    if palette is not None and palette.exists():
+        _run_ffmpeg(_build_gif_command(src, dst, opts, palette=palette), progress_cb)
+        return
     
-    # Second pass: use palette
-    cmd = [
-        "ffmpeg", "-i", src, "-i", str(palette_path), "-y",
-        "-lavfi", f"fps={fps},scale={scale}:flags=lanczos[x];[x][1:v]paletteuse",
-        dst
-    ]
+    if palette is None:
+        _run_ffmpeg(_build_gif_command(src, dst, opts), progress_cb)
+        return
+    
+    # Written under a unique name and renamed, so concurrent jobs never see a partial palette
+    tmp_palette = palette.with_name(f"{palette.stem}.{os.getpid()}.{threading.get_ident()}.png")
+    try:
+        _run_ffmpeg(_build_gif_command(src, dst, opts, save_palette=tmp_palette), progress_cb)
+        os.replace(tmp_palette, palette)
+    finally:
+        tmp_palette.unlink(missing_ok=True)
+
+
+def _palette_path(src: str, fps, scale) -> Optional[Path]:
+    """Cache location of the palette for (source version, fps, scale), or None if uncacheable."""
+    try:
+        cache_dir = Path(tempfile.gettempdir()) / f"file-converter-palettes-{getpass.getuser()}"
+        cache_dir.mkdir(mode=0o700, exist_ok=True)
+        # Only trust a directory that is ours and private
+        info = cache_dir.stat()
+        if hasattr(os, "getuid") and (info.st_uid != os.getuid() or info.st_mode & 0o077):
+            return None
+        # Sampled: naming a cache entry must not read a multi-GB source in full
+        source = fingerprint(src, mode="sampled")
+    except (OSError, KeyError):
+        return None
     
-    return cmd
+    key = hashlib.sha1(f"{source}:{fps}:{scale}".encode()).hexdigest()
+    return cache_dir / f"{key}.png"
 
 
-def _build_mp3_command(src: str, dst: str, opts: dict) -> list[str]:
+def _build_mp3_command(src: str, dst: str, opts: dict,
+                       copy: set = frozenset()) -> list[str]:
     """Build command for MP3 output."""
-    cmd = ["ffmpeg", "-i", src, "-y"]
+    return ["ffmpeg", "-i", src, "-y", *_mp3_output_args(opts, copy), dst]
+
+
+def _mp3_output_args(opts: dict, copy: set = frozenset()) -> list[str]:
+    """Output arguments for MP3 (audio only)."""
+    if "audio" in copy:
+        return ["-vn", "-c:a", "copy"]
     
     # Audio codec
-    cmd.extend(["-c:a", "libmp3lame"])
+    args = ["-vn", "-c:a", "libmp3lame"]
     
     # Quality
     quality = opts.get("quality", 2)
-    cmd.extend(["-q:a", str(quality)])
+    args.extend(["-q:a", str(quality)])
     
-    cmd.append(dst)
-    return cmd
+    return args
 
 
-def _build_flac_command(src: str, dst: str, opts: dict) -> list[str]:
+def _build_flac_command(src: str, dst: str, opts: dict,
+                        copy: set = frozenset()) -> list[str]:
     """Build command for FLAC output (lossless)."""
-    cmd = ["ffmpeg", "-i", src, "-y"]
-    
+    return ["ffmpeg", "-i", src, "-y", *_flac_output_args(opts, copy), dst]
+
+
+def _flac_output_args(opts: dict, copy: set = frozenset()) -> list[str]:
+    """Output arguments for FLAC (lossless, audio only)."""
     # Audio codec (lossless)
-    cmd.extend(["-c:a", "flac"])
-    
-    cmd.append(dst)
-    return cmd
+    return ["-vn", "-c:a", "copy" if "audio" in copy else "flac"]
 
 
-def _run_ffmpeg(cmd: list[str], progress_cb: Callable[[str], None]) -> None:
-    """Run ffmpeg command and stream stderr to callback."""
+def _run_ffmpeg(cmd: list[str], progress_cb: ProgressCallback) -> None:
+    """
+    Run an ffmpeg command, reporting structured progress and log lines.
+    
+    Progress is read from '-progress pipe:1' and passed on as ProgressEvents.
+    With stats disabled, stderr only carries headers, warnings and errors;
+    those lines are passed on as strings.
+    """
+    cmd = [cmd[0], "-progress", "pipe:1", "-nostats", *cmd[1:]]
+    stderr_tail = deque(maxlen=20)
+    emit_lock = threading.Lock()
+    process = None
+    
+    def emit(item) -> None:
+        with emit_lock:
+            progress_cb(item)
+    
+    def drain_stderr() -> None:
+        for line in process.stderr:
+            line = line.rstrip()
+            stderr_tail.append(line)
+            emit(line)
+    
     try:
         process = subprocess.Popen(
             cmd,
@@ -220,19 +448,316 @@ def _run_ffmpeg(cmd: list[str], progress_cb: Callable[[str], None]) -> None:
             bufsize=1
         )
         
-        # Read stderr line by line
-        stderr_lines = []
-        if process.stderr:
-            for line in process.stderr:
-                line = line.rstrip()
-                stderr_lines.append(line)
-                progress_cb(line)
+        with track_process(process):
+            # stderr is drained on its own thread so neither pipe can fill up
+            reader = threading.Thread(target=drain_stderr, daemon=True)
+            reader.start()
+            
+            parser = ProgressParser()
+            for line in process.stdout:
+                event = parser.feed(line)
+                if event is not None:
+                    emit(event)
+            
+            reader.join()
+            returncode = process.wait()
+        
+        if returncode != 0:
+            error_msg = "\n".join(stderr_tail)  # Last 20 lines
+            raise RuntimeError(f"FFmpeg failed with code {returncode}:\n{error_msg}")
+            
+    except Exception as e:
+        raise RuntimeError(f"FFmpeg execution failed: {e}")
+    finally:
+        # Don't leave ffmpeg running if a callback raised
+        if process is not None and process.poll() is None:
+            process.kill()
+            process.wait()
+
+
+async def _run_ffmpeg_async(cmd: list[str], progress_cb: ProgressCallback) -> None:
+    """
+    Asyncio counterpart of _run_ffmpeg(): both pipes are read by the event
+    loop, so no thread is held per process. ffmpeg is killed if the task is
+    cancelled or a callback raises.
+    """
+    cmd = [cmd[0], "-progress", "pipe:1", "-nostats", *cmd[1:]]
+    stderr_tail = deque(maxlen=20)
+    process = None
+    
+    async def read_progress() -> None:
+        parser = ProgressParser()
+        async for raw in process.stdout:
+            event = parser.feed(raw.decode(errors="replace"))
+            if event is not None:
+                progress_cb(event)
+    
+    async def drain_stderr() -> None:
+        async for raw in process.stderr:
+            line = raw.decode(errors="replace").rstrip()
+            stderr_tail.append(line)
+            progress_cb(line)
+    
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
         
-        returncode = process.wait()
+        # Both pipes are read concurrently so neither can fill up
+        await asyncio.gather(read_progress(), drain_stderr())
+        returncode = await process.wait()
         
         if returncode != 0:
-            error_msg = "\n".join(stderr_lines[-20:])  # Last 20 lines
+            error_msg = "\n".join(stderr_tail)  # Last 20 lines
             raise RuntimeError(f"FFmpeg failed with code {returncode}:\n{error_msg}")
             
     except Exception as e:
         raise RuntimeError(f"FFmpeg execution failed: {e}")
+    finally:
+        # Don't leave ffmpeg running if a callback raised or the task was cancelled
+        if process is not None and process.returncode is None:
+            process.kill()
+            await process.wait()
+
+
+def _probe(src: str) -> dict:
+    """Container and stream metadata in ffprobe's JSON layout (empty dict on failure)."""
+    info = probe(src)
+    return info.to_dict() if info else {}
+
+
+def _duration(info: dict) -> float:
+    """Container duration in seconds from ffprobe output (0.0 if unknown)."""
+    try:
+        return float(info.get("format", {}).get("duration", 0.0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _has_audio(info: dict) -> bool:
+    """Check whether ffprobe output lists an audio stream."""
+    return any(s.get("codec_type") == "audio" for s in info.get("streams", []))
+
+
+def _media_streams(info: dict, kind: str) -> list[dict]:
+    """Streams of one kind, ignoring cover art attached as a video stream."""
+    return [
+        s for s in info.get("streams", [])
+        if s.get("codec_type") == kind
+        and not s.get("disposition", {}).get("attached_pic")
+    ]
+
+
+def _present_streams(info: dict, dst_mime: str) -> set:
+    """Stream kinds the source has that the target will carry."""
+    kinds = _COPYABLE_CODECS.get(dst_mime, {})
+    return {kind for kind in kinds if _media_streams(info, kind)}
+
+
+def _copyable_streams(info: dict, dst_mime: str, opts: dict) -> set:
+    """
+    Stream kinds ("video", "audio") that can be copied into the target as-is.
+    
+    Video is only copied when no scale or crf override asks for a re-encode,
+    and MP3 audio only when no quality is requested.
+    """
+    allowed = _COPYABLE_CODECS.get(dst_mime, {})
+    copy = set()
+    
+    video = _media_streams(info, "video")
+    if "video" in allowed and video and "scale" not in opts and "crf" not in opts:
+        if video[0].get("codec_name") in allowed["video"]:
+            copy.add("video")
+    
+    audio = _media_streams(info, "audio")
+    if "audio" in allowed and audio and not (dst_mime == "audio/mp3" and "quality" in opts):
+        if audio[0].get("codec_name") in allowed["audio"]:
+            copy.add("audio")
+    
+    return copy
+
+
+def _segment_count(info: dict, opts: dict) -> int:
+    """
+    Decide how many parallel segments to encode a source in.
+    
+    Splitting is opt-in through the segments option: the engine sizes
+    batches by its own thread estimates, so a job never starts several
+    encoders unasked.
+    """
+    duration = _duration(info)
+    if duration <= 0 or "segments" not in opts:
+        return 1
+    
+    return max(1, min(int(opts["segments"]), int(duration // SEGMENT_MIN_LENGTH)))
+
+
+class _SegmentProgress:
+    """Combines progress of parallel segment encodes into one progress stream."""
+    
+    def __init__(self, count: int, emit: ProgressCallback):
+        self.events: list[Optional[ProgressEvent]] = [None] * count
+        self.emit = emit
+        self.lock = threading.Lock()
+    
+    def callback(self, index: int = None) -> ProgressCallback:
+        """Callback for segment index (None = not counted toward progress)."""
+        def on_item(item) -> None:
+            if not isinstance(item, ProgressEvent):
+                self.emit(item if index is None else f"[segment {index}] {item}")
+                return
+            if index is None:
+                return
+            
+            with self.lock:
+                self.events[index] = item
+                running = [e for e in self.events if e is not None]
+            
+            # Segments run side by side, so their rates and sizes add up
+            self.emit(ProgressEvent(
+                out_time=sum(e.out_time for e in running),
+                fps=sum(e.fps or 0.0 for e in running) or None,
+                speed=sum(e.speed or 0.0 for e in running) or None,
+                total_size=sum(e.total_size or 0 for e in running) or None,
+                frame=sum(e.frame or 0 for e in running) or None,
+            ))
+        
+        return on_item
+
+
+def _run_segmented(src: str, dst: str, dst_mime: str, opts: dict, info: dict,
+                   segments: int, copy: set, progress_cb: ProgressCallback) -> None:
+    """
+    Encode a long video as parallel segments and join them losslessly.
+    
+    The first video stream is split at keyframes without re-encoding, each
+    piece is encoded by its own ffmpeg process while the audio tracks are
+    encoded once in full, and the results are joined with the concat
+    demuxer. The remaining streams (further video streams, text subtitles,
+    MP4 data streams), metadata and chapters are muxed in from the source.
+    """
+    video_args, audio_args, ext = _SEGMENT_ENCODERS[dst_mime]
+    emit_lock = threading.Lock()
+    
+    def emit(line: str) -> None:
+        with emit_lock:
+            progress_cb(line)
+    
+    dst_dir = Path(dst).parent
+    work_dir = Path(tempfile.mkdtemp(prefix=f".{Path(dst).stem}.segments-", dir=dst_dir))
+    try:
+        # Split at keyframes (stream copy, so each piece starts on a keyframe)
+        segment_time = _duration(info) / segments
+        _run_ffmpeg([
+            "ffmpeg", "-i", src, "-y", "-map", "0:v:0", "-c", "copy",
+            "-f", "segment", "-segment_time", f"{segment_time:.3f}",
+            "-reset_timestamps", "1", str(work_dir / "src_%05d.mkv")
+        ], lambda x: None)
+        
+        pieces = sorted(work_dir.glob("src_*.mkv"))
+        encoded = [work_dir / f"enc_{i:05d}{ext}" for i in range(len(pieces))]
+        progress = _SegmentProgress(len(pieces), emit)
+        threads = max(1, (os.cpu_count() or 1) // len(pieces))
+        
+        tasks = [
+            (["ffmpeg", "-i", str(piece), "-y", *video_args(opts),
+              "-threads", str(threads), "-an", str(out)], progress.callback(i))
+            for i, (piece, out) in enumerate(zip(pieces, encoded))
+        ]
+        
+        audio_path = work_dir / f"audio{ext}"
+        has_audio = _has_audio(info)
+        if has_audio:
+            tasks.append((
+                ["ffmpeg", "-i", src, "-y", "-map", "0:a",
+                 *(["-c:a", "copy"] if "audio" in copy else audio_args()),
+                 str(audio_path)],
+                progress.callback()
+            ))
+        
+        with ThreadPoolExecutor(max_workers=len(tasks)) as pool:
+            # Each in a copy of this context, so a cancel token reaches every segment
+            futures = [pool.submit(contextvars.copy_context().run, _run_ffmpeg, cmd, cb)
+                       for cmd, cb in tasks]
+            for future in futures:
+                future.result()
+        
+        # Join losslessly; list entries are relative to the list file
+        list_path = work_dir / "segments.txt"
+        list_path.write_text("".join(f"file '{out.name}'\n" for out in encoded))
+        
+        cmd = ["ffmpeg", "-f", "concat", "-safe", "0", "-i", str(list_path)]
+        if has_audio:
+            cmd.extend(["-i", str(audio_path)])
+        source_input = 2 if has_audio else 1
+        cmd.extend(["-i", src, "-y", "-map", "0:v"])
+        if has_audio:
+            cmd.extend(["-map", "1:a"])
+        maps, codec_args = _extra_stream_maps(info, dst_mime, source_input)
+        cmd.extend(maps)
+        cmd.extend(["-map_metadata", str(source_input), "-map_chapters", str(source_input)])
+        cmd.extend(["-c", "copy", *codec_args, dst])
+        
+        _run_ffmpeg(cmd, progress.callback())
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _extra_stream_maps(info: dict, dst_mime: str,
+                       source_input: int) -> tuple[list[str], list[str]]:
+    """
+    Maps for the source streams a segmented encode doesn't produce itself.
+    
+    Keeps video streams after the first, text subtitles (converted to the
+    target's subtitle format) and, for MP4, data streams. Bitmap subtitles
+    and attachments can't be carried by MP4/WebM and are left out.
+    
+    Returns:
+        (map arguments, codec arguments to follow "-c copy")
+    """
+    subtitle_codec, keep_data = _SEGMENT_EXTRAS[dst_mime]
+    maps = []
+    first_video = True
+    subtitles = False
+    for stream in info.get("streams", []):
+        kind = stream.get("codec_type")
+        spec = ["-map", f"{source_input}:{stream.get('index')}"]
+        if kind == "video":
+            if not first_video:
+                maps.extend(spec)
+            first_video = False
+        elif kind == "subtitle" and stream.get("codec_name") in _TEXT_SUBTITLES:
+            maps.extend(spec)
+            subtitles = True
+        elif kind == "data" and keep_data:
+            maps.extend(spec)
+    
+    return maps, (["-c:s", subtitle_codec] if subtitles else [])
+
+
+# Subtitle codecs that convert to MP4/WebM text subtitles
+_TEXT_SUBTITLES = {"subrip", "ass", "ssa", "mov_text", "webvtt", "text"}
+
+# Target MIME -> (subtitle codec, whether data streams are kept) for segmented encodes
+_SEGMENT_EXTRAS = {
+    "video/mp4": ("mov_text", True),
+    "video/webm": ("webvtt", False),
+}
+
+
+# Target MIME -> (video args, audio args, segment extension) for segmented encodes
+_SEGMENT_ENCODERS = {
+    "video/mp4": (_mp4_video_args, _mp4_audio_args, ".mp4"),
+    "video/webm": (_webm_video_args, _webm_audio_args, ".webm"),
+}
+
+
+# Target MIME -> per-output arguments, for outputs that can share one ffmpeg run
+_OUTPUT_ARGS = {
+    "video/mp4": _mp4_output_args,
+    "video/webm": _webm_output_args,
+    "audio/mp3": _mp3_output_args,
+    "audio/flac": _flac_output_args,
+}
@@ -1,9 +1,12 @@
 """Main application shell with navigation."""
 import flet as ft
 from pathlib import Path
-from ..core.registry import Registry
+from typing import Optional
+from ..core.registry import Registry, default_manifest_cache_file
 from ..core.presets import load_defaults
-from ..core.jobs import Job
+from ..core.engine import resolve_max_workers
+from ..core.cache import ConversionCache
+from ..core.jobs import JobStore
 from .pages.home import HomePage
 from .pages.run_queue import RunQueuePage
 from .pages.settings import SettingsPage
@@ -13,10 +16,13 @@ class AppState:
     """Shared application state."""
     
     def __init__(self):
-        self.registry = Registry()
+        self.registry = Registry(manifest_cache_file=default_manifest_cache_file())
         self.presets = {}
-        self.jobs: list[Job] = []
+        self.jobs = JobStore()
         self.output_dir: str = ""
+        self.max_workers: int = resolve_max_workers(None)
+        self.thread_budget: Optional[int] = None
+        self.cache: Optional[ConversionCache] = ConversionCache()
         self.config = {}
         
         # Load plugins
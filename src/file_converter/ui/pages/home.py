@@ -1,13 +1,19 @@
 """Home page for file selection and job configuration."""
 import flet as ft
+import threading
 from pathlib import Path
+from typing import Optional
 import uuid
-from ...core.detect import sniff_mime
+from ...core.detect import sniff_batches
 from ...core.jobs import Job
 from ...core.planner import get_supported_outputs
 from ..widgets.file_drop import FileDrop
 
 
+# Files listed by name under the drop area; the rest are only counted
+MAX_LISTED_FILES = 200
+
+
 class HomePage:
     """Home page with file drop and conversion options."""
     
@@ -18,13 +24,22 @@ class HomePage:
         self.detected_mimes = {}
         self.selected_format = None
         self.options = {}
+        self._scan_cancel: Optional[threading.Event] = None  # Cancels the running scan
     
     def build(self):
         """Build the home page UI."""
         # File drop widget
         self.file_drop = FileDrop(on_files_selected=self._on_files_selected)
         
-        # File list
+        # File list, with a running count while folders are scanned
+        self.scan_text = ft.Text("", size=12, color=ft.Colors.GREY_600)
+        self.cancel_scan_button = ft.TextButton(
+            "Cancel",
+            icon=ft.Icons.CANCEL,
+            on_click=lambda _: self._cancel_scan(),
+            visible=False,
+        )
+        self.more_text = ft.Text("", size=12, color=ft.Colors.GREY_600)
         self.file_list = ft.Column([], spacing=5)
         
         # Target format dropdown
@@ -62,7 +77,9 @@ class HomePage:
                 
                 ft.Text("1. Select Files", size=20, weight=ft.FontWeight.BOLD),
                 self.file_drop.control,
+                ft.Row([self.scan_text, self.cancel_scan_button]),
                 self.file_list,
+                self.more_text,
                 
                 ft.Divider(),
                 
@@ -82,42 +99,82 @@ class HomePage:
             expand=True,
         )
     
-    def _on_files_selected(self, files: list[str]):
-        """Handle file selection."""
-        self.selected_files = files
-        self.detected_mimes = {}
+    def _on_files_selected(self, paths: list[str]):
+        """Handle file or folder selection by scanning it on a background thread."""
+        self._cancel_scan()
+        cancel = threading.Event()
+        self._scan_cancel = cancel
         
-        # Detect MIME types
+        self.selected_files = []
+        self.detected_mimes = {}
         self.file_list.controls.clear()
-        for file_path in files:
-            try:
-                mime = sniff_mime(file_path)
-                self.detected_mimes[file_path] = mime
-                
-                filename = Path(file_path).name
-                mime_display = mime.split('/')[-1].upper()
-                
-                self.file_list.controls.append(
-                    ft.Container(
-                        content=ft.Row([
-                            ft.Icon(ft.Icons.INSERT_DRIVE_FILE, size=20),
-                            ft.Text(filename, expand=True),
-                            ft.Text(mime_display, size=12, color=ft.Colors.BLUE_600),
-                        ]),
-                        padding=5,
-                        border=ft.border.all(1, ft.Colors.GREY_300),
-                        border_radius=5,
-                    )
-                )
-            except Exception as e:
-                self.file_list.controls.append(
-                    ft.Text(f"Error: {Path(file_path).name} - {e}", 
-                           color=ft.Colors.RED_600)
+        self.more_text.value = ""
+        self.scan_text.value = "Scanning..."
+        self.cancel_scan_button.visible = True
+        self._update_add_button()
+        
+        # Files stream in as batches are detected
+        def scan():
+            for batch in sniff_batches(paths, cancel=cancel):
+                async def show(batch=batch):
+                    self._add_detected(batch, cancel)
+                self.page.run_task(show)
+            
+            async def finish():
+                self._finish_scan(cancel)
+            self.page.run_task(finish)
+        
+        threading.Thread(target=scan, daemon=True).start()
+    
+    def _add_detected(self, batch: dict[str, str], cancel: threading.Event):
+        """Add a batch of detected files to the selection and the list."""
+        if cancel is not self._scan_cancel or cancel.is_set():
+            return  # Cancelled, or replaced by a newer selection
+        
+        for file_path, mime in batch.items():
+            self.selected_files.append(file_path)
+            self.detected_mimes[file_path] = mime
+            if len(self.file_list.controls) >= MAX_LISTED_FILES:
+                continue
+            
+            mime_display = mime.split('/')[-1].upper()
+            self.file_list.controls.append(
+                ft.Container(
+                    content=ft.Row([
+                        ft.Icon(ft.Icons.INSERT_DRIVE_FILE, size=20),
+                        ft.Text(Path(file_path).name, expand=True),
+                        ft.Text(mime_display, size=12, color=ft.Colors.BLUE_600),
+                    ]),
+                    padding=5,
+                    border=ft.border.all(1, ft.Colors.GREY_300),
+                    border_radius=5,
                 )
+            )
         
+        hidden = len(self.selected_files) - len(self.file_list.controls)
+        self.more_text.value = f"... and {hidden} more" if hidden > 0 else ""
+        self.scan_text.value = f"Scanning... {len(self.selected_files)} file(s) found"
         self._update_add_button()
+    
+    def _finish_scan(self, cancel: threading.Event):
+        """Show the final count once a scan ends."""
+        if cancel is not self._scan_cancel:
+            return
+        
+        count = len(self.selected_files)
+        if cancel.is_set():
+            self.scan_text.value = f"Scan cancelled, {count} file(s) kept"
+        else:
+            self.scan_text.value = f"{count} file(s) ready"
+        self.cancel_scan_button.visible = False
+        self._scan_cancel = None
         self.page.update()
     
+    def _cancel_scan(self):
+        """Stop the running folder scan, keeping the files found so far."""
+        if self._scan_cancel is not None:
+            self._scan_cancel.set()
+    
     def _on_format_change(self, e):
         """Handle format selection change."""
         self.selected_format = e.control.value
@@ -218,6 +275,10 @@ class HomePage:
     
     def _on_add_to_queue(self, e):
         """Add selected files to the job queue."""
+        self._cancel_scan()
+        self._scan_cancel = None
+        self.cancel_scan_button.visible = False
+        count = len(self.selected_files)
         for file_path in self.selected_files:
             src_mime = self.detected_mimes.get(file_path, "application/octet-stream")
             
@@ -229,13 +290,15 @@ class HomePage:
                 options=self.options.copy(),
             )
             
-            self.state.jobs.append(job)
+            self.state.jobs.add(job)
         
         # Clear selection
         self.file_drop.clear()
         self.selected_files = []
         self.detected_mimes = {}
         self.file_list.controls.clear()
+        self.more_text.value = ""
+        self.scan_text.value = ""
         self.selected_format = None
         self.format_dropdown.value = None
         self.options = {}
@@ -244,7 +307,7 @@ class HomePage:
         
         # Show confirmation
         self.page.snack_bar = ft.SnackBar(
-            content=ft.Text(f"Added {len(self.selected_files)} job(s) to queue"),
+            content=ft.Text(f"Added {count} job(s) to queue"),
             bgcolor=ft.Colors.GREEN_600,
         )
         self.page.snack_bar.open = True
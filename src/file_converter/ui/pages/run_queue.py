@@ -1,12 +1,21 @@
 """Run queue page for managing and executing conversion jobs."""
+import asyncio
 import flet as ft
 import threading
 from pathlib import Path
 from ...core.engine import run_batch
-from ...core.jobs import Status
+from ...core.async_engine import run_batch_async
+from ...core.jobs import Job, Status
 from ..widgets.job_row import JobRow
 
 
+# The queue view is redrawn at most this often (seconds), however often jobs report
+UI_REFRESH_INTERVAL = 0.1
+
+# Rows materialized at a time; the rest of the queue is reached by paging
+PAGE_SIZE = 100
+
+
 class RunQueuePage:
     """Page for viewing and running the job queue."""
     
@@ -14,11 +23,29 @@ class RunQueuePage:
         self.page = page
         self.state = state
         self.is_running = False
+        self.rows: dict[str, JobRow] = {}  # Job id -> row, for the visible page only
+        self.page_index = 0
+        self._dirty: dict[str, Job] = {}  # Jobs changed since the last redraw
+        self._dirty_lock = threading.Lock()
     
     def build(self):
         """Build the run queue page UI."""
-        # Job list
-        self.job_list = ft.Column([], spacing=10, scroll=ft.ScrollMode.AUTO, expand=True)
+        # Job list (one page of rows)
+        self.job_list = ft.ListView([], spacing=10, expand=True)
+        
+        # Status counts and paging
+        self.summary_text = ft.Text("", size=14, color=ft.Colors.GREY_700)
+        self.page_text = ft.Text("", size=14, color=ft.Colors.GREY_700)
+        self.prev_button = ft.IconButton(
+            icon=ft.Icons.CHEVRON_LEFT,
+            tooltip="Previous page",
+            on_click=lambda e: self._show_page(self.page_index - 1),
+        )
+        self.next_button = ft.IconButton(
+            icon=ft.Icons.CHEVRON_RIGHT,
+            tooltip="Next page",
+            on_click=lambda e: self._show_page(self.page_index + 1),
+        )
         
         # Buttons
         self.run_button = ft.ElevatedButton(
@@ -40,6 +67,8 @@ class RunQueuePage:
             on_click=self._on_open_folder_click,
         )
         
+        self.count_text = ft.Text("", size=20, color=ft.Colors.GREY_600)
+        
         # Build initial job list
         self._refresh_job_list()
         
@@ -47,8 +76,7 @@ class RunQueuePage:
             [
                 ft.Row([
                     ft.Text("Run Queue", size=32, weight=ft.FontWeight.BOLD),
-                    ft.Text(f"({len(self.state.jobs)} jobs)", 
-                           size=20, color=ft.Colors.GREY_600),
+                    self.count_text,
                 ]),
                 
                 ft.Divider(),
@@ -61,14 +89,21 @@ class RunQueuePage:
                 
                 ft.Divider(),
                 
+                ft.Row([
+                    self.summary_text,
+                    ft.Row([self.prev_button, self.page_text, self.next_button]),
+                ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+                
                 self.job_list,
             ],
             expand=True,
         )
     
     def _refresh_job_list(self):
-        """Refresh the job list display."""
+        """Rebuild the current page after jobs were added or removed."""
         self.job_list.controls.clear()
+        self.count_text.value = f"({len(self.state.jobs)} jobs)"
+        self._update_summary()
         
         if not self.state.jobs:
             self.job_list.controls.append(
@@ -83,20 +118,49 @@ class RunQueuePage:
                     expand=True,
                 )
             )
-        else:
-            for job in self.state.jobs:
+        
+        # Only the current page is materialized; rows already shown are kept
+        page_count = max(1, -(-len(self.state.jobs) // PAGE_SIZE))
+        self.page_index = max(0, min(self.page_index, page_count - 1))
+        start = self.page_index * PAGE_SIZE
+        visible = self.state.jobs.page(start, PAGE_SIZE)
+        
+        self.page_text.value = (
+            f"{start + 1}–{start + len(visible)} of {len(self.state.jobs)}"
+            if visible else "0 of 0"
+        )
+        self.prev_button.disabled = self.page_index == 0
+        self.next_button.disabled = self.page_index >= page_count - 1
+        
+        rows = {}
+        for job in visible:
+            job_row = self.rows.get(job.id)
+            if job_row is None or job_row.job is not job:
                 job_row = JobRow(job, on_remove=self._on_remove_job)
-                self.job_list.controls.append(job_row.control)
+            rows[job.id] = job_row
+            self.job_list.controls.append(job_row.control)
+        self.rows = rows
         
         self.page.update()
     
+    def _show_page(self, index: int):
+        """Switch the list to another page of jobs."""
+        self.page_index = index
+        self._refresh_job_list()
+    
+    def _update_summary(self):
+        """Show the job counts per status."""
+        self.summary_text.value = "   ".join(
+            f"{status.value.capitalize()}: {self.state.jobs.count(status)}"
+            for status in Status
+        )
+    
     def _on_run_click(self, e):
         """Start running the job queue."""
         if self.is_running:
             return
         
-        queued_jobs = [j for j in self.state.jobs if j.status == Status.QUEUED.value]
-        if not queued_jobs:
+        if not self.state.jobs.count(Status.QUEUED):
             self.page.snack_bar = ft.SnackBar(
                 content=ft.Text("No queued jobs to run"),
                 bgcolor=ft.Colors.ORANGE_600,
@@ -110,21 +174,26 @@ class RunQueuePage:
         self.run_button.text = "Running..."
         self.page.update()
         
-        # Run in background thread
+        # Redraw changed rows at a fixed rate while the batch runs
+        self.page.run_task(self._refresh_loop)
+        
+        # Without thread packing, jobs run as tasks on Flet's own event loop
+        if self.state.thread_budget is None:
+            self.page.run_task(self._run_jobs_async)
+            return
+        
+        # Weighted packing runs on worker threads
         def run_jobs():
             try:
-                def on_update(job):
-                    # Update UI on main thread using async wrapper
-                    async def update_ui():
-                        self._update_job_ui(job)
-                    self.page.run_task(update_ui)
-                
                 run_batch(
                     self.state.jobs,
                     self.state.registry,
                     self.state.presets,
                     self.state.output_dir if self.state.output_dir else None,
-                    on_update
+                    self._mark_dirty,
+                    max_workers=self.state.max_workers,
+                    thread_budget=self.state.thread_budget,
+                    cache=self.state.cache,
                 )
             finally:
                 self.is_running = False
@@ -134,18 +203,59 @@ class RunQueuePage:
         
         threading.Thread(target=run_jobs, daemon=True).start()
     
-    def _update_job_ui(self, job):
-        """Update the UI for a specific job."""
-        # Refresh the entire job list for now (simpler approach)
-        self._refresh_job_list()
+    async def _run_jobs_async(self):
+        """Run the queued jobs on the page's event loop."""
+        try:
+            await run_batch_async(
+                self.state.jobs,
+                self.state.registry,
+                self.state.presets,
+                self.state.output_dir if self.state.output_dir else None,
+                self._mark_dirty,
+                max_concurrent=self.state.max_workers,
+                cache=self.state.cache,
+            )
+        finally:
+            self.is_running = False
+            self._on_run_complete()
+    
+    def _mark_dirty(self, job: Job):
+        """Job update callback; only marks the job, _refresh_loop redraws it."""
+        with self._dirty_lock:
+            self._dirty[job.id] = job
+    
+    async def _refresh_loop(self):
+        """Redraw changed rows every UI_REFRESH_INTERVAL until the run ends."""
+        while self.is_running:
+            self._flush_job_updates()
+            await asyncio.sleep(UI_REFRESH_INTERVAL)
+        self._flush_job_updates()
+    
+    def _flush_job_updates(self):
+        """Update the rows of jobs that changed, in a single page update."""
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, {}
+        
+        if not dirty:
+            return
+        
+        # The store keeps live counts, so the summary is cheap to redraw
+        self._update_summary()
+        for job_id, job in dirty.items():
+            job_row = self.rows.get(job_id)
+            if job_row is not None:
+                job_row.set_progress(job.status, job.progress, update=False)
+        
+        self.page.update()
     
     def _on_run_complete(self):
         """Handle completion of batch run."""
+        self._flush_job_updates()
         self.run_button.disabled = False
         self.run_button.text = "Run Queue"
         
-        completed = sum(1 for j in self.state.jobs if j.status == Status.DONE.value)
-        errors = sum(1 for j in self.state.jobs if j.status == Status.ERROR.value)
+        completed = self.state.jobs.count(Status.DONE)
+        errors = self.state.jobs.count(Status.ERROR)
         
         message = f"Completed: {completed}"
         if errors:
@@ -160,12 +270,7 @@ class RunQueuePage:
     
     def _on_clear_click(self, e):
         """Clear completed and error jobs from the queue."""
-        original_count = len(self.state.jobs)
-        self.state.jobs = [
-            j for j in self.state.jobs 
-            if j.status not in [Status.DONE.value, Status.ERROR.value]
-        ]
-        removed = original_count - len(self.state.jobs)
+        removed = self.state.jobs.remove_status(Status.DONE, Status.ERROR)
         
         self._refresh_job_list()
         
@@ -183,7 +288,7 @@ class RunQueuePage:
             folder_path = self.state.output_dir
         else:
             # Use the first completed job's output directory
-            completed_jobs = [j for j in self.state.jobs if j.output_path]
+            completed_jobs = self.state.jobs.with_status(Status.DONE)
             if completed_jobs:
                 folder_path = str(Path(completed_jobs[0].output_path).parent)
             else:
@@ -218,7 +323,6 @@ class RunQueuePage:
     
     def _on_remove_job(self, job):
         """Remove a job from the queue."""
-        if job in self.state.jobs:
-            self.state.jobs.remove(job)
+        if self.state.jobs.remove(job.id) is not None:
             self._refresh_job_list()
 
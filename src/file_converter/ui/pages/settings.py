@@ -2,6 +2,7 @@
 import flet as ft
 from pathlib import Path
 import shutil
+from ...core.cache import ConversionCache
 
 
 class SettingsPage:
@@ -39,6 +40,28 @@ class SettingsPage:
             expand=True,
         )
         
+        # Parallel jobs
+        self.workers_field = ft.TextField(
+            label="Parallel Jobs",
+            hint_text="Number of conversions to run at once",
+            value=str(self.state.max_workers),
+            width=200,
+            disabled=self.state.thread_budget is not None,
+            on_change=self._on_workers_change,
+        )
+        
+        self.cost_schedule_checkbox = ft.Checkbox(
+            label="Schedule by estimated CPU cost (uses all cores)",
+            value=self.state.thread_budget is not None,
+            on_change=self._on_cost_schedule_change,
+        )
+        
+        self.cache_checkbox = ft.Checkbox(
+            label="Reuse outputs of identical earlier conversions",
+            value=self.state.cache is not None,
+            on_change=self._on_cache_change,
+        )
+        
         # Check if ffmpeg is available
         ffmpeg_available = shutil.which("ffmpeg") is not None
         ffmpeg_status = ft.Container(
@@ -77,7 +100,8 @@ class SettingsPage:
             bgcolor=ft.Colors.BLUE_50,
         )
         
-        # System info
+        # System info (re-check plugin tools, which may have been installed since startup)
+        self.state.registry.refresh()
         available_plugins = self.state.registry.get_available_plugins()
         plugin_list = ft.Column([
             ft.Text(f"• {p.name} v{p.version}") 
@@ -113,6 +137,13 @@ class SettingsPage:
                 
                 ft.Divider(),
                 
+                ft.Text("Performance", size=20, weight=ft.FontWeight.BOLD),
+                self.workers_field,
+                self.cost_schedule_checkbox,
+                self.cache_checkbox,
+                
+                ft.Divider(),
+                
                 privacy_notice,
                 
                 ft.Divider(),
@@ -129,4 +160,19 @@ class SettingsPage:
             self.state.output_dir = e.path
             self.output_dir_field.value = e.path
             self.page.update()
-
+    
+    def _on_workers_change(self, e):
+        """Handle parallel job count change."""
+        value = e.control.value.strip()
+        if value.isdigit() and int(value) > 0:
+            self.state.max_workers = int(value)
+    
+    def _on_cost_schedule_change(self, e):
+        """Toggle cost-aware scheduling against the machine's thread count."""
+        self.state.thread_budget = 0 if e.control.value else None
+        self.workers_field.disabled = bool(e.control.value)
+        self.page.update()
+    
+    def _on_cache_change(self, e):
+        """Enable or disable the conversion output cache."""
+        self.state.cache = ConversionCache() if e.control.value else None
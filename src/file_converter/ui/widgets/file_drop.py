@@ -1,11 +1,11 @@
-"""File drop widget for drag-and-drop file selection."""
+"""File drop widget for drag-and-drop file and folder selection."""
 import flet as ft
 from pathlib import Path
 from typing import Callable, Optional
 
 
 class FileDrop:
-    """Drag-and-drop area for file selection."""
+    """Drag-and-drop area for file selection, with a folder picker."""
     
     def __init__(self, on_files_selected: Optional[Callable[[list[str]], None]] = None):
         self.on_files_selected = on_files_selected
@@ -32,21 +32,34 @@ class FileDrop:
             on_click=lambda _: self.file_picker.pick_files(allow_multiple=True),
         )
         
+        self.folder_button = ft.TextButton(
+            "Or add a whole folder",
+            icon=ft.Icons.FOLDER_OPEN,
+            on_click=lambda _: self.file_picker.get_directory_path(),
+        )
+        
         self.control = ft.Column([
             self.file_picker,
             self.drop_container,
+            self.folder_button,
         ])
     
     def _on_file_picker_result(self, e: ft.FilePickerResultEvent):
-        """Handle file picker results."""
-        if e.files:
-            self.selected_files = [f.path for f in e.files]
+        """Handle file picker results (files, or a folder from get_directory_path)."""
+        if e.files or e.path:
+            if e.files:
+                self.selected_files = [f.path for f in e.files]
+                summary = f"{len(self.selected_files)} file(s) selected"
+            else:
+                # Folders are expanded into files by the on_files_selected handler
+                self.selected_files = [e.path]
+                summary = f"Folder selected: {Path(e.path).name}"
             
             # Update UI to show selected files count
             self.drop_container.content = ft.Column(
                 [
                     ft.Icon(ft.Icons.CHECK_CIRCLE, size=48, color=ft.Colors.GREEN_400),
-                    ft.Text(f"{len(self.selected_files)} file(s) selected", size=16),
+                    ft.Text(summary, size=16),
                     ft.TextButton("Change selection", 
                                 on_click=lambda _: self.file_picker.pick_files(allow_multiple=True)),
                 ],
@@ -19,6 +19,14 @@ class JobRow:
         src_display = self._format_mime(self.job.src_mime)
         dst_display = self._format_mime(self.job.dst_mime)
         
+        self.remove_button = ft.IconButton(
+            icon=ft.Icons.DELETE_OUTLINE,
+            icon_color=ft.Colors.RED_400,
+            tooltip="Remove",
+            on_click=self._on_remove_click,
+            visible=self.job.status in ["queued", "error"],
+        )
+        
         self.control = ft.Container(
             content=ft.Row(
                 [
@@ -33,13 +41,7 @@ class JobRow:
                         expand=True,
                     ),
                     self.progress_chip.control,
-                    ft.IconButton(
-                        icon=ft.Icons.DELETE_OUTLINE,
-                        icon_color=ft.Colors.RED_400,
-                        tooltip="Remove",
-                        on_click=self._on_remove_click,
-                        visible=self.job.status in ["queued", "error"],
-                    ),
+                    self.remove_button,
                 ],
                 alignment=ft.MainAxisAlignment.START,
                 vertical_alignment=ft.CrossAxisAlignment.CENTER,
@@ -50,11 +52,12 @@ class JobRow:
             bgcolor=ft.Colors.WHITE,
         )
     
-    def set_progress(self, status: str, progress: float):
-        """Update job progress."""
-        self.job.status = status
-        self.job.progress = progress
-        self.progress_chip.update_progress(status, progress)
+    def set_progress(self, status: str, progress: float, update: bool = True):
+        """Update the displayed progress (update=False leaves pushing to the caller)."""
+        self.remove_button.visible = status in ["queued", "error"]
+        self.progress_chip.update_progress(status, progress, update=False)
+        if update:
+            self.control.update()
     
     def _format_mime(self, mime: str) -> str:
         """Format MIME type for display."""
@@ -27,8 +27,16 @@ class ProgressChip:
             padding=ft.padding.symmetric(horizontal=12, vertical=4),
         )
     
-    def update_progress(self, status: str, progress: float):
-        """Update the progress display."""
+    def update_progress(self, status: str, progress: float, update: bool = True):
+        """
+        Update the progress display.
+        
+        Args:
+            status: Job status value
+            progress: Progress (0.0 to 1.0)
+            update: Push the change now; pass False when the caller batches
+                several changes into one page.update()
+        """
         self.status = status
         self.progress = progress
         
@@ -42,7 +50,8 @@ class ProgressChip:
         
         self.text_control.value = display_text
         self.control.bgcolor = color
-        self.control.update()
+        if update:
+            self.control.update()
     
     def _get_status_display(self) -> tuple[str, str]:
         """Get color and text for current status."""
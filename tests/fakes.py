@@ -0,0 +1,153 @@
+"""Fakes shared by the tests: text plugins and a temp dir with its own probe cache."""
+import json
+import tempfile
+import textwrap
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Sequence
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from file_converter.core.registry import Registry
+from file_converter.core.probe import ProbeCache, set_probe_cache
+
+
+PLUGIN_TOML = """
+name = "{name}"
+version = "1.0.0"
+entry = "plugin.py"
+tool_requires = []
+
+[[capabilities]]
+inputs = {inputs}
+outputs = {outputs}
+"""
+
+PLUGIN_PY = """
+import threading
+import time
+from pathlib import Path
+from file_converter.core.exec import run_command, run_command_async
+
+# Peak number of run_async() calls in flight, and the threads they ran on
+running = 0
+peak = 0
+threads = set()
+
+
+def available():
+    return True
+
+
+def capabilities():
+    return [{{"inputs": {inputs}, "outputs": {outputs}}}]
+
+
+def plan(src_mime, dst_mime):
+    return {{"cost": {cost}, "lossiness": "{lossiness}"}}
+"""
+
+RUN_PY = """
+
+def run(src_path, dst_path, dst_mime, opts, progress_cb):
+    if opts.get("fail"):
+        raise RuntimeError("bad output options")
+    time.sleep(opts.get("delay", {sleep}))
+    if opts.get("command"):
+        run_command(["sh", "-c", opts["command"]], progress_cb)
+    progress_cb("{name} ran")
+    text = Path(src_path).read_text()
+    Path(dst_path).write_text({transform})
+"""
+
+RUN_MULTI_PY = """
+
+def run_multi(src_path, outputs, progress_cb):
+    progress_cb(f"single run for {{len(outputs)}} outputs")
+    if any(output["opts"].get("fail") for output in outputs):
+        raise RuntimeError("bad output options")
+    text = Path(src_path).read_text()
+    for output in outputs:
+        Path(output["dst_path"]).write_text({transform})
+"""
+
+# Each run is a shell process that sleeps and exits with opts["exit"]
+RUN_ASYNC_PY = """
+
+def run(src_path, dst_path, dst_mime, opts, progress_cb):
+    raise AssertionError("the asyncio engine should await run_async()")
+
+
+async def run_async(src_path, dst_path, dst_mime, opts, progress_cb):
+    global running, peak
+    running += 1
+    peak = max(peak, running)
+    threads.add(threading.get_ident())
+    try:
+        await run_command_async(
+            ["sh", "-c", "echo started >&2; sleep {sleep}; exit $0", str(opts.get("exit", 0))],
+            progress_cb
+        )
+    finally:
+        running -= 1
+    text = Path(src_path).read_text()
+    Path(dst_path).write_text({transform})
+"""
+
+
+def add_plugin(plugin_root: Path, name: str, inputs: Sequence[str] = ("text/*",),
+               outputs: Sequence[str] = ("text/plain",), transform: str = "text",
+               sleep: float = 0, cost: float = 1.0, lossiness: str = "lossless",
+               multi: bool = False, run_async: bool = False) -> None:
+    """
+    Write a fake plugin that converts text files.
+
+    Args:
+        plugin_root: Plugins directory; the plugin goes in plugin_root/name
+        name: Plugin name, also logged by each run as "<name> ran"
+        inputs: Input MIME patterns
+        outputs: Output MIME types
+        transform: Expression for the output text, over the input `text`
+        sleep: Seconds each run takes (a job's "delay" option overrides it);
+            a job's "command" option is also run, as a shell command
+        cost: Planning cost
+        lossiness: Planning lossiness
+        multi: Add run_multi(), writing every output in one run
+        run_async: Convert in run_async() around a `sleep` subprocess; run()
+            then refuses, so only the asyncio engine can use the plugin
+    """
+    plugin_dir = Path(plugin_root) / name
+    plugin_dir.mkdir(parents=True)
+    fields = dict(name=name, inputs=json.dumps(list(inputs)),
+                  outputs=json.dumps(list(outputs)), transform=transform,
+                  sleep=sleep, cost=cost, lossiness=lossiness)
+    source = PLUGIN_PY + (RUN_ASYNC_PY if run_async else RUN_PY)
+    if multi:
+        source += RUN_MULTI_PY
+    (plugin_dir / "plugin.toml").write_text(PLUGIN_TOML.format(**fields))
+    (plugin_dir / "plugin.py").write_text(textwrap.dedent(source.format(**fields)))
+
+
+def make_registry(tmpdir: Path) -> Registry:
+    """Load the plugins in tmpdir/plugins, caching manifests in tmpdir."""
+    registry = Registry(manifest_cache_file=tmpdir / "manifests.json")
+    registry.load_plugins(tmpdir / "plugins")
+    return registry
+
+
+@contextmanager
+def temp_dir() -> Iterator[str]:
+    """
+    A temporary directory, like tempfile.TemporaryDirectory().
+
+    While it is in use, the global probe cache lives in it, so tests that
+    convert or probe files never write to the real ~/.cache.
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        previous = set_probe_cache(ProbeCache(Path(tmpdir) / ".probe-cache"))
+        try:
+            yield tmpdir
+        finally:
+            set_probe_cache(previous)
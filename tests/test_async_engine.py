@@ -0,0 +1,171 @@
+"""Tests for the asyncio conversion engine."""
+import asyncio
+import os
+import time
+from pathlib import Path
+import sys
+
+# Add src and the shared test fakes to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from file_converter.core.registry import Registry
+from file_converter.core.jobs import Job, Status
+from file_converter.core.async_engine import run_batch_async, run_batch_sync
+from file_converter.core.exec import ExecutionError, run_command_async
+from fakes import add_plugin, make_registry, temp_dir
+
+
+def make_async_registry(tmpdir: Path, sleep: float = 0.5) -> Registry:
+    """Registry with an async plugin (text/x-slow) and a sync one (text/x-upper)."""
+    add_plugin(tmpdir / "plugins", "slow_async", ["text/plain"], ["text/x-slow"],
+               "text.upper()", sleep=sleep, run_async=True)
+    add_plugin(tmpdir / "plugins", "sync_upper", ["text/plain"], ["text/x-upper"],
+               "text.upper()")
+    return make_registry(tmpdir)
+
+
+def make_jobs(tmpdir: Path, count: int, dst_mime: str) -> list[Job]:
+    """One job per source file, each source with its own content."""
+    src_dir = tmpdir / "src"
+    src_dir.mkdir(exist_ok=True)
+    jobs = []
+    for i in range(count):
+        src = src_dir / f"{dst_mime.split('/')[-1]}-{i}.txt"
+        src.write_text(f"file {i}")
+        jobs.append(Job(id=f"{dst_mime}-{i}", src_path=str(src),
+                        src_mime="text/plain", dst_mime=dst_mime))
+    return jobs
+
+
+def test_hundreds_of_processes_on_one_loop():
+    """Test that one event loop supervises hundreds of subprocesses at once."""
+    with temp_dir() as tmpdir:
+        tmpdir = Path(tmpdir)
+        registry = make_async_registry(tmpdir, sleep=1.0)
+        plugin = next(p for p in registry.plugins if p.name == "slow_async")
+        assert plugin.supports_async()
+        jobs = make_jobs(tmpdir, 200, "text/x-slow")
+
+        updates = []
+        start = time.monotonic()
+        run_batch_sync(jobs, registry, {}, str(tmpdir / "out"), updates.append,
+                       max_concurrent=200)
+        elapsed = time.monotonic() - start
+
+        assert all(job.status == Status.DONE.value for job in jobs), \
+            [job.logs for job in jobs if job.status != Status.DONE.value][:1]
+        assert Path(jobs[7].output_path).read_text() == "FILE 7"
+        assert "started" in jobs[7].logs
+
+        # 200 one-second processes overlap, all driven from the loop thread
+        assert plugin.module.peak >= 100, plugin.module.peak
+        assert len(plugin.module.threads) == 1
+        assert elapsed < 30, elapsed
+        assert updates[-1].status in (Status.DONE.value, Status.ERROR.value)
+
+
+def test_sync_plugins_and_failures_in_async_batch():
+    """Test that sync plugins run on threads and failed commands fail their job."""
+    with temp_dir() as tmpdir:
+        tmpdir = Path(tmpdir)
+        registry = make_async_registry(tmpdir, sleep=0)
+        jobs = make_jobs(tmpdir, 3, "text/x-upper") + make_jobs(tmpdir, 2, "text/x-slow")
+        jobs[-1].options = {"exit": 3}
+
+        async def main():
+            await run_batch_async(jobs, registry, {}, str(tmpdir / "out"), max_concurrent=4)
+
+        asyncio.run(main())
+
+        for job in jobs[:4]:
+            assert job.status == Status.DONE.value, job.logs
+        assert "sync_upper ran" in jobs[0].logs
+        assert Path(jobs[0].output_path).read_text() == "FILE 0"
+
+        failed = jobs[-1]
+        assert failed.status == Status.ERROR.value
+        assert "exit code 3" in failed.logs[-1]
+
+
+def test_cancelled_command_is_killed():
+    """Test that cancelling the awaiting task kills the subprocess."""
+    with temp_dir() as tmpdir:
+        pid_file = Path(tmpdir) / "pid"
+
+        async def main():
+            task = asyncio.create_task(run_command_async(
+                ["sh", "-c", f"echo $$ > {pid_file}; exec sleep 30"]
+            ))
+            while not pid_file.exists() or not pid_file.read_text().strip():
+                await asyncio.sleep(0.01)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        start = time.monotonic()
+        asyncio.run(main())
+        assert time.monotonic() - start < 10
+
+        # The process is gone (killed and reaped)
+        pid = int(pid_file.read_text())
+        try:
+            os.kill(pid, 0)
+            raise AssertionError(f"process {pid} still running")
+        except ProcessLookupError:
+            pass
+
+        # Failures carry the exit code and stderr tail
+        try:
+            asyncio.run(run_command_async(["sh", "-c", "echo boom >&2; exit 2"]))
+            raise AssertionError("expected ExecutionError")
+        except ExecutionError as e:
+            assert e.returncode == 2
+            assert e.stderr_tail == ["boom"]
+
+
+def test_cancelled_threaded_run_kills_its_command():
+    """Test that cancelling a batch kills a tool a sync plugin runs on a worker thread."""
+    with temp_dir() as tmpdir:
+        tmpdir = Path(tmpdir)
+        registry = make_async_registry(tmpdir, sleep=0)
+        pid_file = tmpdir / "pid"
+        (job,) = make_jobs(tmpdir, 1, "text/x-upper")
+        job.options = {"command": f"echo $$ > {pid_file}; exec sleep 30"}
+
+        async def main():
+            task = asyncio.create_task(
+                run_batch_async([job], registry, {}, str(tmpdir / "out"))
+            )
+            while not pid_file.exists() or not pid_file.read_text().strip():
+                await asyncio.sleep(0.01)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        start = time.monotonic()
+        asyncio.run(main())
+        assert time.monotonic() - start < 10
+
+        assert job.status == Status.ERROR.value
+        assert job.logs[-1] == "Cancelled"
+
+        # The thread reaped the killed process before the cancel returned
+        pid = int(pid_file.read_text())
+        try:
+            os.kill(pid, 0)
+            raise AssertionError(f"process {pid} still running")
+        except ProcessLookupError:
+            pass
+
+
+if __name__ == "__main__":
+    test_hundreds_of_processes_on_one_loop()
+    test_sync_plugins_and_failures_in_async_batch()
+    test_cancelled_command_is_killed()
+    test_cancelled_threaded_run_kills_its_command()
+    print("All tests passed!")
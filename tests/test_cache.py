@@ -0,0 +1,109 @@
+"""Tests for the conversion output cache."""
+import os
+import tempfile
+import time
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from file_converter.core import cache as cache_module
+from file_converter.core.cache import ConversionCache, fingerprint
+
+
+class FakePlugin:
+    name = "fake"
+    version = "1.0.0"
+
+
+def test_fingerprint_modes():
+    """Test full and sampled fingerprints of large files."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+        size = cache_module.SAMPLE_THRESHOLD + 1024 * 1024
+        a = tmpdir / "a.bin"
+        b = tmpdir / "b.bin"
+        a.write_bytes(b"\x01" * size)
+        b.write_bytes(b"\x01" * size)
+
+        # Sampling is opt-in; the default hashes the whole file
+        assert fingerprint(str(a)) == fingerprint(str(a), "full")
+        assert fingerprint(str(a), "full") == fingerprint(str(b), "full")
+        assert fingerprint(str(a), "sampled") != fingerprint(str(a), "full")
+
+        # Sampled fingerprints cover size and mtime
+        stat = a.stat()
+        os.utime(b, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert fingerprint(str(a), "sampled") == fingerprint(str(b), "sampled")
+
+        # An edit between samples that keeps size and mtime is only caught in full
+        step = (size - cache_module.SAMPLE_CHUNK) // (cache_module.SAMPLE_COUNT - 1)
+        with open(b, "r+b") as f:
+            f.seek(step + cache_module.SAMPLE_CHUNK + 1)
+            f.write(b"\x02")
+        os.utime(b, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert fingerprint(str(a), "sampled") == fingerprint(str(b), "sampled")
+        assert fingerprint(str(a)) != fingerprint(str(b))
+
+        # The tail is always sampled
+        with open(b, "r+b") as f:
+            f.seek(size - 1)
+            f.write(b"\x02")
+        os.utime(b, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert fingerprint(str(a), "sampled") != fingerprint(str(b), "sampled")
+
+def test_cache_key_covers_conversion_inputs():
+    """Test that options and plugin version change the key."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        src = Path(tmpdir) / "in.wav"
+        src.write_bytes(b"audio")
+        cache = ConversionCache(Path(tmpdir) / "cache")
+
+        base = cache.key(str(src), "audio/mp3", {"quality": 2}, FakePlugin)
+        assert base == cache.key(str(src), "audio/mp3", {"quality": 2}, FakePlugin)
+        assert base != cache.key(str(src), "audio/mp3", {"quality": 0}, FakePlugin)
+        assert base != cache.key(str(src), "audio/flac", {"quality": 2}, FakePlugin)
+
+        class NewerPlugin(FakePlugin):
+            version = "1.1.0"
+
+        assert base != cache.key(str(src), "audio/mp3", {"quality": 2}, NewerPlugin)
+
+
+def test_cache_store_fetch_and_lru_eviction():
+    """Test that entries round-trip and the least recently used is evicted."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+        cache = ConversionCache(tmpdir / "cache", max_bytes=250)
+
+        for name in ("a", "b"):
+            output = tmpdir / f"{name}.mp3"
+            output.write_bytes(name.encode() * 100)
+            cache.store(name, str(output))
+
+        # Use "a" so that "b" becomes the eviction candidate
+        time.sleep(0.01)
+        assert cache.fetch("a", str(tmpdir / "a_copy.mp3"))
+        assert (tmpdir / "a_copy.mp3").read_bytes() == b"a" * 100
+
+        output = tmpdir / "c.mp3"
+        output.write_bytes(b"c" * 100)
+        cache.store("c", str(output))
+
+        assert cache.lookup("a") is not None
+        assert cache.lookup("b") is None
+        assert cache.lookup("c") is not None
+        assert not cache.fetch("b", str(tmpdir / "b_copy.mp3"))
+
+        # The running total matches what is left, and re-storing a key doesn't grow it
+        assert cache._total == 200
+        cache.store("c", str(output))
+        assert cache._total == 200
+
+
+if __name__ == "__main__":
+    test_fingerprint_modes()
+    test_cache_key_covers_conversion_inputs()
+    test_cache_store_fetch_and_lru_eviction()
+    print("All tests passed!")
@@ -0,0 +1,104 @@
+"""Tests for the command-line interface."""
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).parent.parent
+
+# Add the repo root to path for the cli package
+sys.path.insert(0, str(REPO_ROOT))
+
+from cli.main import _expand_inputs, _mirrored_out_dir
+
+# Total import time allowed for `fc --help`, in microseconds
+HELP_IMPORT_BUDGET_US = 100_000
+
+# Modules that only the commands themselves may import
+DEFERRED_MODULES = ["colorama", "magic", "tomli", "file_converter.core.registry",
+                    "file_converter.core.engine"]
+
+
+def import_times(*args: str) -> dict[str, int]:
+    """Run the CLI under -X importtime; returns self time per module in microseconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "cli.main", *args],
+        cwd=REPO_ROOT, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) == 3 and fields[0].strip().isdigit():
+            times[fields[2].strip()] = int(fields[0])
+    return times
+
+
+def test_help_import_time_budget():
+    """Test that --help imports nothing heavy and stays within the time budget."""
+    times = import_times("--help")
+
+    assert times, "no -X importtime output"
+    loaded = [name for name in DEFERRED_MODULES if name in times]
+    assert not loaded, f"--help imported {', '.join(loaded)}"
+
+    total = sum(times.values())
+    assert total < HELP_IMPORT_BUDGET_US, f"--help spent {total / 1000:.1f} ms importing"
+
+
+def test_expand_inputs_walks_directories_and_globs():
+    """Test that inputs expand to unique files with the roots they mirror."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name in ["a.mkv", "sub/b.mkv", "sub/deep/c.mkv", "sub/notes.txt"]:
+            path = Path(tmpdir) / "clips" / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(name)
+        clips = os.path.join(tmpdir, "clips")
+        single = os.path.join(clips, "a.mkv")
+
+        sources, missing = _expand_inputs([
+            single,
+            clips,
+            os.path.join(clips, "**", "*.mkv"),
+            os.path.join(tmpdir, "none", "*.mkv"),
+            os.path.join(tmpdir, "missing.mkv"),
+        ])
+
+        assert len(missing) == 2
+        # The file named directly keeps its own place; the walk adds the rest once
+        assert sources[0] == (single, None)
+        assert sorted(os.path.relpath(p, clips) for p, _ in sources[1:]) == [
+            "sub/b.mkv", "sub/deep/c.mkv", "sub/notes.txt"
+        ]
+        assert all(root == clips for _, root in sources[1:])
+
+        out_dirs = {}
+        deep = os.path.join(clips, "sub", "deep", "c.mkv")
+        assert _mirrored_out_dir(deep, clips, "/out", out_dirs) == "/out/sub/deep"
+        assert _mirrored_out_dir(single, None, "/out", out_dirs) is None
+        assert _mirrored_out_dir(single, clips, "/out", out_dirs) == "/out"
+
+
+def test_run_exit_code_reports_missing_inputs():
+    """Test that a run with no usable inputs fails."""
+    with tempfile.TemporaryDirectory() as home:
+        # The CLI keeps its caches under HOME
+        result = subprocess.run(
+            [sys.executable, "-m", "cli.main", "run", "/nonexistent/*.mkv", "--to", "video/mp4"],
+            cwd=REPO_ROOT, env=dict(os.environ, HOME=home),
+            capture_output=True, text=True, timeout=60,
+        )
+    assert result.returncode == 1
+    assert "/nonexistent/*.mkv" in result.stdout
+
+
+if __name__ == "__main__":
+    test_help_import_time_budget()
+    test_expand_inputs_walks_directories_and_globs()
+    test_run_exit_code_reports_missing_inputs()
+    print("All tests passed!")
@@ -0,0 +1,174 @@
+"""Tests for distributed runs: a coordinator and workers on localhost."""
+import socket
+import threading
+import time
+from pathlib import Path
+import sys
+
+# Add src and the shared test fakes to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from file_converter.core.registry import Registry
+from file_converter.core.jobs import Job
+from file_converter.core.cluster import Coordinator, Worker
+from file_converter.core.client import DaemonClient
+from fakes import add_plugin, make_registry, temp_dir
+
+
+def make_jobs(tmpdir: Path, count: int, delay: float) -> list[Job]:
+    """Create copy jobs over distinct sources, writing to a shared output directory."""
+    jobs = []
+    for i in range(count):
+        src = tmpdir / "in" / f"file_{i}.txt"
+        src.parent.mkdir(exist_ok=True)
+        src.write_text(f"file {i}")
+        jobs.append(Job(id=str(i), src_path=str(src), src_mime="text/plain",
+                        dst_mime="text/plain", options={"delay": delay},
+                        out_dir=str(tmpdir / "out")))
+    return jobs
+
+
+def start_coordinator(heartbeat_timeout: float = 10.0):
+    """Serve a coordinator on a free localhost port; returns it and its finished jobs."""
+    finished = []
+    coordinator = Coordinator(port=0, heartbeat_timeout=heartbeat_timeout,
+                              on_finish=lambda job, elapsed: finished.append(job))
+    coordinator.start()
+    threading.Thread(target=coordinator.serve_forever, daemon=True).start()
+    return coordinator, finished
+
+
+def start_worker(coordinator: Coordinator, registry: Registry, **kwargs) -> Worker:
+    worker = Worker(coordinator.address, registry, {}, **kwargs)
+    threading.Thread(target=worker.run, daemon=True).start()
+    return worker
+
+
+def run_with_workers(tmpdir: Path, workers: int, count: int, delay: float) -> float:
+    """Run count jobs on several workers; returns the measured jobs per hour."""
+    add_plugin(tmpdir / "plugins", "sleep_copy")
+    registry = make_registry(tmpdir)
+    coordinator, finished = start_coordinator()
+    try:
+        running = [start_worker(coordinator, registry) for _ in range(workers)]
+        start = time.monotonic()
+        coordinator.submit(make_jobs(tmpdir, count, delay))
+        assert coordinator.wait(timeout=30)
+        elapsed = time.monotonic() - start
+        for worker in running:
+            worker.stop()
+
+        assert sorted(int(job.id) for job in finished) == list(range(count))
+        assert all(job.status == "done" for job in finished), [j.logs for j in finished]
+        stats = coordinator.stats()
+        assert sum(w["completed"] for w in stats["workers"]) == count
+        return count * 3600 / elapsed
+    finally:
+        coordinator.shutdown()
+
+
+def test_jobs_per_hour_scales_with_workers():
+    """Test that three workers finish a batch much faster than one."""
+    with temp_dir() as one_dir, temp_dir() as three_dir:
+        one = run_with_workers(Path(one_dir), workers=1, count=12, delay=0.1)
+        three = run_with_workers(Path(three_dir), workers=3, count=12, delay=0.1)
+
+    assert three > 2 * one, f"1 worker: {one:.0f} jobs/hour, 3 workers: {three:.0f} jobs/hour"
+
+
+def test_idle_worker_steals_prefetched_jobs():
+    """Test that a late worker steals jobs a busy worker holds but hasn't started."""
+    with temp_dir() as tmpdir:
+        tmpdir = Path(tmpdir)
+        add_plugin(tmpdir / "plugins", "sleep_copy")
+        registry = make_registry(tmpdir)
+        coordinator, finished = start_coordinator()
+        try:
+            coordinator.submit(make_jobs(tmpdir, 8, 0.1))
+            busy = start_worker(coordinator, registry, prefetch=8)
+            time.sleep(0.05)
+            late = start_worker(coordinator, registry)
+
+            assert coordinator.wait(timeout=30)
+            busy.stop()
+            late.stop()
+
+            completed = {w["worker"]: w["completed"] for w in coordinator.stats()["workers"]}
+            assert completed[late.worker_id] >= 2, completed
+            assert len(finished) == 8
+        finally:
+            coordinator.shutdown()
+
+
+def test_jobs_of_silent_worker_are_requeued():
+    """Test that a worker that stops heartbeating loses its jobs to the others."""
+    with temp_dir() as tmpdir:
+        tmpdir = Path(tmpdir)
+        add_plugin(tmpdir / "plugins", "sleep_copy")
+        registry = make_registry(tmpdir)
+        coordinator, finished = start_coordinator(heartbeat_timeout=0.5)
+        try:
+            coordinator.submit(make_jobs(tmpdir, 4, 0.0))
+
+            # A worker that takes two jobs, starts one and then hangs
+            hung = DaemonClient(socket.create_connection(coordinator.address))
+            hung.request("hello", worker="hung", slots=1)
+            taken = hung.request("take", worker="hung", count=2)["jobs"]
+            hung.request("start", worker="hung", id=taken[0]["id"])
+
+            healthy = start_worker(coordinator, registry)
+            assert coordinator.wait(timeout=30)
+            healthy.stop()
+
+            assert sorted(job.id for job in finished) == ["0", "1", "2", "3"]
+            # The started job went back to the queue; the other one may be stolen first
+            (requeued,) = [job for job in finished if job.id == taken[0]["id"]]
+            assert any(line.startswith("Requeued: worker hung") for line in requeued.logs)
+
+            # A late result from the hung worker is ignored
+            late = hung.request("finish", worker="hung", id=taken[0]["id"], status="done")
+            assert late.get("stale")
+            assert len(finished) == 4
+            hung.close()
+        finally:
+            coordinator.shutdown()
+
+
+def test_expired_worker_says_hello_again():
+    """Test that a worker the coordinator presumed dead rejoins and keeps working."""
+    with temp_dir() as tmpdir:
+        tmpdir = Path(tmpdir)
+        add_plugin(tmpdir / "plugins", "sleep_copy")
+        registry = make_registry(tmpdir)
+        coordinator, finished = start_coordinator(heartbeat_timeout=0.5)
+        try:
+            worker = start_worker(coordinator, registry)
+            deadline = time.monotonic() + 10
+            while not coordinator.stats()["workers"] and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            # As the reaper does after a stall longer than the heartbeat timeout
+            coordinator._drop_worker(worker.worker_id, "stopped sending heartbeats")
+            assert not coordinator.stats()["workers"][0]["alive"]
+            while not coordinator.stats()["workers"][0]["alive"] and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert coordinator.stats()["workers"][0]["alive"]
+
+            coordinator.submit(make_jobs(tmpdir, 4, 0.0))
+            assert coordinator.wait(timeout=30)
+            worker.stop()
+
+            assert len(finished) == 4
+            assert all(job.status == "done" for job in finished), [j.logs for j in finished]
+            assert coordinator.stats()["workers"][0]["completed"] == 4
+        finally:
+            coordinator.shutdown()
+
+
+if __name__ == "__main__":
+    test_jobs_per_hour_scales_with_workers()
+    test_idle_worker_steals_prefetched_jobs()
+    test_jobs_of_silent_worker_are_requeued()
+    test_expired_worker_says_hello_again()
+    print("All tests passed!")
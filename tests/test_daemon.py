@@ -0,0 +1,213 @@
+"""Tests for the conversion daemon and its socket API."""
+import os
+import socket
+import stat
+import subprocess
+import threading
+import time
+from pathlib import Path
+import sys
+
+# Add src and the shared test fakes to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from file_converter.core.daemon import ConversionDaemon
+from file_converter.core.detect import MimeCache
+from file_converter.core.client import DaemonError, SOCKET_ENV, connect
+from fakes import add_plugin, make_registry, temp_dir
+
+
+REPO_ROOT = Path(__file__).parent.parent
+
+
+def start_daemon(tmpdir: Path, max_workers: int = 2) -> ConversionDaemon:
+    """Serve a daemon with a text copying plugin on a socket in tmpdir."""
+    add_plugin(tmpdir / "plugins", "slow_copy")
+    daemon = ConversionDaemon(make_registry(tmpdir), {}, tmpdir / "fc.sock",
+                              max_workers=max_workers,
+                              mime_cache=MimeCache(tmpdir / "mime.json"))
+    daemon.start()
+    threading.Thread(target=daemon.serve_forever, daemon=True).start()
+    return daemon
+
+
+def test_submit_and_stream_progress():
+    """Test a small job submitted over the socket finishes within milliseconds."""
+    with temp_dir() as tmpdir:
+        tmpdir = Path(tmpdir)
+        daemon = start_daemon(tmpdir)
+        src = tmpdir / "note.txt"
+        src.write_text("hello")
+        try:
+            with connect(daemon.socket_path) as client:
+                start = time.monotonic()
+                for _ in range(20):
+                    client.request("ping")
+                assert (time.monotonic() - start) / 20 < 0.05
+
+                plan = client.request("plan", src=str(src), dst_mime="text/plain")
+                assert plan["steps"][0]["plugin"] == "slow_copy"
+
+                start = time.monotonic()
+                reply = client.request("submit", sources=[{"src": str(src)}],
+                                       dst_mime=["text/plain"],
+                                       options={}, no_cache=True)
+                (job,) = reply["sources"][0]["jobs"]
+                states = [r["job"] for r in client.stream("progress", ids=[job["id"]])]
+                elapsed = time.monotonic() - start
+
+                assert states[-1]["status"] == "done", states
+                assert Path(states[-1]["output_path"]).read_text() == "hello"
+                assert elapsed < 0.5, f"Small job took {elapsed * 1000:.0f} ms"
+                assert client.request("status")["counts"]["done"] == 1
+        finally:
+            daemon.shutdown()
+
+        # The socket is removed once the daemon stops
+        time.sleep(0.1)
+        assert connect(daemon.socket_path) is None
+
+
+def test_cancel_queued_and_running_jobs():
+    """Test that cancelling a running job kills its tool and a queued one never starts."""
+    with temp_dir() as tmpdir:
+        tmpdir = Path(tmpdir)
+        daemon = start_daemon(tmpdir, max_workers=1)
+        pid_file = tmpdir / "pid"
+        sources = []
+        for name in ("a.txt", "b.txt"):
+            (tmpdir / name).write_text(name)
+            sources.append({"src": str(tmpdir / name)})
+        try:
+            with connect(daemon.socket_path) as client:
+                reply = client.request(
+                    "submit", sources=sources, dst_mime="text/plain", no_cache=True,
+                    options={"command": f"echo $$ > {pid_file}; exec sleep 30"},
+                )
+                first, second = (s["jobs"][0]["id"] for s in reply["sources"])
+
+                cancelled = client.request("cancel", id=second)["job"]
+                assert cancelled["status"] == "error"
+
+                while not pid_file.exists() or not pid_file.read_text().strip():
+                    time.sleep(0.01)
+                start = time.monotonic()
+                assert client.request("cancel", id=first)["job"]["status"] == "error"
+
+                states = {r["job"]["id"]: r["job"]
+                          for r in client.stream("progress", ids=[first, second])}
+                assert time.monotonic() - start < 10
+                assert states[first]["status"] == "error"
+                for job_id in (first, second):
+                    logs = client.request("status", id=job_id)["job"]["logs"]
+                    assert logs[-1] == "Cancelled", logs
+
+                # The tool was killed, and finished jobs can't be cancelled
+                pid = int(pid_file.read_text())
+                deadline = time.monotonic() + 5
+                while time.monotonic() < deadline:
+                    try:
+                        os.kill(pid, 0)
+                    except ProcessLookupError:
+                        break
+                    time.sleep(0.01)
+                else:
+                    raise AssertionError(f"process {pid} still running")
+                try:
+                    client.request("cancel", id=first)
+                    assert False, "a finished job was cancelled"
+                except DaemonError as e:
+                    assert e.reply["status"] == "error"
+                    assert "only queued or running jobs" in str(e)
+        finally:
+            daemon.shutdown()
+
+
+def test_handler_errors_are_replies():
+    """Test that a request failing inside the daemon gets an error reply."""
+    with temp_dir() as tmpdir:
+        tmpdir = Path(tmpdir)
+        daemon = start_daemon(tmpdir)
+        try:
+            # Created private, not chmod-ed afterwards
+            assert stat.S_IMODE(os.stat(daemon.socket_path).st_mode) == 0o600
+
+            with connect(daemon.socket_path) as client:
+                try:
+                    client.request("plan", src=str(tmpdir / "missing.txt"),
+                                   dst_mime="text/plain")
+                    assert False, "planning a missing file succeeded"
+                except DaemonError as e:
+                    assert "plan failed" in str(e)
+                assert client.request("ping")["ok"]
+        finally:
+            daemon.shutdown()
+
+
+def test_cli_falls_back_when_daemon_hangs_up():
+    """Test that fc plan runs in-process when the daemon drops the request."""
+    with temp_dir() as tmpdir:
+        tmpdir = Path(tmpdir)
+        socket_path = tmpdir / "fc.sock"
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(socket_path))
+        server.listen()
+
+        def hang_up():
+            conn, _ = server.accept()
+            conn.close()
+
+        threading.Thread(target=hang_up, daemon=True).start()
+        src = tmpdir / "note.txt"
+        src.write_text("hello")
+        env = dict(os.environ, HOME=str(tmpdir), **{SOCKET_ENV: str(socket_path)})
+        try:
+            plan = subprocess.run(
+                [sys.executable, "-m", "cli.main", "plan", str(src), "--to", "text/plain"],
+                cwd=REPO_ROOT, env=env, capture_output=True, text=True, timeout=60,
+            )
+        finally:
+            server.close()
+
+        assert "Traceback" not in plan.stderr, plan.stderr
+        assert "planning in this process" in plan.stdout, plan.stdout
+
+
+def test_cli_uses_running_daemon():
+    """Test that fc plan and fc run go through a running daemon."""
+    with temp_dir() as tmpdir:
+        tmpdir = Path(tmpdir)
+        daemon = start_daemon(tmpdir)
+        src = tmpdir / "note.txt"
+        src.write_text("hello")
+        env = dict(os.environ, HOME=str(tmpdir), **{SOCKET_ENV: str(daemon.socket_path)})
+        try:
+            # Only the daemon's registry has slow_copy
+            plan = subprocess.run(
+                [sys.executable, "-m", "cli.main", "plan", str(src), "--to", "text/plain"],
+                cwd=REPO_ROOT, env=env, capture_output=True, text=True, timeout=60,
+            )
+            assert plan.returncode == 0, plan.stdout + plan.stderr
+            assert "slow_copy" in plan.stdout
+
+            run = subprocess.run(
+                [sys.executable, "-m", "cli.main", "run", str(src), "--to", "text/plain",
+                 "--out", str(tmpdir / "out"), "--no-cache", "--jobs", "4"],
+                cwd=REPO_ROOT, env=env, capture_output=True, text=True, timeout=60,
+            )
+            assert run.returncode == 0, run.stdout + run.stderr
+            assert (tmpdir / "out" / "note.txt").read_text() == "hello"
+            # Settings of the daemon's own are not silently dropped
+            assert "--jobs ignored" in run.stdout, run.stdout
+        finally:
+            daemon.shutdown()
+
+
+if __name__ == "__main__":
+    test_submit_and_stream_progress()
+    test_cancel_queued_and_running_jobs()
+    test_handler_errors_are_replies()
+    test_cli_falls_back_when_daemon_hangs_up()
+    test_cli_uses_running_daemon()
+    print("All tests passed!")
@@ -1,5 +1,6 @@
 """Tests for MIME type detection."""
 import tempfile
+import threading
 import os
 from pathlib import Path
 import sys
@@ -7,7 +8,10 @@ import sys
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from file_converter.core.detect import sniff_mime
+from file_converter.core import detect
+from file_converter.core.detect import (
+    sniff_mime, sniff_many, sniff_batches, scan_files, MimeCache
+)
 
 
 def test_sniff_mime_text_file():
@@ -53,8 +57,85 @@ def test_sniff_mime_nonexistent_file():
         pass
 
 
+def test_sniff_many_uses_persistent_cache():
+    """Test batch detection, and that a fresh process reuses cached results."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+        paths = []
+        for i in range(20):
+            path = tmpdir / f"note_{i}.md"
+            path.write_text(f"# Note {i}\n")
+            paths.append(str(path))
+        (tmpdir / "empty.gif").write_bytes(b"")
+        paths += [str(tmpdir / "empty.gif"), str(tmpdir / "missing.txt")]
+
+        cache_file = tmpdir / "mime.json"
+        results = sniff_many(paths, cache=MimeCache(cache_file))
+
+        assert str(tmpdir / "missing.txt") not in results
+        assert str(tmpdir / "empty.gif") in results  # Empty files can't be mapped
+        assert all(results[p].startswith("text/") for p in paths[:20])
+
+        # A new cache instance answers from disk without sniffing
+        original = detect._detect
+        detect._detect = lambda path: "should/not-run"
+        try:
+            again = sniff_many(paths, cache=MimeCache(cache_file))
+        finally:
+            detect._detect = original
+        assert again == results
+
+        # A changed file is sniffed again
+        Path(paths[0]).write_text("<html><body>changed</body></html>" * 10)
+        changed = sniff_many(paths[:1], cache=MimeCache(cache_file))
+        assert changed[paths[0]] == "text/html"
+
+
+def test_sniff_batches_walks_tree_in_growing_batches():
+    """Test that a directory tree is scanned and streamed in batches."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+        for i in range(100):
+            folder = tmpdir / "tree" / f"dir_{i % 3}"
+            folder.mkdir(parents=True, exist_ok=True)
+            (folder / f"note_{i:03d}.txt").write_text(f"note {i}")
+        (tmpdir / "tree" / ".hidden").write_text("skip me")
+        single = tmpdir / "single.txt"
+        single.write_text("single")
+
+        batches = list(sniff_batches([str(single), str(tmpdir / "tree")],
+                                     batch_size=64, cache=MimeCache(tmpdir / "mime.json")))
+
+        assert [len(b) for b in batches] == [32, 64, 5]
+        paths = [p for batch in batches for p in batch]
+        assert paths[0] == str(single)
+        assert paths[1].endswith("dir_0/note_000.txt")
+        assert not any(".hidden" in p for p in paths)
+        assert (tmpdir / "mime.json").exists()
+
+
+def test_scan_files_stops_when_cancelled():
+    """Test that setting the cancel event stops a directory walk."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for i in range(10):
+            folder = Path(tmpdir) / f"dir_{i}"
+            folder.mkdir()
+            (folder / "file.txt").write_text("x")
+
+        cancel = threading.Event()
+        found = []
+        for path in scan_files([tmpdir], cancel):
+            found.append(path)
+            cancel.set()
+
+        assert len(found) == 1
+
+
 if __name__ == "__main__":
     test_sniff_mime_text_file()
     test_sniff_mime_extension_fallback()
     test_sniff_mime_nonexistent_file()
+    test_sniff_many_uses_persistent_cache()
+    test_sniff_batches_walks_tree_in_growing_batches()
+    test_scan_files_stops_when_cancelled()
     print("All tests passed!")
@@ -0,0 +1,342 @@
+"""Tests for the conversion engine."""
+import gzip
+import json
+import os
+import time
+from pathlib import Path
+import sys
+
+# Add src and the shared test fakes to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from file_converter.core.registry import Registry
+from file_converter.core.jobs import Job, JobStore, Status, LOG_TAIL_LINES
+from file_converter.core.engine import (
+    run_batch, estimate_job_weight, plan_and_run, plan_and_run_multi, _resolve_options
+)
+from file_converter.core.cache import ConversionCache
+from fakes import add_plugin, make_registry, temp_dir
+
+
+def make_copy_registry(tmpdir: Path) -> Registry:
+    """Create a registry holding a fake plugin that copies text files."""
+    add_plugin(tmpdir / "plugins", "fake_copy", outputs=["text/plain", "text/html"],
+               multi=True)
+    return make_registry(tmpdir)
+
+
+def make_jobs(tmpdir: Path, count: int, **options) -> list[Job]:
+    """Create text-to-text jobs over distinct source files."""
+    jobs = []
+    for i in range(count):
+        src = tmpdir / f"src_{i}" / "input.md"
+        src.parent.mkdir()
+        src.write_text(f"file {i}")
+        jobs.append(Job(
+            id=f"job-{i}",
+            src_path=str(src),
+            src_mime="text/markdown",
+            dst_mime="text/plain",
+            options=dict(options),
+        ))
+    return jobs
+
+
+def test_run_batch_parallel_speedup():
+    """Test that a worker pool runs jobs concurrently."""
+    with temp_dir() as tmpdir:
+        tmpdir = Path(tmpdir)
+        registry = make_copy_registry(tmpdir)
+        jobs = make_jobs(tmpdir, 8, delay=0.2)
+
+        start = time.monotonic()
+        run_batch(jobs, registry, {}, str(tmpdir / "out"), max_workers=8)
+        elapsed = time.monotonic() - start
+
+        assert all(j.status == Status.DONE.value for j in jobs), [j.logs for j in jobs]
+        assert elapsed < 1.0, f"Batch took {elapsed:.2f}s, expected parallel execution"
+
+
+def test_run_batch_unique_outputs_and_ordered_updates():
+    """Test parallel jobs get distinct output names and in-order updates."""
+    with temp_dir() as tmpdir:
+        tmpdir = Path(tmpdir)
+        registry = make_copy_registry(tmpdir)
+        jobs = make_jobs(tmpdir, 6, delay=0.05)
+
+        updates = {job.id: [] for job in jobs}
+
+        def on_update(job):
+            updates[job.id].append((job.status, job.progress))
+
+        run_batch(jobs, registry, {}, str(tmpdir / "out"), on_update, max_workers=3)
+
+        outputs = {job.output_path for job in jobs}
+        assert len(outputs) == len(jobs), "Parallel jobs shared an output path"
+
+        for history in updates.values():
+            assert history[0][0] == Status.RUNNING.value
+            assert history[-1] == (Status.DONE.value, 1.0)
+            progress = [p for _, p in history]
+            assert progress == sorted(progress)
+
+
+def test_estimate_job_weight_orders_by_cost():
+    """Test that heavy video encodes outweigh audio extraction."""
+    audio = Job(id="a", src_path="/missing.mkv", src_mime="video/x-matroska",
+                dst_mime="audio/mp3")
+    fast = Job(id="b", src_path="/missing.mkv", src_mime="video/x-matroska",
+               dst_mime="video/mp4", options={"preset": "ultrafast", "scale": "1280:720"})
+    slow = Job(id="c", src_path="/missing.mkv", src_mime="video/x-matroska",
+               dst_mime="video/mp4", options={"preset": "slow", "scale": "3840:2160"})
+
+    weights = [estimate_job_weight(j, {}) for j in (audio, fast, slow)]
+
+    assert weights[0].threads == 1
+    assert weights[0].threads < weights[1].threads < weights[2].threads
+    assert weights[0].cpu_seconds < weights[1].cpu_seconds < weights[2].cpu_seconds
+
+    # A segmented encode claims the whole CPU
+    segmented = Job(id="d", src_path="/missing.mkv", src_mime="video/x-matroska",
+                    dst_mime="video/mp4", options={"scale": "1280:720", "segments": 4})
+    assert estimate_job_weight(segmented, {}).threads == max(weights[1].threads,
+                                                             os.cpu_count() or 1)
+
+
+def test_preset_option_resolution():
+    """Test that only encoder speed presets pass through when not a named preset."""
+    presets = {"video/mp4": {"web_1080p": {"crf": 23, "scale": "1920:-2"}}}
+
+    def resolve(dst_mime: str, **options) -> dict:
+        job = Job(id="p", src_path="/in.mkv", src_mime="video/x-matroska",
+                  dst_mime=dst_mime, options=options)
+        return _resolve_options(job, presets)
+
+    # A named preset is expanded; explicit options win
+    assert resolve("video/mp4", preset="web_1080p", crf=20) == {"crf": 20, "scale": "1920:-2"}
+    # A named preset missing for another target is dropped, as it always was
+    assert resolve("video/webm", preset="web_1080p") == {}
+    # An encoder speed preset reaches the plugin
+    assert resolve("video/mp4", preset="slow") == {"preset": "slow"}
+    assert resolve("video/webm", preset="veryfast", crf=30) == {"preset": "veryfast", "crf": 30}
+
+
+def test_run_batch_respects_thread_budget():
+    """Test that packing never runs more weight than the thread budget."""
+    with temp_dir() as tmpdir:
+        tmpdir = Path(tmpdir)
+        registry = make_copy_registry(tmpdir)
+        jobs = make_jobs(tmpdir, 6, delay=0.1)
+
+        running = set()
+        peak = [0]
+
+        def on_update(job):
+            if job.status == Status.RUNNING.value:
+                running.add(job.id)
+            else:
+                running.discard(job.id)
+            peak[0] = max(peak[0], len(running))
+
+        run_batch(jobs, registry, {}, str(tmpdir / "out"), on_update, thread_budget=2)
+
+        assert all(j.status == Status.DONE.value for j in jobs)
+        assert peak[0] == 2
+
+
+def test_plan_and_run_reuses_cached_output():
+    """Test that repeating a conversion reuses the cached output."""
+    with temp_dir() as tmpdir:
+        tmpdir = Path(tmpdir)
+        registry = make_copy_registry(tmpdir)
+        cache = ConversionCache(tmpdir / "cache")
+        out_dir = str(tmpdir / "out")
+
+        first = make_jobs(tmpdir, 1)[0]
+        plan_and_run(first, registry, {}, out_dir, cache=cache)
+        assert first.status == Status.DONE.value
+
+        # Same conversion again: no new output file, nothing re-run
+        again = Job(id="again", src_path=first.src_path, src_mime=first.src_mime,
+                    dst_mime=first.dst_mime)
+        plan_and_run(again, registry, {}, out_dir, cache=cache)
+        assert again.status == Status.DONE.value
+        assert again.output_path == first.output_path
+        assert any("Reused output" in line for line in again.logs)
+
+        # Output removed: it is restored from the cache
+        Path(first.output_path).unlink()
+        restored = Job(id="restored", src_path=first.src_path, src_mime=first.src_mime,
+                       dst_mime=first.dst_mime)
+        plan_and_run(restored, registry, {}, out_dir, cache=cache)
+        assert Path(restored.output_path).read_text() == "file 0"
+        assert any("Reused output" in line for line in restored.logs)
+
+
+def test_run_batch_shares_one_run_per_source():
+    """Test that several targets of one source run as one multi-output run."""
+    with temp_dir() as tmpdir:
+        tmpdir = Path(tmpdir)
+        registry = make_copy_registry(tmpdir)
+        source = make_jobs(tmpdir, 1)[0]
+        jobs = [
+            Job(id=f"multi-{i}", src_path=source.src_path, src_mime="text/markdown",
+                dst_mime=dst_mime)
+            for i, dst_mime in enumerate(["text/plain", "text/html", "text/plain"])
+        ]
+        (tmpdir / "other").mkdir()
+        other = make_jobs(tmpdir / "other", 1)[0]
+
+        run_batch(jobs + [other], registry, {}, str(tmpdir / "out"), max_workers=2)
+
+        for job in jobs:
+            assert job.status == Status.DONE.value, job.logs
+            assert any("single run for 3 outputs" in line for line in job.logs)
+            assert Path(job.output_path).read_text() == "file 0"
+        assert len({job.output_path for job in jobs}) == 3
+        assert not any("single run" in line for line in other.logs)
+
+        # One job report per target, not one per source
+        for job in jobs:
+            report_path = Path(job.output_path + "_job_report.json")
+            assert json.loads(report_path.read_text())["job_id"] == job.id
+
+
+def test_plan_and_run_multi_isolates_failures():
+    """Test that a job without a route fails alone."""
+    with temp_dir() as tmpdir:
+        tmpdir = Path(tmpdir)
+        registry = make_copy_registry(tmpdir)
+        good = make_jobs(tmpdir, 1)[0]
+        bad = Job(id="bad", src_path=good.src_path, src_mime="text/markdown",
+                  dst_mime="video/mp4")
+
+        plan_and_run_multi([good, bad], registry, {}, str(tmpdir / "out"))
+
+        assert good.status == Status.DONE.value
+        assert bad.status == Status.ERROR.value
+
+
+def test_failed_shared_run_retries_each_output():
+    """Test that one bad target of a shared run doesn't fail its siblings."""
+    with temp_dir() as tmpdir:
+        tmpdir = Path(tmpdir)
+        registry = make_copy_registry(tmpdir)
+        source = make_jobs(tmpdir, 1)[0]
+        jobs = [
+            Job(id=f"multi-{i}", src_path=source.src_path, src_mime="text/markdown",
+                dst_mime=dst_mime, options=options)
+            for i, (dst_mime, options) in enumerate([
+                ("text/plain", {}), ("text/html", {"fail": True}), ("text/html", {}),
+            ])
+        ]
+
+        plan_and_run_multi(jobs, registry, {}, str(tmpdir / "out"))
+
+        good = [jobs[0], jobs[2]]
+        for job in good:
+            assert job.status == Status.DONE.value, job.logs
+            assert any("converting this output alone" in line for line in job.logs)
+            assert Path(job.output_path).read_text() == "file 0"
+        assert jobs[1].status == Status.ERROR.value
+        assert "bad output options" in jobs[1].logs[-1]
+
+
+def test_cancelled_jobs_are_skipped():
+    """Test that a job cancelled before its run starts is left as it is."""
+    with temp_dir() as tmpdir:
+        tmpdir = Path(tmpdir)
+        registry = make_copy_registry(tmpdir)
+        source = make_jobs(tmpdir, 1)[0]
+        kept, cancelled = [
+            Job(id=f"job-{dst_mime}", src_path=source.src_path,
+                src_mime="text/markdown", dst_mime=dst_mime)
+            for dst_mime in ("text/plain", "text/html")
+        ]
+        cancelled.add_log("Cancelled")
+        cancelled.set_status(Status.ERROR)
+
+        plan_and_run_multi([kept, cancelled], registry, {}, str(tmpdir / "out"))
+
+        assert kept.status == Status.DONE.value, kept.logs
+        assert cancelled.status == Status.ERROR.value
+        assert list(cancelled.logs) == ["Cancelled"]
+        assert cancelled.output_path is None
+
+
+def test_run_batch_takes_queued_jobs_from_store():
+    """Test that run_batch runs a JobStore's queued jobs and keeps its counts."""
+    with temp_dir() as tmpdir:
+        tmpdir = Path(tmpdir)
+        registry = make_copy_registry(tmpdir)
+        store = JobStore(make_jobs(tmpdir, 4))
+        store.get("job-0").set_status(Status.ERROR)
+
+        run_batch(store, registry, {}, str(tmpdir / "out"), max_workers=2)
+
+        assert store.count(Status.DONE) == 3
+        assert store.count(Status.ERROR) == 1
+        assert store.get("job-0").output_path is None
+
+
+def test_registry_index_caches_availability():
+    """Test that route lookups use the index and check availability once."""
+    with temp_dir() as tmpdir:
+        registry = make_copy_registry(Path(tmpdir))
+        plugin = registry.plugins[0]
+        calls = []
+        plugin.module.available = lambda: calls.append(1) or True
+
+        for _ in range(1000):
+            assert registry.get_plugin_for_conversion("text/markdown", "text/html") is plugin
+        assert registry.get_plugin_for_conversion("text/markdown", "video/mp4") is None
+        assert registry.get_plugin_for_conversion("video/mp4", "text/html") is None
+        assert registry.get_supported_outputs("text/x-rst") == ["text/html", "text/plain"]
+        assert registry.get_all_input_formats() == ["text/*"]
+        assert len(calls) == 1
+
+        # A refresh re-checks availability
+        plugin.module.available = lambda: False
+        registry.refresh()
+        assert registry.get_plugin_for_conversion("text/markdown", "text/html") is None
+        assert registry.get_all_output_formats() == []
+
+
+def test_job_logs_are_bounded_and_spilled():
+    """Test that only a log tail stays in memory while the full log goes to disk."""
+    with temp_dir() as tmpdir:
+        tmpdir = Path(tmpdir)
+        registry = make_copy_registry(tmpdir)
+        job = make_jobs(tmpdir, 1)[0]
+        job.log_path = str(tmpdir / "logs" / f"{job.id}.log.gz")
+
+        for i in range(1000):
+            job.add_log(f"line {i}")
+        plan_and_run(job, registry, {}, str(tmpdir / "out"))
+
+        assert job.status == Status.DONE.value
+        assert len(job.logs) == LOG_TAIL_LINES
+        assert job.logs[-1].startswith("Conversion completed")
+
+        with gzip.open(job.log_path, 'rt') as f:
+            full_log = f.read().splitlines()
+        assert full_log[:2] == ["line 0", "line 1"]
+        assert len(full_log) == 1000 + len([l for l in job.logs if not l.startswith("line ")])
+
+
+if __name__ == "__main__":
+    test_run_batch_parallel_speedup()
+    test_run_batch_unique_outputs_and_ordered_updates()
+    test_estimate_job_weight_orders_by_cost()
+    test_preset_option_resolution()
+    test_run_batch_respects_thread_budget()
+    test_plan_and_run_reuses_cached_output()
+    test_run_batch_shares_one_run_per_source()
+    test_plan_and_run_multi_isolates_failures()
+    test_failed_shared_run_retries_each_output()
+    test_cancelled_jobs_are_skipped()
+    test_run_batch_takes_queued_jobs_from_store()
+    test_registry_index_caches_availability()
+    test_job_logs_are_bounded_and_spilled()
+    print("All tests passed!")
@@ -1,18 +1,19 @@
 """Tests for FFmpeg video plugin."""
-import tempfile
 import os
 import shutil
 import subprocess
 from pathlib import Path
 import sys
 
-# Add src to path
+# Add src and the shared test fakes to path
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
 
 from file_converter.core.registry import Registry
 from file_converter.core.jobs import Job, Status
 from file_converter.core.engine import plan_and_run
 from file_converter.core.presets import load_defaults
+from fakes import temp_dir
 
 
 def has_ffmpeg():
@@ -67,7 +68,7 @@ def test_conversion_wav_to_mp3():
         return
     
     # Create test file
-    with tempfile.TemporaryDirectory() as tmpdir:
+    with temp_dir() as tmpdir:
         tmpdir = Path(tmpdir)
         input_file = tmpdir / "test_input.wav"
         
@@ -78,7 +79,7 @@ def test_conversion_wav_to_mp3():
         assert input_file.exists(), "Test file was not created"
         
         # Set up conversion
-        registry = Registry()
+        registry = Registry(manifest_cache_file=tmpdir / "manifests.json")
         plugin_dir = Path(__file__).parent.parent / "src" / "file_converter" / "plugins"
         registry.load_plugins(plugin_dir)
         
@@ -106,7 +107,229 @@ def test_conversion_wav_to_mp3():
         print(f"✓ Conversion successful: {output_file.name} ({output_file.stat().st_size} bytes)")
 
 
+def load_plugin_module():
+    """Load the ffmpeg plugin module (does not require ffmpeg itself)."""
+    registry = Registry()
+    plugin_dir = Path(__file__).parent.parent / "src" / "file_converter" / "plugins"
+    registry.load_plugins(plugin_dir)
+    return next(p for p in registry.plugins if p.name == "ffmpeg_video").module
+
+
+def test_segment_count():
+    """Test that sources are split only when asked, into pieces of at least a minute."""
+    plugin = load_plugin_module()
+    
+    short = {"format": {"duration": "30.0"}}
+    long = {"format": {"duration": "7200.0"}}
+    
+    assert plugin._segment_count(short, {}) == 1
+    assert plugin._segment_count(long, {}) == 1  # Opt-in only
+    assert plugin._segment_count({}, {"segments": 4}) == 1  # Unknown duration
+    assert plugin._segment_count(long, {"segments": 8}) == 8
+    assert plugin._segment_count(long, {"segments": 1}) == 1
+    # Segments never get shorter than SEGMENT_MIN_LENGTH
+    assert plugin._segment_count({"format": {"duration": "180.0"}}, {"segments": 8}) == 3
+
+
+def test_segmented_mux_keeps_other_streams():
+    """Test that a segmented encode maps the streams it doesn't encode from the source."""
+    plugin = load_plugin_module()
+    
+    info = {"streams": [
+        {"index": 0, "codec_type": "video", "codec_name": "h264"},
+        {"index": 1, "codec_type": "audio", "codec_name": "aac"},
+        {"index": 2, "codec_type": "video", "codec_name": "mjpeg"},
+        {"index": 3, "codec_type": "subtitle", "codec_name": "subrip"},
+        {"index": 4, "codec_type": "subtitle", "codec_name": "hdmv_pgs_subtitle"},
+        {"index": 5, "codec_type": "data", "codec_name": "bin_data"},
+    ]}
+    
+    maps, codec_args = plugin._extra_stream_maps(info, "video/mp4", 2)
+    assert maps == ["-map", "2:2", "-map", "2:3", "-map", "2:5"]
+    assert codec_args == ["-c:s", "mov_text"]
+    
+    maps, codec_args = plugin._extra_stream_maps(info, "video/webm", 1)
+    assert maps == ["-map", "1:2", "-map", "1:3"]
+    assert codec_args == ["-c:s", "webvtt"]
+    
+    assert plugin._extra_stream_maps({"streams": info["streams"][:2]}, "video/mp4", 2) == ([], [])
+
+
+def test_segment_progress_aggregates_time():
+    """Test that per-segment progress events are summed into one event."""
+    from file_converter.core.progress import ProgressEvent
+    
+    plugin = load_plugin_module()
+    
+    items = []
+    progress = plugin._SegmentProgress(2, items.append)
+    progress.callback(0)(ProgressEvent(out_time=60.0, fps=50.0, speed=2.0, total_size=1000))
+    progress.callback(1)(ProgressEvent(out_time=30.5, fps=40.0, speed=1.5, total_size=500))
+    progress.callback(1)("Stream mapping:")
+    progress.callback()(ProgressEvent(out_time=600.0))  # Audio track, not counted
+    
+    assert items[0].out_time == 60.0
+    assert items[1] == ProgressEvent(out_time=90.5, fps=90.0, speed=3.5, total_size=1500)
+    assert items[2:] == ["[segment 1] Stream mapping:"]
+
+
+def test_segmented_webm_conversion():
+    """Test that a segmented encode produces one playable output."""
+    if not has_ffmpeg():
+        print("SKIP: ffmpeg not available")
+        return
+    
+    plugin = load_plugin_module()
+    
+    with temp_dir() as tmpdir:
+        tmpdir = Path(tmpdir)
+        src = tmpdir / "input.mkv"
+        subprocess.run(
+            ["ffmpeg", "-f", "lavfi", "-i", "testsrc=duration=6:size=160x120:rate=10",
+             "-f", "lavfi", "-i", "sine=duration=6", "-g", "10", "-y", str(src)],
+            capture_output=True, timeout=30, check=True
+        )
+        
+        original = plugin.SEGMENT_MIN_LENGTH
+        plugin.SEGMENT_MIN_LENGTH = 1.0
+        try:
+            dst = tmpdir / "output.webm"
+            plugin.run(str(src), str(dst), "video/webm", {"segments": 3}, lambda x: None)
+        finally:
+            plugin.SEGMENT_MIN_LENGTH = original
+        
+        assert dst.exists() and dst.stat().st_size > 0
+        assert plugin._duration(plugin._probe(str(dst))) > 5.0
+        # Work directory is cleaned up
+        assert sorted(p.name for p in tmpdir.iterdir()) == ["input.mkv", "output.webm"]
+
+
+def test_stream_copy_when_codecs_match():
+    """Test that matching codecs are remuxed instead of re-encoded."""
+    plugin = load_plugin_module()
+    
+    mkv = {"streams": [
+        {"codec_type": "video", "codec_name": "h264"},
+        {"codec_type": "audio", "codec_name": "aac"},
+        {"codec_type": "video", "codec_name": "mjpeg", "disposition": {"attached_pic": 1}},
+    ]}
+    
+    assert plugin._copyable_streams(mkv, "video/mp4", {}) == {"video", "audio"}
+    assert plugin._copyable_streams(mkv, "video/mp4", {"crf": 20}) == {"audio"}
+    assert plugin._copyable_streams(mkv, "video/mp4", {"scale": "1280:720"}) == {"audio"}
+    assert plugin._copyable_streams(mkv, "video/webm", {}) == set()
+    
+    cmd = plugin._build_mp4_command("in.mkv", "out.mp4", {}, {"video", "audio"})
+    assert cmd == ["ffmpeg", "-i", "in.mkv", "-y", "-c:v", "copy", "-c:a", "copy", "out.mp4"]
+    
+    cmd = plugin._build_mp4_command("in.mkv", "out.mp4", {"crf": 20}, {"audio"})
+    assert "libx264" in cmd
+    assert cmd[cmd.index("-c:a") + 1] == "copy"
+
+
+def test_plan_reports_remux_cost():
+    """Test that plan() reports a much lower cost for a pure remux."""
+    plugin = load_plugin_module()
+    
+    mkv = {"streams": [
+        {"codec_type": "video", "codec_name": "h264"},
+        {"codec_type": "audio", "codec_name": "aac"},
+    ]}
+    original = plugin._probe
+    plugin._probe = lambda path: mkv
+    try:
+        remux = plugin.plan("video/x-matroska", "video/mp4", "in.mkv", {})
+        audio_only = plugin.plan("video/x-matroska", "video/mp4", "in.mkv", {"crf": 20})
+        encode = plugin.plan("video/x-matroska", "video/webm", "in.mkv", {})
+    finally:
+        plugin._probe = original
+    
+    assert remux["stream_copy"] == ["audio", "video"]
+    assert remux["lossiness"] == "lossless"
+    assert remux["cost"] < audio_only["cost"] <= encode["cost"]
+    assert encode["stream_copy"] == []
+
+
+def test_run_multi_builds_one_command():
+    """Test that several outputs share one ffmpeg invocation."""
+    plugin = load_plugin_module()
+    
+    commands = []
+    original_run, original_probe = plugin._run_ffmpeg, plugin._probe
+    plugin._run_ffmpeg = lambda cmd, cb: commands.append(cmd)
+    plugin._probe = lambda path: {}
+    try:
+        plugin.run_multi("in.mkv", [
+            {"dst_path": "out.mp4", "dst_mime": "video/mp4", "opts": {"crf": 20}},
+            {"dst_path": "out.webm", "dst_mime": "video/webm", "opts": {}},
+            {"dst_path": "out.mp3", "dst_mime": "audio/mp3", "opts": {}},
+        ], lambda x: None)
+    finally:
+        plugin._run_ffmpeg, plugin._probe = original_run, original_probe
+    
+    assert len(commands) == 1
+    cmd = commands[0]
+    assert cmd.count("-i") == 1
+    assert cmd.index("libx264") < cmd.index("out.mp4") < cmd.index("libvpx-vp9")
+    assert cmd.index("out.webm") < cmd.index("libmp3lame") < cmd.index("out.mp3")
+
+
+def test_gif_command_is_single_pass():
+    """Test that GIF commands decode the source once and never share a palette file."""
+    plugin = load_plugin_module()
+    
+    cmd = plugin._build_gif_command("in.mp4", "out/anim.gif", {"fps": 10})
+    assert cmd.count("-i") == 1
+    assert "palettegen" in cmd[cmd.index("-filter_complex") + 1]
+    assert not any("palette.png" in arg for arg in cmd)
+    
+    cmd = plugin._build_gif_command("in.mp4", "out/anim.gif", {}, save_palette=Path("/p/x.png"))
+    assert cmd.count("-i") == 1
+    assert cmd[-1] == "/p/x.png" and "out/anim.gif" in cmd
+    
+    cmd = plugin._build_gif_command("in.mp4", "out/anim.gif", {}, palette=Path("/p/x.png"))
+    assert cmd.count("-i") == 2
+    assert "palettegen" not in " ".join(cmd)
+
+
+def test_gif_palette_path_is_keyed_and_private():
+    """Test that palettes are cached per source, fps and scale in a private dir."""
+    plugin = load_plugin_module()
+    
+    with temp_dir() as tmpdir:
+        src = Path(tmpdir) / "in.mp4"
+        src.write_bytes(b"\x00" * 100)
+        
+        path = plugin._palette_path(str(src), 12, "480:-1")
+        assert path is not None
+        assert path == plugin._palette_path(str(src), 12, "480:-1")
+        assert path != plugin._palette_path(str(src), 15, "480:-1")
+        assert path != plugin._palette_path(str(src), 12, "320:-1")
+        assert path.parent != src.parent
+        if hasattr(os, "getuid"):
+            assert path.parent.stat().st_mode & 0o077 == 0
+        
+        # Large sources are keyed by a sampled fingerprint, not a full read
+        modes = []
+        real_fingerprint = plugin.fingerprint
+        plugin.fingerprint = lambda path, mode="full": modes.append(mode) or "key"
+        try:
+            plugin._palette_path(str(src), 12, "480:-1")
+        finally:
+            plugin.fingerprint = real_fingerprint
+        assert modes == ["sampled"]
+
+
 if __name__ == "__main__":
     test_ffmpeg_plugin_available()
     test_conversion_wav_to_mp3()
+    test_segment_count()
+    test_segmented_mux_keeps_other_streams()
+    test_segment_progress_aggregates_time()
+    test_segmented_webm_conversion()
+    test_stream_copy_when_codecs_match()
+    test_plan_reports_remux_cost()
+    test_run_multi_builds_one_command()
+    test_gif_command_is_single_pass()
+    test_gif_palette_path_is_keyed_and_private()
     print("\nAll tests passed!")
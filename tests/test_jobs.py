@@ -0,0 +1,132 @@
+"""Tests for job data structures."""
+import gzip
+import json
+import tempfile
+import threading
+import tracemalloc
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from file_converter.core.jobs import Job, JobStore, Status
+from file_converter.core.engine import _write_job_report
+
+
+# Memory a queued job may take, not counting its own id and path strings
+JOB_MEMORY_TARGET = 256
+
+
+def make_job(i: int) -> Job:
+    """Create a queued job."""
+    return Job(id=f"job-{i}", src_path=f"/videos/{i}.mkv",
+               src_mime="video/x-matroska", dst_mime="video/mp4")
+
+
+def test_job_store_buckets_follow_status():
+    """Test lookup, ordering and live status counts."""
+    store = JobStore(make_job(i) for i in range(5))
+
+    assert len(store) == 5
+    assert store.get("job-3").src_path == "/videos/3.mkv"
+    assert [j.id for j in store.page(1, 2)] == ["job-1", "job-2"]
+    assert store.count(Status.QUEUED) == 5
+
+    store.get("job-1").set_status(Status.RUNNING)
+    store.get("job-1").set_status(Status.DONE)
+    store.get("job-4").set_status(Status.ERROR)
+    assert store.counts() == {"queued": 3, "running": 0, "done": 1, "error": 1}
+    assert [j.id for j in store.with_status(Status.QUEUED)] == ["job-0", "job-2", "job-3"]
+
+    assert store.remove_status(Status.DONE, Status.ERROR) == 2
+    assert [j.id for j in store] == ["job-0", "job-2", "job-3"]
+
+    # A removed job no longer affects the counts
+    removed = store.remove("job-0")
+    removed.set_status(Status.RUNNING)
+    assert store.count(Status.RUNNING) == 0
+    assert removed not in store
+
+
+def test_job_memory_per_job():
+    """Test that a queued job with common options stays under the memory target."""
+    count = 20000
+    ids = [f"{i:08x}-0000-4000-8000-000000000000" for i in range(count)]
+    paths = [f"/videos/clip_{i:06d}.mkv" for i in range(count)]
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        jobs = [
+            Job(id=ids[i], src_path=paths[i], src_mime="video/x-matroska",
+                dst_mime="video/mp4", options={"crf": 23, "preset": "veryfast"})
+            for i in range(count)
+        ]
+        per_job = (tracemalloc.get_traced_memory()[0] - before) / count
+    finally:
+        tracemalloc.stop()
+
+    assert per_job < JOB_MEMORY_TARGET, f"{per_job:.0f} bytes per job"
+    # Equal options are stored once
+    assert jobs[0].options is jobs[-1].options
+
+
+def test_job_report_is_plain_json():
+    """Test that job reports still serialize status and options as plain data."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        output = Path(tmpdir) / "clip.mp4"
+        job = Job(id="r", src_path="/videos/clip.mkv", src_mime="video/x-matroska",
+                  dst_mime="video/mp4", options={"crf": 23}, output_path=str(output))
+        job.set_status(Status.DONE)
+
+        _write_job_report(job, output)
+        report = json.loads((Path(tmpdir) / "clip.mp4_job_report.json").read_text())
+
+    assert report == {
+        "job_id": "r",
+        "src_path": "/videos/clip.mkv",
+        "src_mime": "video/x-matroska",
+        "dst_mime": "video/mp4",
+        "output_path": str(output),
+        "status": "done",
+        "options": {"crf": 23},
+    }
+
+
+def test_jobs_spill_logs_under_their_own_locks():
+    """Test that jobs logging from several threads each get a complete log file."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        jobs = [make_job(i) for i in range(8)]
+        for job in jobs:
+            job.log_path = str(Path(tmpdir) / f"{job.id}.log.gz")
+
+        def spill(job: Job) -> None:
+            for line in range(500):
+                job.add_log(f"{job.id} line {line}")
+            job.close_log()
+
+        threads = [threading.Thread(target=spill, args=(job,)) for job in jobs]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len({id(job._log_lock) for job in jobs}) == len(jobs)
+        for job in jobs:
+            with gzip.open(job.log_path, "rt", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+            assert lines == [f"{job.id} line {line}" for line in range(500)]
+
+    # A job that never spilled has no lock to close under
+    idle = make_job(99)
+    idle.close_log()
+    assert idle._log_lock is None
+
+
+if __name__ == "__main__":
+    test_job_store_buckets_follow_status()
+    test_job_memory_per_job()
+    test_job_report_is_plain_json()
+    test_jobs_spill_logs_under_their_own_locks()
+    print("All tests passed!")
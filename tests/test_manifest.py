@@ -0,0 +1,81 @@
+"""Tests for manifest-driven batch runs."""
+import threading
+from pathlib import Path
+import sys
+
+# Add src and the shared test fakes to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from file_converter.core.jobs import Job, Status
+from file_converter.core.manifest import read_manifest, result_record
+from file_converter.core.engine import run_stream
+from fakes import add_plugin, make_registry, temp_dir
+
+
+def test_read_manifest_jsonl_and_csv():
+    """Test that both formats give the same jobs and bad records become failed jobs."""
+    with temp_dir() as tmpdir:
+        tmpdir = Path(tmpdir)
+        jsonl = tmpdir / "jobs.jsonl"
+        jsonl.write_text(
+            '{"src": "a.mkv", "dst_mime": "video/mp4", "preset": "web_720p", '
+            '"options": {"crf": 20}}\n'
+            '\n'
+            '{"src": "b.mkv"}\n'
+            'not json\n'
+        )
+        csv_file = tmpdir / "jobs.csv"
+        csv_file.write_text(
+            'src,dst_mime,preset,crf,options\n'
+            'a.mkv,video/mp4,web_720p,20,\n'
+        )
+
+        jobs = list(read_manifest(str(jsonl)))
+        assert [j.id for j in jobs] == ["1", "3", "4"]
+        assert dict(jobs[0].options) == {"crf": 20, "preset": "web_720p"}
+        assert jobs[0].src_mime == "" and jobs[0].status == Status.QUEUED.value
+        assert jobs[1].status == jobs[2].status == Status.ERROR.value
+        assert "missing dst_mime" in jobs[1].logs[-1]
+
+        (row,) = read_manifest(str(csv_file))
+        assert (row.src_path, row.dst_mime) == ("a.mkv", "video/mp4")
+        assert row.options == jobs[0].options
+
+
+def test_run_stream_bounds_in_flight_jobs():
+    """Test that jobs are pulled lazily and yielded as each one finishes."""
+    with temp_dir() as tmpdir:
+        tmpdir = Path(tmpdir)
+        add_plugin(tmpdir / "plugins", "copy_text")
+        registry = make_registry(tmpdir)
+        src = tmpdir / "note.txt"
+        src.write_text("hello")
+
+        pulled = [0]
+        lock = threading.Lock()
+
+        def jobs():
+            for i in range(20):
+                with lock:
+                    pulled[0] += 1
+                yield Job(id=str(i), src_path=str(src), src_mime="text/plain",
+                          dst_mime="text/plain", options={"delay": 0.02})
+
+        results = []
+        for job, elapsed in run_stream(jobs(), registry, {}, str(tmpdir / "out"),
+                                       max_workers=2, max_in_flight=4):
+            # Never more than max_in_flight jobs read ahead of the results
+            assert pulled[0] - len(results) <= 4
+            results.append(result_record(job, elapsed))
+
+        assert len(results) == 20
+        assert all(r["status"] == "done" for r in results), results
+        assert len({r["output_path"] for r in results}) == 20
+        assert all(r["elapsed"] > 0 for r in results)
+
+
+if __name__ == "__main__":
+    test_read_manifest_jsonl_and_csv()
+    test_run_stream_bounds_in_flight_jobs()
+    print("All tests passed!")
@@ -0,0 +1,150 @@
+"""Tests for conversion route planning."""
+from pathlib import Path
+import sys
+
+# Add src and the shared test fakes to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from file_converter.core.registry import Registry
+from file_converter.core.jobs import Job, Status
+from file_converter.core.planner import plan_conversion, find_route
+from file_converter.core.engine import plan_and_run
+from fakes import add_plugin, make_registry, temp_dir
+
+
+def make_route_registry(tmpdir: Path) -> Registry:
+    """
+    Registry where markdown reaches x-upper directly (lossy) or via HTML
+    (lossless), and HTML can be re-encoded as HTML.
+    """
+    plugin_root = tmpdir / "plugins"
+    add_plugin(plugin_root, "html_tidy", ["text/html"], ["text/html"],
+               "text.strip()", cost=1.0, lossiness="lossless")
+    add_plugin(plugin_root, "md_to_html", ["text/markdown"], ["text/html"],
+               "'<p>' + text + '</p>'", cost=1.0, lossiness="lossless")
+    add_plugin(plugin_root, "html_to_upper", ["text/html"], ["application/x-upper"],
+               "text.upper()", cost=1.0, lossiness="lossless")
+    add_plugin(plugin_root, "lossy_upper", ["text/markdown"], ["application/x-upper"],
+               "text.upper()[:3]", cost=0.5, lossiness="lossy")
+    return make_registry(tmpdir)
+
+
+def test_route_prefers_lossless_chain():
+    """Test that a lossless two-hop chain beats a cheaper lossy direct hop."""
+    with temp_dir() as tmpdir:
+        registry = make_route_registry(Path(tmpdir))
+
+        route = find_route("text/markdown", "application/x-upper", registry)
+        assert [(p.name, src, dst) for p, src, dst in route] == [
+            ("md_to_html", "text/markdown", "text/html"),
+            ("html_to_upper", "text/html", "application/x-upper"),
+        ]
+
+        route = find_route("text/markdown", "text/html", registry)
+        assert [p.name for p, _, _ in route] == ["md_to_html"]
+
+        assert find_route("application/x-upper", "text/html", registry) is None
+
+        # Same type: one direct run of a plugin mapping the type to itself
+        route = find_route("text/html", "text/html", registry)
+        assert [(p.name, src, dst) for p, src, dst in route] == [
+            ("html_tidy", "text/html", "text/html"),
+        ]
+
+        # Same type without such a plugin: no route, never an empty or round-trip one
+        assert find_route("text/markdown", "text/markdown", registry) is None
+
+
+def test_edge_weighs_every_plugin_for_a_conversion():
+    """Test that a later lossless plugin beats an earlier lossy one for the same hop."""
+    with temp_dir() as tmpdir:
+        tmpdir = Path(tmpdir)
+        plugin_root = tmpdir / "plugins"
+        # Loaded in name order, so the lossy plugin comes first
+        add_plugin(plugin_root, "a_lossy_html", ["text/markdown"], ["text/html"],
+                   "text[:3]", cost=0.5, lossiness="lossy")
+        add_plugin(plugin_root, "b_lossless_html", ["text/markdown"], ["text/html"],
+                   "'<p>' + text + '</p>'", cost=1.0, lossiness="lossless")
+        add_plugin(plugin_root, "c_cheap_html", ["text/markdown"], ["text/html"],
+                   "text", cost=0.2, lossiness="lossless")
+        registry = make_registry(tmpdir)
+
+        route = find_route("text/markdown", "text/html", registry)
+        assert [p.name for p, _, _ in route] == ["c_cheap_html"]
+
+
+def test_plugins_load_lazily_from_manifests():
+    """Test that routing by manifest cost and lossiness never imports a plugin."""
+    with temp_dir() as tmpdir:
+        tmpdir = Path(tmpdir)
+        plugin_root = tmpdir / "plugins"
+        add_plugin(plugin_root, "md_to_html", ["text/markdown"], ["text/html"],
+                   "'<p>' + text + '</p>'", cost=1.0, lossiness="lossless")
+        toml_file = plugin_root / "md_to_html" / "plugin.toml"
+        toml_file.write_text(toml_file.read_text() + 'cost = 1.0\nlossiness = "lossless"\n')
+        cache_file = tmpdir / "manifests.json"
+
+        registry = Registry(manifest_cache_file=cache_file)
+        registry.load_plugins(plugin_root)
+        plugin = registry.plugins[0]
+
+        route = find_route("text/markdown", "text/html", registry)
+        assert [p.name for p, _, _ in route] == ["md_to_html"]
+        assert registry.get_all_output_formats() == ["text/html"]
+        assert not plugin.loaded
+
+        # Parsed manifests are reused while the file is unchanged
+        assert cache_file.exists()
+        cached = Registry(manifest_cache_file=cache_file)
+        cached.load_plugins(plugin_root)
+        assert cached.plugins[0].config == plugin.config
+
+        # The module is imported once it has work to do
+        src = tmpdir / "note.md"
+        src.write_text("hi")
+        job = Job(id="lazy", src_path=str(src), src_mime="text/markdown",
+                  dst_mime="text/html")
+        plan_and_run(job, registry, {}, str(tmpdir / "out"))
+        assert job.status == Status.DONE.value, job.logs
+        assert plugin.loaded
+
+
+def test_multi_hop_plan_is_memoized_and_runs():
+    """Test a two-hop route through an intermediate format end to end."""
+    with temp_dir() as tmpdir:
+        tmpdir = Path(tmpdir)
+        plugin_root = tmpdir / "plugins"
+        add_plugin(plugin_root, "md_to_html", ["text/markdown"], ["text/html"],
+                   "'<p>' + text + '</p>'", cost=1.0, lossiness="lossless")
+        add_plugin(plugin_root, "html_to_pdf", ["text/html"], ["application/pdf"],
+                   "'PDF:' + text", cost=1.0, lossiness="lossy")
+        registry = make_registry(tmpdir)
+
+        plan = plan_conversion("text/markdown", "application/pdf", registry)
+        assert [step["plugin"].name for step in plan["steps"]] == ["md_to_html", "html_to_pdf"]
+        assert plan["plugin"].name == "html_to_pdf"
+
+        # Memoized until the registry changes
+        cached = registry.route_cache[("text/markdown", "application/pdf")]
+        assert find_route("text/markdown", "application/pdf", registry) is cached
+        registry.refresh()
+        assert ("text/markdown", "application/pdf") not in registry.route_cache
+
+        src = tmpdir / "note.md"
+        src.write_text("hello")
+        job = Job(id="chain", src_path=str(src), src_mime="text/markdown",
+                  dst_mime="application/pdf")
+        plan_and_run(job, registry, {}, str(tmpdir / "out"))
+
+        assert job.status == Status.DONE.value, job.logs
+        assert Path(job.output_path).read_text() == "PDF:<p>hello</p>"
+        assert any(line.startswith("[step 1/2] md_to_html ran") for line in job.logs)
+
+
+if __name__ == "__main__":
+    test_route_prefers_lossless_chain()
+    test_edge_weighs_every_plugin_for_a_conversion()
+    test_plugins_load_lazily_from_manifests()
+    test_multi_hop_plan_is_memoized_and_runs()
+    print("All tests passed!")
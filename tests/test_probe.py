@@ -0,0 +1,75 @@
+"""Tests for the media probe cache."""
+import os
+import tempfile
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from file_converter.core import probe as probe_module
+from file_converter.core.probe import MediaInfo, ProbeCache
+
+
+SAMPLE = MediaInfo(
+    format={"duration": "125.5"},
+    streams=[
+        {"codec_type": "video", "codec_name": "mjpeg", "disposition": {"attached_pic": 1}},
+        {"codec_type": "video", "codec_name": "h264", "width": 1920, "height": 1080,
+         "avg_frame_rate": "30000/1001"},
+        {"codec_type": "audio", "codec_name": "aac"},
+    ],
+)
+
+
+def test_media_info_fields():
+    """Test that MediaInfo exposes the fields the engine and plugins use."""
+    assert SAMPLE.duration == 125.5
+    assert SAMPLE.video_codec == "h264"
+    assert SAMPLE.audio_codec == "aac"
+    assert SAMPLE.resolution == (1920, 1080)
+    assert abs(SAMPLE.frame_rate - 29.97) < 0.01
+    assert MediaInfo().duration is None
+    assert MediaInfo().resolution is None
+
+
+def test_probe_runs_once_per_file_version():
+    """Test that ffprobe runs once per (path, size, mtime) across caches."""
+    calls = []
+
+    def fake_ffprobe(path):
+        calls.append(path)
+        return SAMPLE
+
+    original = probe_module._run_ffprobe
+    probe_module._run_ffprobe = fake_ffprobe
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            media = tmpdir / "clip.mkv"
+            media.write_bytes(b"\x00" * 64)
+
+            cache = ProbeCache(tmpdir / "cache")
+            assert cache.probe(str(media)) == SAMPLE
+            assert cache.probe(str(media)) == SAMPLE
+            assert len(calls) == 1
+
+            # A new cache (e.g. a new process) reads the on-disk entry
+            assert ProbeCache(tmpdir / "cache").probe(str(media)) == SAMPLE
+            assert len(calls) == 1
+
+            # Changing the file invalidates the entry
+            media.write_bytes(b"\x00" * 128)
+            os.utime(media, ns=(0, 10**9))
+            assert cache.probe(str(media)) == SAMPLE
+            assert len(calls) == 2
+
+            assert cache.probe(str(tmpdir / "missing.mkv")) is None
+    finally:
+        probe_module._run_ffprobe = original
+
+
+if __name__ == "__main__":
+    test_media_info_fields()
+    test_probe_runs_once_per_file_version()
+    print("All tests passed!")
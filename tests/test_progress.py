@@ -0,0 +1,64 @@
+"""Tests for structured progress parsing."""
+from pathlib import Path
+import sys
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from file_converter.core.progress import ProgressEvent, ProgressParser
+from file_converter.core.engine import _complete_progress_event
+
+
+PROGRESS_OUTPUT = """\
+frame=120
+fps=59.94
+bitrate= 812.3kbits/s
+total_size=262144
+out_time_us=4000000
+out_time_ms=4000000
+out_time=00:00:04.000000
+dup_frames=0
+drop_frames=0
+speed=1.98x
+progress=continue
+frame=240
+fps=N/A
+total_size=N/A
+out_time=00:00:08.500000
+speed=N/A
+progress=end
+"""
+
+
+def test_parser_assembles_blocks():
+    """Test that key=value blocks become one event per progress= line."""
+    parser = ProgressParser()
+    events = [e for e in map(parser.feed, PROGRESS_OUTPUT.splitlines()) if e is not None]
+
+    assert len(events) == 2
+    assert events[0] == ProgressEvent(
+        out_time=4.0, fps=59.94, speed=1.98, total_size=262144, frame=120
+    )
+    # N/A fields are unknown; out_time is used when the *_us fields are missing
+    assert events[1].out_time == 8.5
+    assert events[1].fps is None and events[1].speed is None
+    assert events[1].done
+
+
+def test_complete_event_computes_fraction_and_eta():
+    """Test that the ETA follows the measured speed, not elapsed time."""
+    event = _complete_progress_event(ProgressEvent(out_time=30.0, speed=2.0), 100.0)
+    assert event.fraction == 0.3
+    assert event.eta == 35.0
+
+    # Capped until the job is done
+    assert _complete_progress_event(ProgressEvent(out_time=120.0), 100.0).fraction == 0.95
+    # Unknown duration: activity only
+    unknown = _complete_progress_event(ProgressEvent(out_time=5.0, speed=1.0), None)
+    assert unknown.fraction == 0.5 and unknown.eta is None
+
+
+if __name__ == "__main__":
+    test_parser_assembles_blocks()
+    test_complete_event_computes_fraction_and_eta()
+    print("All tests passed!")